@@ -0,0 +1,69 @@
+# appointments/archive.py
+"""
+Archivado de citas antiguas en la tabla fría (ArchivedAppointment).
+
+Cada lote es una sola sentencia: un DELETE ... RETURNING sobre la tabla de
+citas alimenta el INSERT en el archivo y las lápidas de sincronización, así
+una cita nunca queda en ambas tablas ni en ninguna.
+"""
+from django.db import connection
+
+from .caching import invalidate_month_overview
+from .models import Appointment, AppointmentTombstone, ArchivedAppointment
+
+# Solo se archivan citas en un estado final
+ARCHIVABLE_STATUSES = ('completed', 'cancelled')
+
+
+def archived_columns():
+    """Columnas comunes entre Appointment y ArchivedAppointment"""
+    hot = {field.column for field in Appointment._meta.concrete_fields}
+    return [field.column for field in ArchivedAppointment._meta.concrete_fields if field.column in hot]
+
+
+def archive_batch(before, batch_size=1000):
+    """
+    Mueve al archivo hasta `batch_size` citas terminadas con fecha anterior a
+    `before`. Se omiten las referenciadas por movimientos de stock (su FK
+    apunta a la tabla caliente) y las bloqueadas por otra transacción.
+    Devuelve la cantidad de citas archivadas.
+    """
+    from products.models import StockMovement
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in archived_columns())
+    appointments = quote(Appointment._meta.db_table)
+    movements = quote(StockMovement._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {appointments}
+                WHERE id IN (
+                    SELECT a.id FROM {appointments} AS a
+                    WHERE a.date < %s
+                      AND a.status = ANY(%s)
+                      AND NOT EXISTS (SELECT 1 FROM {movements} AS m WHERE m.appointment_id = a.id)
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+            ), archived AS (
+                INSERT INTO {quote(ArchivedAppointment._meta.db_table)} ({columns}, archived_at)
+                SELECT {columns}, now() FROM moved
+            ), tombstones AS (
+                INSERT INTO {quote(AppointmentTombstone._meta.db_table)}
+                    (appointment_id, business_id, employee_id, reason, deleted_at)
+                SELECT id, business_id, employee_id, 'archived', now() FROM moved
+            )
+            SELECT business_id, date_trunc('month', date)::date, count(*)
+            FROM moved
+            GROUP BY 1, 2
+            """,
+            [before, list(ARCHIVABLE_STATUSES), batch_size],
+        )
+        months = cursor.fetchall()
+
+    invalidate_month_overview((business_id, month) for business_id, month, _ in months)
+    return sum(count for _, _, count in months)
@@ -0,0 +1,128 @@
+# appointments/availability.py
+"""
+Disponibilidad por empleado y día como mapa de bits.
+
+Cada día es un int de MINUTES_PER_DAY bits donde el bit i representa el
+minuto i (00:00 es el bit 0): 1 si el empleado está libre. El mapa se arma
+con la ventana del WorkSchedule menos las citas activas, y las consultas
+sobre él son operaciones de bits:
+
+    - ¿Cabe un servicio de d minutos empezando en cada minuto? fits(libre, d)
+      hace log2(d) AND con desplazamiento en vez de recorrer las citas.
+    - ¿Qué horarios de la grilla de 30 minutos se ofrecen? fits(...) & grilla.
+    - ¿Está libre [inicio, fin)? (libre & rango) == rango.
+
+La resolución es de un minuto para no redondear horarios fuera de la
+grilla; un día completo son 1440 bits (180 bytes).
+"""
+from collections import defaultdict
+from datetime import time
+
+from authentication.models import WorkSchedule
+from .models import Appointment
+
+MINUTES_PER_DAY = 24 * 60
+FULL_DAY = (1 << MINUTES_PER_DAY) - 1
+SLOT_STEP = 30  # grilla de la reserva pública, en minutos
+
+
+def to_minute(value):
+    return value.hour * 60 + value.minute
+
+
+def from_minute(minute):
+    return time(minute // 60, minute % 60)
+
+
+def range_mask(start, end):
+    """Bits de [start, end) en minutos; 0 si el rango está vacío"""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def time_range_mask(start_time, end_time):
+    return range_mask(to_minute(start_time), to_minute(end_time))
+
+
+def grid_mask(start, end, step=SLOT_STEP):
+    """Un bit cada `step` minutos desde start, antes de end"""
+    mask = 0
+    for minute in range(start, end, step):
+        mask |= 1 << minute
+    return mask
+
+
+def fits(free, duration):
+    """
+    Bits i tales que [i, i + duration) está libre completo. Se duplica el
+    ancho cubierto en cada paso: con `covered` minutos verificados, un AND
+    con el mapa desplazado `step` extiende la garantía a covered + step.
+    """
+    if duration <= 0:
+        return free
+    result, covered = free, 1
+    while covered < duration:
+        step = min(covered, duration - covered)
+        result &= result >> step
+        covered += step
+    return result
+
+
+def minutes(mask):
+    """Minutos con el bit encendido, en orden"""
+    found = []
+    while mask:
+        low = mask & -mask
+        found.append(low.bit_length() - 1)
+        mask ^= low
+    return found
+
+
+def work_windows(business_id, day, employee_ids=None):
+    """
+    ({employee_id: (inicio, fin)} en minutos para quienes trabajan ese día,
+    ids con algún horario configurado). Una consulta.
+    """
+    schedules = WorkSchedule.objects.filter(employee__business_id=business_id, is_active=True)
+    if employee_ids is not None:
+        schedules = schedules.filter(employee_id__in=employee_ids)
+    windows, scheduled = {}, set()
+    for employee_id, day_of_week, start, end in schedules.values_list(
+        'employee_id', 'day_of_week', 'start_time', 'end_time'
+    ):
+        scheduled.add(employee_id)
+        if day_of_week == day.weekday():
+            windows[employee_id] = (to_minute(start), to_minute(end))
+    return windows, scheduled
+
+
+def busy_masks(business_id, day, employee_ids=None):
+    """{employee_id: bits ocupados por citas activas}. Una consulta."""
+    busy = defaultdict(int)
+    appointments = Appointment.objects.active().filter(business_id=business_id, date=day)
+    if employee_ids is not None:
+        appointments = appointments.filter(employee_id__in=employee_ids)
+    for employee_id, start, end in appointments.values_list('employee_id', 'start_time', 'end_time'):
+        busy[employee_id] |= time_range_mask(start, end)
+    return busy
+
+
+def build_day(business_id, day, employee_ids, unscheduled=None):
+    """
+    Mapas libres {employee_id: bits} del día para los empleados pedidos.
+    Quien no trabaja ese día no aparece; quien no tiene ningún horario
+    configurado recibe `unscheduled` (None también lo omite).
+    """
+    windows, scheduled = work_windows(business_id, day, employee_ids)
+    busy = busy_masks(business_id, day, employee_ids)
+    free = {}
+    for employee_id in employee_ids:
+        if employee_id in windows:
+            free[employee_id] = range_mask(*windows[employee_id])
+        elif employee_id not in scheduled and unscheduled is not None:
+            free[employee_id] = unscheduled
+        else:
+            continue
+        free[employee_id] &= ~busy[employee_id]
+    return free
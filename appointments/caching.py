@@ -0,0 +1,42 @@
+# appointments/caching.py
+"""
+Caché de los agregados del calendario.
+
+El resumen mensual se guarda por negocio y mes. Cualquier escritura sobre una
+cita de ese mes debe llamar a invalidate_month_overview: los signals lo hacen
+para save/delete, y las rutas masivas (bulk_create, update, SQL directo) deben
+llamarlo a mano porque no disparan signals.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from backend.versioning import bump_generation
+
+MONTH_OVERVIEW_TIMEOUT = 60 * 60  # 1 hora
+
+
+def month_overview_key(business_id, year, month):
+    return f'appointments:month_overview:{business_id}:{year:04d}-{month:02d}'
+
+
+def get_month_overview(business_id, year, month):
+    return cache.get(month_overview_key(business_id, year, month))
+
+
+def set_month_overview(business_id, year, month, rows):
+    cache.set(month_overview_key(business_id, year, month), rows, MONTH_OVERVIEW_TIMEOUT)
+
+
+def invalidate_month_overview(pairs):
+    """
+    Invalida el resumen de cada par (business_id, date). Se borra al hacer
+    commit: si se borrara antes, otra petición podría recalcular el mes con
+    los datos previos a la transacción y dejarlos en caché. También avanza
+    la generación 'appointments' de esos negocios (backend/versioning.py),
+    así las rutas masivas invalidan el calendario en el mismo paso.
+    """
+    pairs = [(business_id, day) for business_id, day in pairs if business_id and day]
+    keys = {month_overview_key(business_id, day.year, day.month) for business_id, day in pairs}
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(list(keys)))
+    bump_generation({business_id for business_id, _ in pairs}, 'appointments')
@@ -0,0 +1,94 @@
+# appointments/day_view.py
+"""
+Vista de día por empleado: horario, citas activas y huecos libres.
+
+Arma la respuesta para un rango de fechas y un conjunto de empleados con
+tres consultas fijas (empleados, horarios y citas), sin importar cuántos
+empleados o días se pidan.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from authentication.models import User, WorkSchedule
+from .intervals import free_gaps
+from .models import Appointment
+
+MAX_DAYS = 31
+
+
+def _interval(start, end):
+    return {'start': start.isoformat(), 'end': end.isoformat()}
+
+
+def build_day_view(business, date_from, date_to, employee_ids=None):
+    """
+    `business` es el dict del contexto de tenant (usa id y working_days).
+    Por día y empleado:
+      - schedule: ventana del WorkSchedule, o null si ese día no trabaja.
+      - appointments: citas pendientes o confirmadas.
+      - free: huecos dentro de la ventana; [] si no trabaja o el negocio no
+        abre, y null si el empleado no tiene horario configurado (la agenda
+        no lo restringe, igual que en las series recurrentes).
+    """
+    employees = User.objects.filter(business_id=business['id'], is_active=True)
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    employees = list(employees.order_by('first_name', 'last_name', 'id').values(
+        'id', 'first_name', 'last_name', 'username'
+    ))
+    ids = [employee['id'] for employee in employees]
+
+    schedules = defaultdict(dict)
+    for employee_id, day_of_week, start, end in WorkSchedule.objects.filter(
+        employee_id__in=ids, is_active=True
+    ).values_list('employee_id', 'day_of_week', 'start_time', 'end_time'):
+        schedules[employee_id][day_of_week] = (start, end)
+
+    booked = defaultdict(list)
+    for row in Appointment.objects.active().filter(
+        business_id=business['id'], employee_id__in=ids, date__gte=date_from, date__lte=date_to,
+    ).order_by('start_time').values(
+        'id', 'employee_id', 'date', 'start_time', 'end_time', 'status',
+        'client__first_name', 'client__last_name', 'service__name',
+    ):
+        booked[row['employee_id'], row['date']].append(row)
+
+    days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+    working_days = set(business.get('working_days') or [])
+    result = []
+    for employee in employees:
+        employee_days = []
+        for day in days:
+            rows = booked.get((employee['id'], day), [])
+            window = schedules[employee['id']].get(day.weekday())
+            if day.weekday() not in working_days:
+                window, free = None, []
+            elif not schedules[employee['id']]:
+                free = None
+            elif window is None:
+                free = []
+            else:
+                busy = [(row['start_time'], row['end_time']) for row in rows]
+                free = [_interval(start, end) for start, end in free_gaps(window[0], window[1], busy)]
+            employee_days.append({
+                'date': day.isoformat(),
+                'schedule': _interval(*window) if window else None,
+                'appointments': [
+                    {
+                        'id': row['id'],
+                        'start_time': row['start_time'].isoformat(),
+                        'end_time': row['end_time'].isoformat(),
+                        'status': row['status'],
+                        'client_name': f"{row['client__first_name']} {row['client__last_name']}",
+                        'service_name': row['service__name'],
+                    }
+                    for row in rows
+                ],
+                'free': free,
+            })
+        result.append({
+            'id': employee['id'],
+            'name': f"{employee['first_name']} {employee['last_name']}".strip() or employee['username'],
+            'days': employee_days,
+        })
+    return result
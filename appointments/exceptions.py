@@ -0,0 +1,38 @@
+# appointments/exceptions.py
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import Appointment
+
+# Restricciones de la tabla que representan un choque de horario
+CONFLICT_CONSTRAINTS = (Appointment.OVERLAP_CONSTRAINT, 'unique_appointment')
+
+
+class AppointmentConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'El horario se solapa con otra cita del empleado.'
+    default_code = 'appointment_conflict'
+
+
+def is_conflict_error(error):
+    message = str(error)
+    return any(name in message for name in CONFLICT_CONSTRAINTS)
+
+
+@contextmanager
+def conflicts_as_409():
+    """
+    Ejecuta la escritura en un savepoint y traduce la violación de la
+    restricción de solapamiento (o de unique_appointment) en un 409, en vez
+    de dejar escapar un IntegrityError como 500.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as e:
+        if is_conflict_error(e):
+            raise AppointmentConflict()
+        raise
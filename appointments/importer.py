@@ -0,0 +1,516 @@
+# appointments/importer.py
+"""
+Importación masiva de citas históricas desde CSV o ICS.
+
+Pensada para migrar la agenda de un salón: las filas se cargan con COPY en
+bloques de IMPORT_CHUNK_SIZE, sin pasar por el ORM, así que no se disparan
+los signals (Google Calendar, Zapier, Resend) ni se instancia un modelo por
+fila. Clientes, servicios y empleados se resuelven con mapas en memoria
+cargados una vez por negocio; los clientes que no existen se crean con
+bulk_create.
+
+CSV (UTF-8, con encabezado):
+    date,start_time,end_time,client_email,client_name,service,employee,status,notes,payment_method,price
+    - date YYYY-MM-DD, horas HH:MM[:SS]; sin end_time se usa la duración del servicio.
+    - service por nombre, employee por email o username (o --employee).
+    - status por defecto: completed si la fecha ya pasó, confirmed si no.
+
+ICS (VEVENT): DTSTART/DTEND, SUMMARY "Servicio" o "Servicio - Cliente"
+(se ignora el emoji de estado que agrega Google Calendar), ATTENDEE con
+mailto y CN para el cliente, ORGANIZER para el empleado, STATUS
+(CANCELLED, TENTATIVE, CONFIRMED) y DESCRIPTION como notas.
+
+Las filas que no se pueden resolver, o que chocarían con unique_appointment
+o appointment_no_overlap (contra la base o dentro del mismo archivo), se
+omiten y se informan con su línea. Si una reserva concurrente ocupa el
+horario entre esa verificación y el COPY, el bloque se vuelve a verificar y
+se reintenta una vez; si vuelve a chocar, AppointmentConflict (409).
+"""
+import csv
+import io
+import re
+import time as clock
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from datetime import timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from authentication.models import User
+from backend.versioning import bump_generation
+from clients.models import Client
+from services.models import Service
+from .caching import invalidate_month_overview
+from .exceptions import conflicts_as_409, is_conflict_error
+from .models import Appointment
+
+IMPORT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+MAX_PRICE = Decimal('99999999.99')  # price_at_booking: max_digits=10, decimal_places=2
+
+COPY_COLUMNS = (
+    'business_id', 'client_id', 'service_id', 'employee_id', 'date', 'start_time', 'end_time',
+    'status', 'notes', 'payment_method', 'price_at_booking', 'duration_at_booking',
+    'created_at', 'updated_at',
+)
+STATUSES = {value for value, _ in Appointment.STATUS_CHOICES}
+PAYMENT_METHODS = {value for value, _ in Appointment.PAYMENT_METHOD_CHOICES}
+ICS_STATUSES = {'CANCELLED': 'cancelled', 'TENTATIVE': 'pending', 'CONFIRMED': None}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportRow:
+    line: int
+    date: date
+    start_time: dtime
+    end_time: dtime | None = None
+    client_email: str = ''
+    client_name: str = ''
+    service: str = ''
+    employee: str = ''
+    status: str = ''
+    notes: str = ''
+    payment_method: str = ''
+    price: str = ''
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    clients_created: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'skipped': self.error_count,
+            'clients_created': self.clients_created,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': self.errors,
+        }
+
+
+def _parse_time(value):
+    try:
+        return dtime.fromisoformat(value.strip())
+    except ValueError:
+        raise ImportRowError(f"Hora inválida: '{value}'")
+
+
+def _parse_price(value):
+    try:
+        price = Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ImportRowError(f"Precio inválido: '{value}'")
+    if not price.is_finite() or not 0 <= price <= MAX_PRICE:
+        raise ImportRowError(f"Precio inválido: '{value}'")
+    return price
+
+
+# ---------------------------------------------------------------- CSV
+
+
+def parse_csv(stream):
+    """Genera ImportRow o ImportRowError (con .line) por cada fila del CSV"""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        line = reader.line_num
+        record = {key.strip().lower(): (value or '').strip() for key, value in record.items() if key}
+        try:
+            if not record.get('date') or not record.get('start_time'):
+                raise ImportRowError("Faltan 'date' o 'start_time'")
+            try:
+                day = date.fromisoformat(record['date'])
+            except ValueError:
+                raise ImportRowError(f"Fecha inválida: '{record['date']}'")
+            yield ImportRow(
+                line=line,
+                date=day,
+                start_time=_parse_time(record['start_time']),
+                end_time=_parse_time(record['end_time']) if record.get('end_time') else None,
+                client_email=record.get('client_email', ''),
+                client_name=record.get('client_name', ''),
+                service=record.get('service', ''),
+                employee=record.get('employee', ''),
+                status=record.get('status', ''),
+                notes=record.get('notes', ''),
+                payment_method=record.get('payment_method', ''),
+                price=record.get('price', ''),
+            )
+        except ImportRowError as error:
+            error.line = line
+            yield error
+
+
+# ---------------------------------------------------------------- ICS
+
+ICS_PROPERTY_RE = re.compile(r'^(?P<name>[A-Za-z0-9-]+)(?P<params>(?:;[^:]*)?):(?P<value>.*)$')
+
+
+def _ics_unescape(value):
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m[1] in 'nN' else m[1], value)
+
+
+def _ics_datetime(value, params, local_tz):
+    if params.get('VALUE') == 'DATE' or 'T' not in value:
+        raise ImportRowError("Evento de día completo")
+    parsed = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    elif 'TZID' in params:
+        try:
+            parsed = parsed.replace(tzinfo=ZoneInfo(params['TZID']))
+        except ZoneInfoNotFoundError:
+            raise ImportRowError(f"Zona horaria desconocida: {params['TZID']}")
+    else:
+        return parsed  # hora flotante: se toma como local
+    return parsed.astimezone(local_tz).replace(tzinfo=None)
+
+
+def _ics_event(properties, line, local_tz):
+    values = {name: (value, params) for name, params, value in properties}
+    if 'DTSTART' not in values:
+        raise ImportRowError("Evento sin DTSTART")
+    start = _ics_datetime(values['DTSTART'][0], values['DTSTART'][1], local_tz)
+    end = _ics_datetime(values['DTEND'][0], values['DTEND'][1], local_tz) if 'DTEND' in values else None
+    if end is not None and end.date() != start.date():
+        raise ImportRowError("La cita cruza la medianoche")
+
+    # "✅ Corte" o "Corte - Ana Pérez": se descarta lo que no sea texto al inicio
+    summary = re.sub(r'^\W+', '', _ics_unescape(values.get('SUMMARY', ('', {}))[0])).strip()
+    service, _, client_name = summary.partition(' - ')
+
+    client_email = ''
+    for name, params, value in properties:
+        if name == 'ATTENDEE' and value.lower().startswith('mailto:'):
+            client_email = value[7:]
+            client_name = client_name or params.get('CN', '').strip('"')
+            break
+    organizer = values.get('ORGANIZER', ('', {}))[0]
+    status = ICS_STATUSES.get(values.get('STATUS', ('', {}))[0].upper())
+
+    return ImportRow(
+        line=line,
+        date=start.date(),
+        start_time=start.time(),
+        end_time=end.time() if end else None,
+        client_email=client_email,
+        client_name=client_name.strip(),
+        service=service.strip(),
+        employee=organizer[7:] if organizer.lower().startswith('mailto:') else '',
+        status=status or '',
+        notes=_ics_unescape(values.get('DESCRIPTION', ('', {}))[0]),
+    )
+
+
+def parse_ics(stream):
+    """Genera ImportRow o ImportRowError por cada VEVENT"""
+    local_tz = timezone.get_current_timezone()
+    properties, start_line = None, 0
+
+    def logical_lines():
+        # Desdoblado RFC 5545: una línea que empieza con espacio continúa la anterior
+        current, current_line = None, 0
+        for line, raw in enumerate(stream, start=1):
+            raw = raw.rstrip('\r\n')
+            if raw[:1] in (' ', '\t') and current is not None:
+                current += raw[1:]
+                continue
+            if current is not None:
+                yield current_line, current
+            current, current_line = raw, line
+        if current is not None:
+            yield current_line, current
+
+    for number, text in logical_lines():
+        if text == 'BEGIN:VEVENT':
+            properties, start_line = [], number
+            continue
+        if text == 'END:VEVENT' and properties is not None:
+            try:
+                yield _ics_event(properties, start_line, local_tz)
+            except ImportRowError as error:
+                error.line = start_line
+                yield error
+            except ValueError:
+                error = ImportRowError("Fecha u hora inválida en el evento")
+                error.line = start_line
+                yield error
+            properties = None
+            continue
+        if properties is None:
+            continue
+        match = ICS_PROPERTY_RE.match(text)
+        if match:
+            params = {}
+            for param in match['params'].split(';')[1:]:
+                key, _, value = param.partition('=')
+                params[key.upper()] = value
+            properties.append((match['name'].upper(), params, match['value']))
+
+
+# ---------------------------------------------------------------- carga
+
+
+class AppointmentImporter:
+    """
+    Resuelve e inserta filas de un negocio. Sin signals: al final invalida
+    el resumen mensual (y con él la generación del calendario).
+    """
+
+    def __init__(self, business_id, default_employee=None, chunk_size=IMPORT_CHUNK_SIZE):
+        self.business_id = business_id
+        self.chunk_size = chunk_size
+        self.report = ImportReport()
+        self.touched = set()
+        self.today = timezone.localdate()
+
+        self.services = {
+            name.lower(): (pk, price, duration)
+            for pk, name, price, duration in Service.objects.filter(business_id=business_id)
+            .values_list('id', 'name', 'price', 'duration')
+        }
+        self.employees = {}
+        for pk, email, username in User.objects.filter(business_id=business_id).values_list('id', 'email', 'username'):
+            self.employees[username.lower()] = pk
+            if email:
+                self.employees[email.lower()] = pk
+        self.clients_by_email = {}
+        self.clients_by_name = {}
+        for pk, email, first_name, last_name in Client.objects.filter(business_id=business_id).values_list(
+            'id', 'email', 'first_name', 'last_name'
+        ):
+            self.clients_by_email[email.lower()] = pk
+            # Un nombre repetido no sirve para resolver: se marca como ambiguo
+            key = f'{first_name} {last_name}'.strip().lower()
+            self.clients_by_name[key] = None if key in self.clients_by_name else pk
+
+        self.default_employee = None
+        if default_employee:
+            self.default_employee = self.employees.get(default_employee.lower())
+            if self.default_employee is None:
+                raise ValueError(f"Empleado no encontrado en el negocio: {default_employee}")
+
+    def run(self, rows):
+        started = clock.perf_counter()
+        chunk = []
+        with transaction.atomic():
+            for row in rows:
+                self.report.rows += 1
+                if isinstance(row, ImportRowError):
+                    self.report.add_error(row.line, str(row))
+                    continue
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self.load_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self.load_chunk(chunk)
+            invalidate_month_overview((self.business_id, day) for day in self.touched)
+            if self.report.clients_created:
+                bump_generation(self.business_id, 'appointments')
+        self.report.seconds = clock.perf_counter() - started
+        return self.report
+
+    def load_chunk(self, rows):
+        resolved = []
+        for row in rows:
+            try:
+                resolved.append((row, self.resolve(row)))
+            except ImportRowError as error:
+                self.report.add_error(row.line, str(error))
+        self.create_missing_clients(resolved)
+
+        records = [(row, record) for row, record in resolved if record['client_id'] is not None]
+        records = self.drop_conflicts(records)
+        try:
+            with transaction.atomic():
+                self.copy([record for _, record in records])
+        except IntegrityError as error:
+            if not is_conflict_error(error):
+                raise
+            # Una reserva entró entre drop_conflicts y el COPY: ya está
+            # confirmada, así que una segunda verificación la ve
+            records = self.drop_conflicts(records)
+            with conflicts_as_409():
+                self.copy([record for _, record in records])
+        self.report.imported += len(records)
+        self.touched.update(record['date'].replace(day=1) for _, record in records)
+
+    def resolve(self, row):
+        service = self.services.get(row.service.lower())
+        if service is None:
+            raise ImportRowError(f"Servicio no encontrado: '{row.service}'")
+        service_id, service_price, duration = service
+
+        employee_id = self.employees.get(row.employee.lower()) if row.employee else self.default_employee
+        if employee_id is None:
+            raise ImportRowError(f"Empleado no encontrado: '{row.employee}'")
+
+        end_time = row.end_time
+        if end_time is None:
+            end_time = (datetime.combine(row.date, row.start_time) + timedelta(minutes=duration)).time()
+        if end_time <= row.start_time:
+            raise ImportRowError("La hora de fin debe ser posterior a la de inicio")
+
+        price = _parse_price(row.price) if row.price else service_price
+
+        status = row.status.lower() or ('completed' if row.date < self.today else 'confirmed')
+        if status not in STATUSES:
+            raise ImportRowError(f"Estado inválido: '{row.status}'")
+        payment_method = row.payment_method.lower() or None
+        if payment_method and payment_method not in PAYMENT_METHODS:
+            raise ImportRowError(f"Medio de pago inválido: '{row.payment_method}'")
+
+        client_id = None
+        if row.client_email:
+            client_id = self.clients_by_email.get(row.client_email.lower())
+        elif row.client_name:
+            client_id = self.clients_by_name.get(row.client_name.lower())
+            if client_id is None:
+                raise ImportRowError(f"Cliente sin email y sin coincidencia única por nombre: '{row.client_name}'")
+        else:
+            raise ImportRowError("Falta el cliente (client_email o client_name)")
+
+        return {
+            'client_id': client_id,
+            'client_email': row.client_email.lower(),
+            'client_name': row.client_name,
+            'service_id': service_id,
+            'employee_id': employee_id,
+            'date': row.date,
+            'start_time': row.start_time,
+            'end_time': end_time,
+            'status': status,
+            'notes': row.notes or None,
+            'payment_method': payment_method,
+            'price_at_booking': price,
+            'duration_at_booking': duration,
+        }
+
+    def create_missing_clients(self, resolved):
+        """Crea con bulk_create los clientes nuevos del bloque (por email)"""
+        missing = {}
+        for row, record in resolved:
+            if record['client_id'] is None and record['client_email'] not in missing:
+                missing[record['client_email']] = record['client_name']
+        if not missing:
+            return
+
+        # El email de cliente es único en toda la base, no solo en el negocio
+        taken = set(Client.objects.filter(email__in=missing).values_list('email', flat=True))
+        new_clients = []
+        for email, name in missing.items():
+            if email in taken:
+                continue
+            first_name, _, last_name = (name or email.split('@')[0]).partition(' ')
+            new_clients.append(Client(
+                business_id=self.business_id, first_name=first_name[:100], last_name=last_name[:100], email=email,
+            ))
+        for client in Client.objects.bulk_create(new_clients):
+            self.clients_by_email[client.email] = client.pk
+        self.report.clients_created += len(new_clients)
+
+        for row, record in resolved:
+            if record['client_id'] is None:
+                record['client_id'] = self.clients_by_email.get(record['client_email'])
+                if record['client_id'] is None:
+                    self.report.add_error(row.line, f"El email {record['client_email']} es de un cliente de otro negocio")
+
+    def drop_conflicts(self, records):
+        """
+        Omite filas que violarían unique_appointment o appointment_no_overlap.
+        Las citas activas aceptadas de cada (empleado, fecha) se mantienen
+        ordenadas y sin solapes, así que cada fila nueva solo se compara con
+        sus vecinas; ante un choque entre filas del archivo gana la primera.
+        """
+        if not records:
+            return records
+        dates = [record['date'] for _, record in records]
+        existing = Appointment.objects.filter(
+            employee_id__in={record['employee_id'] for _, record in records},
+            date__gte=min(dates),
+            date__lte=max(dates),
+        ).values_list('employee_id', 'date', 'start_time', 'end_time', 'status')
+
+        taken = set()
+        busy = defaultdict(list)
+        for employee_id, day, start, end, status in existing:
+            taken.add((employee_id, day, start))
+            if status in Appointment.ACTIVE_STATUSES:
+                busy[(employee_id, day)].append((start, end))
+        for intervals in busy.values():
+            intervals.sort()
+
+        kept = []
+        for row, record in records:
+            key = (record['employee_id'], record['date'], record['start_time'])
+            if key in taken:
+                self.report.add_error(row.line, "Ya existe una cita del empleado a esa hora")
+                continue
+            if record['status'] in Appointment.ACTIVE_STATUSES:
+                intervals = busy[(record['employee_id'], record['date'])]
+                position = bisect_left(intervals, (record['start_time'], record['end_time']))
+                before = intervals[position - 1] if position else None
+                after = intervals[position] if position < len(intervals) else None
+                if (before and before[1] > record['start_time']) or (after and after[0] < record['end_time']):
+                    self.report.add_error(row.line, "Se solapa con otra cita activa del empleado")
+                    continue
+                intervals.insert(position, (record['start_time'], record['end_time']))
+            taken.add(key)
+            kept.append((row, record))
+        return kept
+
+    def copy(self, records):
+        if not records:
+            return
+        now = timezone.now().isoformat()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow([
+                self.business_id, record['client_id'], record['service_id'], record['employee_id'],
+                record['date'].isoformat(), record['start_time'].isoformat(), record['end_time'].isoformat(),
+                record['status'], record['notes'], record['payment_method'],
+                record['price_at_booking'], record['duration_at_booking'], now, now,
+            ])
+        buffer.seek(0)
+        # copy_expert no pasa por el wrapper de errores del cursor de Django:
+        # sin esto un choque llega como psycopg2 y no como IntegrityError
+        with connection.cursor() as cursor, connection.wrap_database_errors:
+            cursor.copy_expert(
+                f"COPY {Appointment._meta.db_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+
+def parse_file(stream, file_format):
+    if file_format == 'csv':
+        return parse_csv(stream)
+    if file_format == 'ics':
+        return parse_ics(stream)
+    raise ValueError(f"Formato no soportado: {file_format}")
@@ -0,0 +1,79 @@
+# appointments/intervals.py
+"""
+Detección de solapamientos en memoria para operaciones por lote.
+
+La base de datos (appointment_no_overlap) sigue siendo la garantía final;
+esto permite validar un lote completo con una sola consulta y devolver el
+error de cada ítem en vez de abortar en el primer choque.
+"""
+from collections import defaultdict
+
+
+def find_overlaps(intervals):
+    """
+    Recibe tuplas (clave, inicio, fin, ref) con intervalos semiabiertos
+    [inicio, fin) y devuelve {ref: ref_en_conflicto} para cada intervalo que
+    choca con otro de la misma clave (por ejemplo (empleado, fecha)).
+
+    Barrido ordenado por inicio: un intervalo choca con alguno anterior si y
+    solo si empieza antes del mayor fin visto hasta ese punto.
+    """
+    groups = defaultdict(list)
+    for key, start, end, ref in intervals:
+        groups[key].append((start, end, ref))
+
+    conflicts = {}
+    for group in groups.values():
+        group.sort(key=lambda interval: (interval[0], interval[1]))
+        reach_end, reach_ref = None, None
+        for start, end, ref in group:
+            if reach_end is not None and start < reach_end:
+                conflicts.setdefault(ref, reach_ref)
+                conflicts.setdefault(reach_ref, ref)
+            if reach_end is None or end > reach_end:
+                reach_end, reach_ref = end, ref
+    return conflicts
+
+
+def free_gaps(window_start, window_end, busy):
+    """
+    Huecos libres de la ventana [window_start, window_end) dados los
+    intervalos ocupados (inicio, fin), que pueden solaparse entre sí o
+    salirse de la ventana. Devuelve [(inicio, fin)] ordenados.
+    """
+    gaps = []
+    cursor = window_start
+    for start, end in sorted(busy):
+        if start >= window_end:
+            break
+        if end <= cursor:
+            continue
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = end
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def sweep_overlaps(intervals, keep):
+    """
+    Barrido lineal sobre tuplas (clave, inicio, fin, ítem) que ya vienen
+    ordenadas por clave e inicio (por ejemplo un cursor de la base con
+    ORDER BY employee_id, date, start_time). Genera (conservado, descartado)
+    por cada solapamiento; keep(a, b) elige cuál de los dos ítems queda.
+
+    Los conservados de una clave nunca se solapan entre sí, así que el
+    último conservado es el de mayor fin y basta compararlo con el actual:
+    la memoria no depende de la cantidad de filas.
+    """
+    last_key, last_end, last_item = None, None, None
+    for key, start, end, item in intervals:
+        if key != last_key or start >= last_end:
+            last_key, last_end, last_item = key, end, item
+            continue
+        kept = keep(last_item, item)
+        dropped = item if kept is last_item else last_item
+        yield kept, dropped
+        if kept is item:
+            last_end, last_item = end, item
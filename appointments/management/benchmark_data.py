@@ -0,0 +1,93 @@
+# appointments/management/benchmark_data.py
+"""
+Datos sintéticos para los comandos de benchmark.
+
+Las citas se insertan con INSERT ... SELECT generate_series en vez de pasar
+por el ORM: no disparan signals (Google Calendar, Zapier, Resend) y permiten
+llegar a millones de filas en segundos. Cada fila cae en un bloque de 30 min
+distinto por empleado, así no chocan con unique_appointment.
+"""
+import uuid
+from datetime import date
+
+from django.db import connection
+
+from authentication.models import Business, User
+from clients.models import Client
+from services.models import Service, ServiceCategory
+
+SLOTS_PER_DAY = 16  # 09:00 a 17:00 en bloques de 30 min
+
+NOTES_WORDS = [
+    'alergia', 'tinte', 'corte', 'barba', 'manicure', 'pedicure', 'masaje',
+    'limpieza', 'depilación', 'alisado', 'peinado', 'uñas', 'facial', 'cejas',
+]
+
+
+def create_benchmark_tenant(employees=10, clients=200):
+    """Crea un negocio aislado con empleados, clientes y un servicio de 30 min."""
+    tag = uuid.uuid4().hex[:8]
+    business = Business.objects.create(name=f'Benchmark {tag}', slug=f'benchmark-{tag}')
+    category = ServiceCategory.objects.create(business=business, name='Benchmark')
+    service = Service.objects.create(
+        business=business, category=category, name='Servicio benchmark', price=10000, duration=30,
+    )
+    # bulk_create no dispara el signal que crea calendarios de Google
+    employee_objs = User.objects.bulk_create([
+        User(
+            username=f'bench-{tag}-{i}', email=f'bench-{tag}-{i}@example.com',
+            first_name='Empleado', last_name=str(i), business=business,
+        )
+        for i in range(employees)
+    ])
+    client_objs = Client.objects.bulk_create([
+        Client(
+            business=business, first_name=f'Cliente{i}', last_name=f'Apellido{i % 97}',
+            email=f'client-{tag}-{i}@example.com',
+        )
+        for i in range(clients)
+    ])
+    return business, service, [e.id for e in employee_objs], [c.id for c in client_objs]
+
+
+def seed_appointments(business, service, employee_ids, client_ids, count, offset=0, start_date=date(2015, 1, 1)):
+    """Inserta `count` citas a partir de la posición `offset` de la serie."""
+    if count <= 0:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO appointments_appointment (
+                business_id, client_id, service_id, employee_id, date, start_time, end_time,
+                status, notes, created_at, updated_at
+            )
+            SELECT
+                %(business)s,
+                (%(clients)s::bigint[])[1 + (i %% %(n_clients)s)],
+                %(service)s,
+                (%(employees)s::bigint[])[1 + (i %% %(n_employees)s)],
+                %(start_date)s::date + ((i / %(n_employees)s) / %(slots)s)::int,
+                time '09:00' + ((i / %(n_employees)s) %% %(slots)s) * interval '30 minutes',
+                time '09:30' + ((i / %(n_employees)s) %% %(slots)s) * interval '30 minutes',
+                (ARRAY['pending', 'confirmed', 'completed', 'cancelled'])[1 + (i %% 4)],
+                (%(words)s::text[])[1 + (i %% %(n_words)s)] || ' ' || (%(words)s::text[])[1 + ((i / 7) %% %(n_words)s)],
+                now() - (%(last)s - i) * interval '1 second',
+                now() - (%(last)s - i) * interval '1 second'
+            FROM generate_series(%(first)s, %(last)s) AS i
+            """,
+            {
+                'business': business.id,
+                'service': service.id,
+                'clients': list(client_ids),
+                'n_clients': len(client_ids),
+                'employees': list(employee_ids),
+                'n_employees': len(employee_ids),
+                'start_date': start_date,
+                'slots': SLOTS_PER_DAY,
+                'words': NOTES_WORDS,
+                'n_words': len(NOTES_WORDS),
+                'first': offset,
+                'last': offset + count - 1,
+            },
+        )
+        cursor.execute('ANALYZE appointments_appointment, clients_client, authentication_user')
@@ -0,0 +1,43 @@
+# appointments/management/commands/backfill_booking_snapshot.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from appointments.caching import invalidate_month_overview
+from appointments.models import Appointment, ArchivedAppointment
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = (
+        'Completa price_at_booking y duration_at_booking de las citas anteriores a esas '
+        'columnas con el precio y la duración actuales del servicio, por lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por UPDATE')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        service = Service.objects.filter(pk=OuterRef('service_id'))
+
+        for model in (Appointment, ArchivedAppointment):
+            missing = model.objects.filter(Q(price_at_booking__isnull=True) | Q(duration_at_booking__isnull=True))
+            total = 0
+            while True:
+                # Lotes cortos: cada UPDATE bloquea pocas filas y no toca updated_at,
+                # así la sincronización incremental no reenvía todo el historial
+                with transaction.atomic():
+                    batch = list(missing.values_list('pk', 'business_id', 'date')[:batch_size])
+                    updated = model.objects.filter(pk__in=[pk for pk, _, _ in batch]).update(
+                        price_at_booking=Subquery(service.values('price')[:1]),
+                        duration_at_booking=Subquery(service.values('duration')[:1]),
+                    )
+                    if model is Appointment:
+                        # update() no dispara signals: el resumen mensual se invalida a mano
+                        invalidate_month_overview({(business_id, day.replace(day=1)) for _, business_id, day in batch})
+                total += updated
+                if updated < batch_size:
+                    break
+            self.stdout.write(f'💾 {total} filas completadas en {model._meta.verbose_name_plural}')
+        self.stdout.write(self.style.SUCCESS('✅ Backfill terminado'))
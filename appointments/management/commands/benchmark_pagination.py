@@ -0,0 +1,82 @@
+# appointments/management/commands/benchmark_pagination.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from appointments.management.benchmark_data import create_benchmark_tenant, seed_appointments
+from appointments.models import Appointment
+from backend.pagination import KeysetPagination
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _View:
+    keyset_ordering = ('date', 'start_time', 'id')
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de paginación keyset vs OFFSET a medida que crece la tabla de citas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000',
+                            help='Tamaños de tabla a medir, separados por coma')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--samples', type=int, default=5, help='Repeticiones por medición (se usa la mediana)')
+        parser.add_argument('--keep', action='store_true', help='No revertir los datos generados')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options['sizes'].split(','))
+        try:
+            with transaction.atomic():
+                self.run(sizes, options)
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            self.stdout.write('🧹 Datos de benchmark revertidos')
+
+    def run(self, sizes, options):
+        page_size = options['page_size']
+        business, service, employee_ids, client_ids = create_benchmark_tenant()
+        queryset = Appointment.objects.filter(business_id=business.id)
+        ordering = _View.keyset_ordering
+
+        self.stdout.write(f"{'filas':>10} {'profundidad':>12} {'keyset ms':>10} {'offset ms':>10}")
+        seeded = 0
+        for size in sizes:
+            started = time.perf_counter()
+            seed_appointments(business, service, employee_ids, client_ids, size - seeded, offset=seeded)
+            seeded = size
+            self.stdout.write(f"📥 {size} filas generadas en {time.perf_counter() - started:.1f}s")
+
+            for depth in (0.0, 0.5, 0.99):
+                offset = int((size - page_size) * depth)
+                keyset_ms = self.measure_keyset(queryset, ordering, offset, page_size, options['samples'])
+                offset_ms = self.measure(
+                    lambda: list(queryset.order_by(*ordering)[offset:offset + page_size]), options['samples'])
+                self.stdout.write(f"{size:>10} {depth:>12.0%} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+    def measure_keyset(self, queryset, ordering, offset, page_size, samples):
+        paginator = KeysetPagination()
+        params = {'page_size': page_size}
+        if offset:
+            # Posición de la fila anterior a la página (fuera de la medición)
+            previous = queryset.order_by(*ordering)[offset - 1]
+            paginator.ordering = ordering
+            params['cursor'] = paginator.encode_cursor(paginator.get_position(previous))
+        request = Request(APIRequestFactory().get('/api/appointments/', params, HTTP_HOST='localhost'))
+        return self.measure(lambda: paginator.paginate_queryset(queryset, request, view=_View()), samples)
+
+    @staticmethod
+    def measure(fn, samples):
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,78 @@
+# appointments/management/commands/benchmark_search.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from appointments.management.benchmark_data import create_benchmark_tenant, seed_appointments
+from appointments.models import Appointment
+from authentication.models import User
+from backend.search import TrigramSearchFilter
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _View:
+    search_fields = ['notes', 'client__first_name', 'client__last_name', 'employee__username']
+
+
+class Command(BaseCommand):
+    help = 'Compara ?search= con SearchFilter (icontains sobre JOINs) vs TrigramSearchFilter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000000, help='Cantidad de citas a generar')
+        parser.add_argument('--terms', default='Apellido42,Cliente17,alisado peinado,zzz-sin-resultados',
+                            help='Búsquedas a medir, separadas por coma')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--samples', type=int, default=5, help='Repeticiones por medición (se usa la mediana)')
+        parser.add_argument('--keep', action='store_true', help='No revertir los datos generados')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            self.stdout.write('🧹 Datos de benchmark revertidos')
+
+    def run(self, options):
+        business, service, employee_ids, client_ids = create_benchmark_tenant()
+        started = time.perf_counter()
+        seed_appointments(business, service, employee_ids, client_ids, options['size'])
+        self.stdout.write(f"📥 {options['size']} citas generadas en {time.perf_counter() - started:.1f}s")
+
+        user = User.objects.get(pk=employee_ids[0])
+        queryset = Appointment.objects.filter(business_id=business.id)
+
+        self.stdout.write(f"{'búsqueda':>22} {'filas':>8} {'icontains ms':>13} {'trigram ms':>11}")
+        for term in options['terms'].split(','):
+            request = Request(APIRequestFactory().get('/api/appointments/', {'search': term}, HTTP_HOST='localhost'))
+            request.user = user
+            page = slice(0, options['page_size'])
+
+            def naive():
+                return list(filters.SearchFilter().filter_queryset(request, queryset, _View())[page])
+
+            def trigram():
+                return list(TrigramSearchFilter().filter_queryset(request, queryset, _View())[page])
+
+            rows = len(trigram())
+            naive_ms = self.measure(naive, options['samples'])
+            trigram_ms = self.measure(trigram, options['samples'])
+            self.stdout.write(f"{term:>22} {rows:>8} {naive_ms:>13.2f} {trigram_ms:>11.2f}")
+
+    @staticmethod
+    def measure(fn, samples):
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,82 @@
+# appointments/management/commands/benchmark_serializers.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from appointments.management.benchmark_data import create_benchmark_tenant, seed_appointments
+from appointments.models import Appointment
+from appointments.serializers import CalendarAppointmentSerializer, CalendarAppointmentValuesSerializer
+from backend.query_planner import plan_queryset
+from clients.models import Client
+from clients.serializers import ClientSerializer, ClientValuesSerializer
+from products.models import Product, ProductCategory, StockMovement
+from products.serializers import StockMovementSerializer, StockMovementValuesSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Filas por segundo: ModelSerializer vs serializers sobre .values() (incluye la consulta)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000, help='Filas por listado')
+        parser.add_argument('--samples', type=int, default=5, help='Repeticiones por medición (se usa la mediana)')
+        parser.add_argument('--keep', action='store_true', help='No revertir los datos generados')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            self.stdout.write('🧹 Datos de benchmark revertidos')
+
+    def run(self, options):
+        size = options['size']
+        business, service, employee_ids, client_ids = create_benchmark_tenant(clients=size)
+        seed_appointments(business, service, employee_ids, client_ids, size)
+        category = ProductCategory.objects.create(business=business, name='Benchmark')
+        product = Product.objects.create(business=business, category=category, name='Producto benchmark',
+                                         sale_price=1000)
+        # bulk_create no dispara los signals de stock
+        StockMovement.objects.bulk_create([
+            StockMovement(product=product, quantity=1, movement_type='in', unit_price=500,
+                          performed_by_id=employee_ids[i % len(employee_ids)] if i % 3 else None)
+            for i in range(size)
+        ])
+
+        cases = (
+            ('calendario', CalendarAppointmentSerializer, CalendarAppointmentValuesSerializer,
+             Appointment.objects.filter(business=business)),
+            ('clientes', ClientSerializer, ClientValuesSerializer, Client.objects.filter(business=business)),
+            ('movimientos', StockMovementSerializer, StockMovementValuesSerializer,
+             StockMovement.objects.filter(product=product)),
+        )
+        self.stdout.write(f"{'listado':>12} {'filas':>8} {'model filas/s':>14} {'values filas/s':>15} {'x':>6}")
+        for label, model_serializer, values_serializer, queryset in cases:
+            def model():
+                return model_serializer(plan_queryset(queryset, model_serializer), many=True).data
+
+            def values():
+                return values_serializer(queryset, many=True).data
+
+            rows = len(values())
+            model_rate = rows / self.measure(model, options['samples'])
+            values_rate = rows / self.measure(values, options['samples'])
+            self.stdout.write(
+                f"{label:>12} {rows:>8} {model_rate:>14,.0f} {values_rate:>15,.0f} {values_rate / model_rate:>6.1f}"
+            )
+
+    @staticmethod
+    def measure(fn, samples):
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
@@ -0,0 +1,65 @@
+# appointments/management/commands/import_appointments.py
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from appointments.exceptions import AppointmentConflict
+from appointments.importer import IMPORT_CHUNK_SIZE, AppointmentImporter, parse_file
+from authentication.models import Business
+
+
+class DryRun(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa citas históricas de un negocio desde un CSV o un ICS con COPY, sin disparar '
+        'notificaciones ni sincronizaciones. Ver appointments/importer.py para el formato.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .ics')
+        parser.add_argument('--business', type=int, required=True, help='id del negocio')
+        parser.add_argument('--format', choices=['csv', 'ics'], help='Por defecto según la extensión')
+        parser.add_argument('--employee', help='Email o username del empleado para filas sin empleado '
+                                               '(p. ej. el calendario ICS de una sola persona)')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Filas por COPY')
+        parser.add_argument('--dry-run', action='store_true', help='Valida e informa sin guardar nada')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'ics'):
+            raise CommandError('No se reconoce el formato: usa --format csv|ics')
+        if not Business.objects.filter(pk=options['business']).exists():
+            raise CommandError(f"No existe el negocio {options['business']}")
+
+        try:
+            importer = AppointmentImporter(options['business'], options['employee'], options['chunk_size'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            try:
+                with transaction.atomic():
+                    report = importer.run(parse_file(stream, file_format))
+                    if options['dry_run']:
+                        raise DryRun
+            except DryRun:
+                self.stdout.write('🧪 --dry-run: no se guardó nada')
+            except UnicodeDecodeError as error:
+                raise CommandError(f'El archivo debe estar codificado en UTF-8 ({error})')
+            except AppointmentConflict as error:
+                raise CommandError(f'{error} Se canceló la importación; vuelve a intentarlo.')
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f"  línea {error['line']}: {error['error']}"))
+        if report.error_count > len(report.errors):
+            self.stdout.write(f'  … y {report.error_count - len(report.errors)} errores más')
+        self.stdout.write(self.style.SUCCESS(
+            f'📥 {report.imported}/{report.rows} citas importadas, {report.error_count} omitidas, '
+            f'{report.clients_created} clientes nuevos en {report.seconds:.2f}s '
+            f'({report.rows_per_second:,.0f} filas/s)'
+        ))
@@ -0,0 +1,54 @@
+# appointments/management/commands/partition_appointments.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from appointments import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        'Particiona la tabla de citas por fecha (--convert, una sola vez, en ventana de mantenimiento) '
+        'y crea por adelantado las particiones futuras (correr mensualmente por cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Convertir la tabla actual en particionada (bloquea la tabla durante la copia)')
+        parser.add_argument('--interval', choices=partitioning.INTERVALS, default='month',
+                            help='Tamaño de cada partición nueva')
+        parser.add_argument('--months-ahead', type=int, default=12,
+                            help='Meses hacia adelante que deben quedar cubiertos')
+        parser.add_argument('--detach-before', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                            help='Desconectar las particiones que terminan antes de esta fecha')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        if options['convert']:
+            try:
+                copied = partitioning.convert_to_partitioned(interval, options['months_ahead'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'🗂️ Tabla de citas particionada ({copied} filas copiadas)'))
+        else:
+            with connection.cursor() as cursor:
+                if not partitioning.is_partitioned(cursor):
+                    raise CommandError('La tabla de citas no está particionada: usa --convert primero.')
+            until = partitioning.add_months(timezone.localdate(), options['months_ahead'])
+            created = partitioning.ensure_partitions(until, interval)
+            self.stdout.write(f'🗂️ {len(created)} particiones creadas' + (f': {", ".join(created)}' if created else ''))
+
+        if options['detach_before']:
+            detached = partitioning.detach_partitions(options['detach_before'])
+            self.stdout.write(f'📤 {len(detached)} particiones desconectadas' + (f': {", ".join(detached)}' if detached else ''))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {partitioning.quote(partitioning.DEFAULT_PARTITION)}')
+            in_default = cursor.fetchone()[0]
+        if in_default:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {in_default} citas en la partición DEFAULT: amplía --months-ahead o crea particiones anteriores'
+            ))
@@ -0,0 +1,14 @@
+# appointments/management/commands/prune_appointment_tombstones.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from appointments.models import AppointmentTombstone
+
+
+class Command(BaseCommand):
+    help = 'Eliminar las lápidas de citas más antiguas que el periodo de retención de la sincronización'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - AppointmentTombstone.RETENTION
+        deleted, _ = AppointmentTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'🧹 {deleted} lápidas eliminadas (anteriores a {cutoff:%Y-%m-%d})'))
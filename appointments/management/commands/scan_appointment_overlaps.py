@@ -0,0 +1,101 @@
+# appointments/management/commands/scan_appointment_overlaps.py
+import threading
+import time as clock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from appointments.intervals import sweep_overlaps
+from appointments.models import Appointment
+from appointments.signals import run_transition_background_tasks
+from appointments.transitions import bulk_transition
+
+
+def keep_appointment(a, b):
+    """
+    Entre dos citas solapadas se conserva la completada (ya ocurrió); si
+    ambas están en el mismo grupo, la creada primero (menor id).
+    """
+    a_active, b_active = a[3] in Appointment.ACTIVE_STATUSES, b[3] in Appointment.ACTIVE_STATUSES
+    if a_active != b_active:
+        return b if a_active else a
+    return a if a[0] < b[0] else b
+
+
+class Command(BaseCommand):
+    help = (
+        'Busca empleados con citas solapadas en un solo barrido ordenado por '
+        '(empleado, fecha, hora de inicio) y opcionalmente cancela los duplicados. '
+        'Útil antes de aplicar appointment_no_overlap y para revisar citas completadas, '
+        'que la restricción no cubre.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help='Solo este negocio')
+        parser.add_argument('--date-from', help='Solo citas desde esta fecha (YYYY-MM-DD)')
+        parser.add_argument('--include-completed', action='store_true',
+                            help='Incluye las citas completadas además de las pendientes y confirmadas')
+        parser.add_argument('--cancel', action='store_true',
+                            help='Cancela las citas activas duplicadas (las completadas solo se informan)')
+        parser.add_argument('--notify', action='store_true',
+                            help='Con --cancel, actualiza Google Calendar y envía los webhooks de la cancelación')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas por lectura del cursor')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Citas por UPDATE al cancelar')
+        parser.add_argument('--show', type=int, default=50, help='Solapamientos a listar (0 = ninguno)')
+
+    def handle(self, *args, **options):
+        statuses = list(Appointment.ACTIVE_STATUSES)
+        if options['include_completed']:
+            statuses.append('completed')
+        queryset = Appointment.objects.filter(status__in=statuses)
+        if options['business']:
+            queryset = queryset.filter(business_id=options['business'])
+        if options['date_from']:
+            queryset = queryset.filter(date__gte=options['date_from'])
+
+        # El orden coincide con el índice de unique_appointment: se lee sin ordenar en memoria
+        rows = (
+            queryset.order_by('employee_id', 'date', 'start_time', 'id')
+            .values_list('id', 'employee_id', 'date', 'status', 'start_time', 'end_time')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        scanned = 0
+
+        def intervals():
+            nonlocal scanned
+            for row in rows:
+                scanned += 1
+                yield (row[1], row[2]), row[4], row[5], row
+
+        started = clock.perf_counter()
+        overlaps = 0
+        to_cancel = []
+        for kept, dropped in sweep_overlaps(intervals(), keep_appointment):
+            overlaps += 1
+            if overlaps <= options['show']:
+                self.stdout.write(
+                    f'  empleado {dropped[1]} {dropped[2]}: #{dropped[0]} {dropped[4]:%H:%M}-{dropped[5]:%H:%M} '
+                    f'({dropped[3]}) se solapa con #{kept[0]} {kept[4]:%H:%M}-{kept[5]:%H:%M} ({kept[3]})'
+                )
+            if dropped[3] in Appointment.ACTIVE_STATUSES:
+                to_cancel.append(dropped[0])
+        elapsed = clock.perf_counter() - started
+
+        rate = scanned / elapsed if elapsed else 0
+        self.stdout.write(
+            f'🔍 {scanned} citas revisadas en {elapsed:.2f}s ({rate:,.0f} filas/s): '
+            f'{overlaps} solapamientos, {len(to_cancel)} duplicados activos'
+        )
+        if not options['cancel'] or not to_cancel:
+            return
+
+        cancelled = 0
+        for offset in range(0, len(to_cancel), options['batch_size']):
+            batch = Appointment.objects.filter(pk__in=to_cancel[offset:offset + options['batch_size']])
+            with transaction.atomic():
+                changes = bulk_transition(batch, 'cancelled')
+                if changes and options['notify']:
+                    thread = threading.Thread(target=run_transition_background_tasks, args=(changes,), daemon=False)
+                    transaction.on_commit(thread.start)
+            cancelled += len(changes)
+        self.stdout.write(self.style.SUCCESS(f'🚫 {cancelled} citas duplicadas canceladas'))
@@ -20,10 +20,9 @@ class Command(BaseCommand):
 
         tomorrow = date.today() + timedelta(days=1)
         
-        appointments = Appointment.objects.filter(
+        appointments = Appointment.objects.active().filter(
             date=tomorrow,
-            status__in=['pending', 'confirmed']
-        ).select_related('client', 'service', 'employee')
+        ).select_related('client', 'service', 'employee', 'business')
 
         self.stdout.write(f"📅 Citas para mañana ({tomorrow}): {appointments.count()}")
 
@@ -54,7 +53,7 @@ class Command(BaseCommand):
                 fecha_esp = f"{dia_esp}, {appointment.date.day} de {mes_esp} de {appointment.date.year}"
                 hora_esp = appointment.start_time.strftime('%H:%M')
 
-                precio_int = int(float(appointment.service.price))
+                precio_int = int(float(appointment.booked_price))
                 precio_fmt = f"${precio_int:,}".replace(',', '.')
 
                 subject = f"🔔 Recordatorio: Tu cita es mañana en {business_name}"
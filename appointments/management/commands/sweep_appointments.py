@@ -0,0 +1,57 @@
+# appointments/management/commands/sweep_appointments.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from appointments.archive import archive_batch
+from appointments.models import Appointment
+from appointments.transitions import bulk_transition
+
+
+class Command(BaseCommand):
+    help = (
+        'Cierra las citas pasadas que siguen pendientes o confirmadas y archiva las '
+        'terminadas más antiguas que APPOINTMENT_ARCHIVE_DAYS. Pensado para correr a diario (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por UPDATE/DELETE')
+        parser.add_argument('--archive-days', type=int, default=settings.APPOINTMENT_ARCHIVE_DAYS,
+                            help='Horizonte de archivo en días (0 desactiva el archivado)')
+        parser.add_argument('--pending-to', default='cancelled', choices=['cancelled', 'completed'],
+                            help='Estado final para las citas pasadas que quedaron pendientes')
+        parser.add_argument('--confirmed-to', default='completed', choices=['cancelled', 'completed'],
+                            help='Estado final para las citas pasadas que quedaron confirmadas')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        batch_size = options['batch_size']
+
+        # No se notifican: son citas ya pasadas, sin cambios para el cliente
+        for from_status, to_status in (('pending', options['pending_to']), ('confirmed', options['confirmed_to'])):
+            total = 0
+            while True:
+                stale = Appointment.objects.filter(date__lt=today, status=from_status)
+                batch = Appointment.objects.filter(pk__in=stale.values('pk')[:batch_size])
+                with transaction.atomic():
+                    changed = len(bulk_transition(batch, to_status, [from_status]))
+                total += changed
+                if changed < batch_size:
+                    break
+            self.stdout.write(f'🧹 {total} citas {from_status} pasadas → {to_status}')
+
+        if options['archive_days'] <= 0:
+            return
+
+        before = today - timedelta(days=options['archive_days'])
+        total = 0
+        while True:
+            with transaction.atomic():
+                archived = archive_batch(before, batch_size)
+            total += archived
+            if archived < batch_size:
+                break
+        self.stdout.write(self.style.SUCCESS(f'📦 {total} citas anteriores a {before} archivadas'))
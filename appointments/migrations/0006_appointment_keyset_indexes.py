@@ -0,0 +1,22 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('appointments', '0005_appointment_created_by'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['business', 'date', 'start_time', 'id'], name='appt_biz_date_start_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['date', 'start_time', 'id'], name='appt_date_start_id_idx'),
+        ),
+    ]
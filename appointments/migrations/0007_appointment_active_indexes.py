@@ -0,0 +1,40 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no bloquea escrituras, pero no puede correr
+    # dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('appointments', '0006_appointment_keyset_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(
+                condition=models.Q(('status__in', ['pending', 'confirmed'])),
+                fields=['employee', 'date', 'start_time', 'end_time'],
+                name='appt_emp_date_active_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(
+                condition=models.Q(('status__in', ['pending', 'confirmed'])),
+                fields=['business', 'date', 'start_time', 'end_time'],
+                include=('employee',),
+                name='appt_biz_date_active_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(
+                condition=models.Q(('status__in', ['pending', 'confirmed'])),
+                fields=['date'],
+                name='appt_date_active_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+import appointments.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+from appointments.intervals import sweep_overlaps
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+SHOWN_OVERLAPS = 20
+
+
+def check_existing_overlaps(apps, schema_editor):
+    """
+    Detiene la migración si hay citas activas solapadas, que harían fallar
+    la restricción. No modifica datos: los duplicados se revisan y cancelan
+    con scan_appointment_overlaps --cancel antes de volver a migrar.
+
+    Las citas que la reserva pública guardó cruzando la medianoche
+    (end_time < start_time) son un rango vacío para la restricción (ver
+    AppointmentTimeRange), así que tampoco cuentan aquí.
+    """
+    Appointment = apps.get_model('appointments', 'Appointment')
+    rows = (
+        Appointment.objects.filter(status__in=ACTIVE_STATUSES, end_time__gt=models.F('start_time'))
+        .order_by('employee_id', 'date', 'start_time', 'id')
+        .values_list('id', 'employee_id', 'date', 'start_time', 'end_time')
+        .iterator(chunk_size=5000)
+    )
+    duplicates = sorted(
+        dropped[0] for _, dropped in sweep_overlaps(
+            (((row[1], row[2]), row[3], row[4], row) for row in rows),
+            lambda a, b: a if a[0] < b[0] else b,
+        )
+    )
+    if duplicates:
+        shown = ', '.join(str(pk) for pk in duplicates[:SHOWN_OVERLAPS])
+        if len(duplicates) > SHOWN_OVERLAPS:
+            shown += f' y {len(duplicates) - SHOWN_OVERLAPS} más'
+        raise RuntimeError(
+            f'No se puede crear appointment_no_overlap: {len(duplicates)} citas activas se solapan '
+            f'con otra del mismo empleado (ids {shown}). Revisarlas con '
+            f'"python manage.py scan_appointment_overlaps" y cancelarlas con '
+            f'"python manage.py scan_appointment_overlaps --cancel" antes de volver a migrar.'
+        )
+
+
+class Migration(migrations.Migration):
+    """
+    Restricción de exclusión GiST: un empleado no puede tener dos citas
+    pendientes/confirmadas cuyos horarios se solapen.
+
+    btree_gist permite combinar la igualdad sobre employee_id con el
+    solapamiento (&&) del rango horario en el mismo índice. Si la base ya
+    tiene duplicados, check_existing_overlaps detiene la migración y lista
+    los ids: se resuelven con scan_appointment_overlaps --cancel.
+    """
+
+    dependencies = [
+        ('appointments', '0007_appointment_active_indexes'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.RunPython(check_existing_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(('status__in', ['pending', 'confirmed'])),
+                expressions=[('employee', '='), (appointments.models.AppointmentTimeRange(), '&&')],
+                name='appointment_no_overlap',
+            ),
+        ),
+    ]
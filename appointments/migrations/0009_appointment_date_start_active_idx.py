@@ -0,0 +1,25 @@
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('appointments', '0008_appointment_no_overlap'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(
+                condition=models.Q(('status__in', ['pending', 'confirmed'])),
+                fields=['date', 'start_time'],
+                name='appt_date_start_active_idx',
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name='appointment',
+            name='appt_date_active_idx',
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    # El índice sobre updated_at se crea CONCURRENTLY sobre una tabla viva
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0008_sync_missing_schema'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('appointments', '0009_appointment_date_start_active_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_id', models.BigIntegerField(verbose_name='Cita')),
+                ('reason', models.CharField(choices=[('deleted', 'Eliminada'), ('moved', 'Reasignada')], max_length=10, verbose_name='Motivo')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('business', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='appointment_tombstones', to='authentication.business', verbose_name='Negocio')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Empleado')),
+            ],
+            options={
+                'verbose_name': 'Cita eliminada',
+                'verbose_name_plural': 'Citas eliminadas',
+                'ordering': ['deleted_at'],
+                'indexes': [models.Index(fields=['business', 'deleted_at'], name='tombstone_biz_deleted_idx')],
+            },
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['business', 'updated_at'], name='appt_biz_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('appointments', '0010_appointment_tombstones'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=GinIndex(OpClass(Upper('notes'), name='gin_trgm_ops'), name='appt_notes_trgm_idx'),
+        ),
+    ]
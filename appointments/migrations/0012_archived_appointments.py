@@ -0,0 +1,52 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_sync_missing_schema'),
+        ('clients', '0004_trigram_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('services', '0004_service_is_internal'),
+        ('appointments', '0011_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='appointmenttombstone',
+            name='reason',
+            field=models.CharField(choices=[('deleted', 'Eliminada'), ('moved', 'Reasignada'), ('archived', 'Archivada')], max_length=10, verbose_name='Motivo'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('start_time', models.TimeField(verbose_name='Hora de inicio')),
+                ('end_time', models.TimeField(verbose_name='Hora de fin')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('confirmed', 'Confirmada'), ('cancelled', 'Cancelada'), ('completed', 'Completada')], max_length=20, verbose_name='Estado')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Notas')),
+                ('payment_method', models.CharField(blank=True, choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('pos', 'POS')], max_length=20, null=True, verbose_name='Medio de pago')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de actualización')),
+                ('google_calendar_event_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de archivo')),
+                ('business', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='authentication.business', verbose_name='Negocio')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='clients.client', verbose_name='Cliente')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to=settings.AUTH_USER_MODEL, verbose_name='Empleado')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='services.service', verbose_name='Servicio')),
+            ],
+            options={
+                'verbose_name': 'Cita archivada',
+                'verbose_name_plural': 'Citas archivadas',
+                'ordering': ['date', 'start_time'],
+                'indexes': [models.Index(fields=['business', 'date', 'start_time', 'id'], name='archived_biz_date_idx')],
+            },
+        ),
+    ]
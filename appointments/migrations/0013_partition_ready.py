@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:48
+
+import appointments.models
+import django.contrib.postgres.constraints
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0012_archived_appointments'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='appointment',
+            name='appointment_no_overlap',
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'confirmed'])), expressions=[('employee', '='), ('date', '='), (appointments.models.AppointmentTimeRange(), '&&')], name='appointment_no_overlap'),
+        ),
+    ]
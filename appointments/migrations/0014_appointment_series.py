@@ -0,0 +1,51 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:50
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('services', '0004_service_is_internal'),
+        ('clients', '0004_trigram_search'),
+        ('authentication', '0008_sync_missing_schema'),
+        ('appointments', '0013_partition_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('daily', 'Diaria'), ('weekly', 'Semanal'), ('monthly', 'Mensual')], default='weekly', max_length=10, verbose_name='Frecuencia')),
+                ('interval', models.PositiveSmallIntegerField(default=1, verbose_name='Intervalo')),
+                ('by_weekday', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveSmallIntegerField(), blank=True, default=list, help_text='0 = lunes ... 6 = domingo. Vacío: el día de la fecha de inicio', size=None, verbose_name='Días de la semana')),
+                ('start_date', models.DateField(verbose_name='Fecha de inicio')),
+                ('until', models.DateField(blank=True, null=True, verbose_name='Hasta')),
+                ('count', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Cantidad de citas')),
+                ('start_time', models.TimeField(verbose_name='Hora de inicio')),
+                ('end_time', models.TimeField(verbose_name='Hora de fin')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Notas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='authentication.business', verbose_name='Negocio')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='clients.client', verbose_name='Cliente')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to=settings.AUTH_USER_MODEL, verbose_name='Empleado')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='services.service', verbose_name='Servicio')),
+            ],
+            options={
+                'verbose_name': 'Serie de citas',
+                'verbose_name_plural': 'Series de citas',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.appointmentseries', verbose_name='Serie'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0014_appointment_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='duration_at_booking',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Duración al reservar (minutos)'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='price_at_booking',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Precio al reservar'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='duration_at_booking',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Duración al reservar (minutos)'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='price_at_booking',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Precio al reservar'),
+        ),
+    ]
@@ -1,17 +1,70 @@
 # appointments/models.py
+from datetime import timedelta
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.expressions import CombinedExpression
+from django.db.models.functions import Greatest, Upper
+from django.utils import timezone
 from authentication.models import User, Business  # agregamos Business
+from backend.tracking import FieldTrackerMixin
 from clients.models import Client
 from services.models import Service
 
 
-class Appointment(models.Model):
+class AppointmentTimeRange(models.Func):
+    """
+    tsrange(date + start_time, date + end_time, '[)') de una cita.
+
+    Es el rango sobre el que PostgreSQL verifica que no haya dos citas
+    activas del mismo empleado solapadas. Django 4.2 no soporta columnas
+    generadas, así que el rango se calcula como expresión dentro del índice
+    GiST de la restricción.
+
+    El fin se toma como GREATEST(inicio, fin): las citas viejas que cruzaban
+    la medianoche (fin < inicio) quedan como rango vacío en vez de hacer
+    fallar TSRANGE al crear el índice o al escribir la fila.
+    """
+    function = 'TSRANGE'
+    template = "%(function)s(%(expressions)s, '[)')"
+    output_field = DateTimeRangeField()
+
+    def __init__(self, date='date', start_time='start_time', end_time='end_time'):
+        start = CombinedExpression(models.F(date), '+', models.F(start_time), output_field=models.DateTimeField())
+        end = CombinedExpression(models.F(date), '+', models.F(end_time), output_field=models.DateTimeField())
+        super().__init__(start, Greatest(start, end))
+
+
+class AppointmentQuerySet(models.QuerySet):
+    def active(self):
+        """Citas que ocupan agenda (pendientes o confirmadas)."""
+        return self.filter(status__in=Appointment.ACTIVE_STATUSES)
+
+    def overlapping(self, employee, date, start_time, end_time):
+        """Citas activas del empleado que se cruzan con [start_time, end_time)."""
+        return self.active().filter(
+            employee=employee,
+            date=date,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
+
+
+class Appointment(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pendiente'),
         ('confirmed', 'Confirmada'),
         ('cancelled', 'Cancelada'),
         ('completed', 'Completada'),
     )
+    # Estados que bloquean el horario del empleado
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    OVERLAP_CONSTRAINT = 'appointment_no_overlap'
+    # Los signals comparan estos valores con los cargados (ver FieldTrackerMixin)
+    tracked_fields = ('status', 'business_id', 'employee_id', 'date')
 
     PAYMENT_METHOD_CHOICES = (
         ('efectivo', 'Efectivo'),
@@ -82,6 +135,26 @@ class Appointment(models.Model):
         null=True,
         help_text="ID del evento en Google Calendar"
     )
+    # Copia del precio y la duración del servicio al reservar: los reportes
+    # agregan sobre la cita sin JOIN y un cambio de precio no altera el historial
+    price_at_booking = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Precio al reservar"
+    )
+    duration_at_booking = models.PositiveIntegerField(blank=True, null=True, verbose_name="Duración al reservar (minutos)")
+    series = models.ForeignKey(
+        'AppointmentSeries',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='appointments',
+        verbose_name="Serie"
+    )
+
+    objects = AppointmentQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Cita"
@@ -91,7 +164,52 @@ class Appointment(models.Model):
             models.UniqueConstraint(
                 fields=['employee', 'date', 'start_time'],
                 name='unique_appointment'
-            )
+            ),
+            # Dos citas activas del mismo empleado no pueden solaparse.
+            # Lo garantiza la base de datos, incluso con reservas concurrentes.
+            ExclusionConstraint(
+                name='appointment_no_overlap',
+                expressions=[
+                    ('employee', RangeOperators.EQUAL),
+                    # Las citas no cruzan la medianoche, así que la igualdad de
+                    # fecha no debilita la restricción; incluye la clave de
+                    # partición (ver partition_appointments)
+                    ('date', RangeOperators.EQUAL),
+                    (AppointmentTimeRange(), RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+            ),
+        ]
+        indexes = [
+            # Orden de la paginación por keyset (negocio y superadmin)
+            models.Index(fields=['business', 'date', 'start_time', 'id'], name='appt_biz_date_start_id_idx'),
+            models.Index(fields=['date', 'start_time', 'id'], name='appt_date_start_id_idx'),
+            # Sincronización incremental del calendario (?updated_since=)
+            models.Index(fields=['business', 'updated_at'], name='appt_biz_updated_idx'),
+            # Búsqueda ?search= (icontains compila a UPPER(notes) LIKE ...)
+            GinIndex(OpClass(Upper('notes'), name='gin_trgm_ops'), name='appt_notes_trgm_idx'),
+            # Índices parciales: solo citas activas, que son las que consultan
+            # disponibilidad, solapamiento y recordatorios. Las completadas y
+            # canceladas (la mayoría con el tiempo) quedan fuera del índice.
+            models.Index(
+                fields=['employee', 'date', 'start_time', 'end_time'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='appt_emp_date_active_idx',
+            ),
+            models.Index(
+                fields=['business', 'date', 'start_time', 'end_time'],
+                include=['employee'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='appt_biz_date_active_idx',
+            ),
+            # (date, start_time) entrega las citas ya ordenadas para el barrido
+            # de recordatorios y así no compite con el índice GiST de la
+            # restricción appointment_no_overlap
+            models.Index(
+                fields=['date', 'start_time'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='appt_date_start_active_idx',
+            ),
         ]
 
     def __str__(self):
@@ -104,4 +222,241 @@ class Appointment(models.Model):
             start_datetime = datetime.combine(datetime.today(), self.start_time)
             end_datetime = start_datetime + timedelta(minutes=self.service.duration)
             self.end_time = end_datetime.time()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        self.snapshot_service()
+        super().save(*args, **kwargs)
+
+    @property
+    def booked_price(self):
+        """Precio de la reserva; las citas sin copia (previas al backfill) usan el del servicio"""
+        return self.price_at_booking if self.price_at_booking is not None else self.service.price
+
+    @property
+    def booked_duration(self):
+        return self.duration_at_booking if self.duration_at_booking is not None else self.service.duration
+
+    def snapshot_service(self, service=None):
+        """
+        Copia precio y duración del servicio si aún no se han fijado. Las
+        rutas con bulk_create/bulk_update no pasan por save() y deben
+        llamarlo (con el servicio nuevo si cambió).
+        """
+        if service is not None:
+            self.price_at_booking = service.price
+            self.duration_at_booking = service.duration
+        elif self.service_id and (self.price_at_booking is None or self.duration_at_booking is None):
+            self.price_at_booking = self.service.price
+            self.duration_at_booking = self.service.duration
+
+
+
+class AppointmentSeries(models.Model):
+    """
+    Cita recurrente ("cada dos martes a las 10:00"). Es un subconjunto de
+    RRULE: FREQ (diaria, semanal, mensual), INTERVAL, BYDAY (solo semanal) y
+    UNTIL o COUNT. Las ocurrencias se expanden en el servidor y se guardan
+    como citas normales enlazadas a la serie (ver appointments/recurrence.py).
+    """
+    FREQUENCY_CHOICES = (
+        ('daily', 'Diaria'),
+        ('weekly', 'Semanal'),
+        ('monthly', 'Mensual'),
+    )
+    # Tope de ocurrencias por serie (dos años de citas semanales)
+    MAX_OCCURRENCES = 104
+
+    business = models.ForeignKey(
+        Business,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        verbose_name="Negocio"
+    )
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        verbose_name="Cliente"
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        verbose_name="Servicio"
+    )
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        verbose_name="Empleado"
+    )
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly', verbose_name="Frecuencia")
+    interval = models.PositiveSmallIntegerField(default=1, verbose_name="Intervalo")
+    by_weekday = ArrayField(
+        models.PositiveSmallIntegerField(),
+        blank=True,
+        default=list,
+        verbose_name="Días de la semana",
+        help_text="0 = lunes ... 6 = domingo. Vacío: el día de la fecha de inicio"
+    )
+    start_date = models.DateField(verbose_name="Fecha de inicio")
+    until = models.DateField(blank=True, null=True, verbose_name="Hasta")
+    count = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Cantidad de citas")
+    start_time = models.TimeField(verbose_name="Hora de inicio")
+    end_time = models.TimeField(verbose_name="Hora de fin")
+    notes = models.TextField(blank=True, null=True, verbose_name="Notas")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Creado por"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+
+    class Meta:
+        verbose_name = "Serie de citas"
+        verbose_name_plural = "Series de citas"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Serie de {self.client} con {self.employee} ({self.to_rrule()})"
+
+    def to_rrule(self):
+        days = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+        parts = [f'FREQ={self.frequency.upper()}', f'INTERVAL={self.interval}']
+        if self.frequency == 'weekly' and self.by_weekday:
+            parts.append('BYDAY=' + ','.join(days[day] for day in sorted(self.by_weekday)))
+        if self.until:
+            parts.append(f'UNTIL={self.until:%Y%m%d}')
+        if self.count:
+            parts.append(f'COUNT={self.count}')
+        return ';'.join(parts)
+
+
+class AppointmentTombstone(models.Model):
+    """
+    Registro de citas que salieron del calendario de un negocio o empleado:
+    eliminadas, o reasignadas a otro negocio/empleado. La sincronización
+    incremental del calendario lo usa para informar qué ids debe borrar el
+    cliente, ya que esas filas no aparecen al filtrar por updated_at.
+    """
+    REASON_CHOICES = (
+        ('deleted', 'Eliminada'),
+        ('moved', 'Reasignada'),
+        ('archived', 'Archivada'),
+    )
+    # Pasado este plazo las lápidas se purgan y el cliente debe resincronizar completo
+    RETENTION = timedelta(days=30)
+
+    appointment_id = models.BigIntegerField(verbose_name="Cita")
+    business = models.ForeignKey(
+        Business,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='appointment_tombstones',
+        verbose_name="Negocio"
+    )
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Empleado"
+    )
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES, verbose_name="Motivo")
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = "Cita eliminada"
+        verbose_name_plural = "Citas eliminadas"
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['business', 'deleted_at'], name='tombstone_biz_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cita {self.appointment_id} ({self.get_reason_display()})"
+
+
+class ArchivedAppointment(models.Model):
+    """
+    Tabla fría: citas terminadas más antiguas que el horizonte de archivo
+    (settings.APPOINTMENT_ARCHIVE_DAYS). Las mueve el comando
+    sweep_appointments y la API las expone solo para lectura, así la tabla
+    de citas y sus índices se mantienen chicos. Conserva el id original.
+
+    Las columnas deben coincidir en nombre con las de Appointment: el
+    archivado copia todas las columnas comunes con un INSERT ... SELECT.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    business = models.ForeignKey(
+        Business,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='archived_appointments',
+        verbose_name="Negocio"
+    )
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        related_name='archived_appointments',
+        verbose_name="Cliente"
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='archived_appointments',
+        verbose_name="Servicio"
+    )
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_appointments',
+        verbose_name="Empleado"
+    )
+    date = models.DateField(verbose_name="Fecha")
+    start_time = models.TimeField(verbose_name="Hora de inicio")
+    end_time = models.TimeField(verbose_name="Hora de fin")
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES, verbose_name="Estado")
+    notes = models.TextField(blank=True, null=True, verbose_name="Notas")
+    payment_method = models.CharField(
+        max_length=20,
+        choices=Appointment.PAYMENT_METHOD_CHOICES,
+        blank=True,
+        null=True,
+        verbose_name="Medio de pago"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Creado por"
+    )
+    created_at = models.DateTimeField(verbose_name="Fecha de creación")
+    updated_at = models.DateTimeField(verbose_name="Fecha de actualización")
+    google_calendar_event_id = models.CharField(max_length=200, blank=True, null=True)
+    price_at_booking = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Precio al reservar"
+    )
+    duration_at_booking = models.PositiveIntegerField(blank=True, null=True, verbose_name="Duración al reservar (minutos)")
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name="Fecha de archivo")
+
+    class Meta:
+        verbose_name = "Cita archivada"
+        verbose_name_plural = "Citas archivadas"
+        ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['business', 'date', 'start_time', 'id'], name='archived_biz_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cita archivada de {self.client} con {self.employee} - {self.date} {self.start_time}"
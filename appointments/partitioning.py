@@ -0,0 +1,209 @@
+# appointments/partitioning.py
+"""
+Particionado por rango de fecha de la tabla de citas.
+
+La conversión (convert_to_partitioned) reemplaza appointments_appointment por
+una tabla particionada por `date` con el mismo nombre, columnas, índices y
+restricciones, así el ORM, el admin y las migraciones siguen apuntando a la
+misma tabla. Requisitos de PostgreSQL para tablas particionadas:
+
+- La clave primaria pasa a ser (id, date). Django sigue usando id como pk
+  (la identidad garantiza que no se repite), pero ninguna FK de la base
+  puede apuntar a la tabla: StockMovement.appointment usa db_constraint=False.
+- unique_appointment y appointment_no_overlap incluyen date con igualdad
+  (la exclusión sobre tablas particionadas necesita PostgreSQL 17+).
+- CREATE INDEX CONCURRENTLY no funciona sobre la tabla padre: los índices
+  nuevos deben crearse con AddIndex normal (o en cada partición).
+
+Hay una partición DEFAULT para que ninguna fecha fuera de rango falle; al
+crear una partición nueva se mueven a ella las filas de su rango que hayan
+caído en DEFAULT.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Appointment
+
+TABLE = Appointment._meta.db_table
+LEGACY_TABLE = f'{TABLE}_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+INTERVALS = ('month', 'quarter')
+# Restricciones de exclusión sobre tablas particionadas
+MIN_PG_VERSION = 170000
+
+BOUND_RE = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def quote(name):
+    return connection.ops.quote_name(name)
+
+
+def period_start(day, interval):
+    month = day.month if interval == 'month' else 3 * ((day.month - 1) // 3) + 1
+    return date(day.year, month, 1)
+
+
+def next_period(start, interval):
+    months = 1 if interval == 'month' else 3
+    month = start.month - 1 + months
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(start, interval):
+    if interval == 'quarter':
+        return f'{TABLE}_{start.year}q{(start.month - 1) // 3 + 1}'
+    return f'{TABLE}_{start.year}m{start.month:02d}'
+
+
+def is_partitioned(cursor):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(cursor):
+    """[(nombre, desde, hasta)] de las particiones con rango, ordenadas"""
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        [TABLE],
+    )
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = BOUND_RE.search(bound)
+        if match:
+            partitions.append((name, date.fromisoformat(match[1]), date.fromisoformat(match[2])))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(until, interval='month', since=None):
+    """
+    Crea las particiones que falten hasta cubrir `until` (inclusive), a
+    continuación de la última existente (o desde `since`). Devuelve los
+    nombres creados.
+    """
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        partitions = list_partitions(cursor)
+        start = partitions[-1][2] if partitions else period_start(since or timezone.localdate(), interval)
+        while start <= until:
+            end = next_period(start, interval)
+            name = partition_name(start, interval)
+            # Tabla suelta + ATTACH: las filas de ese rango que estén en
+            # DEFAULT se mueven antes, y ATTACH crea índices y restricciones
+            cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {quote(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s RETURNING *
+                )
+                INSERT INTO {quote(name)} SELECT * FROM moved
+                """,
+                [start, end],
+            )
+            cursor.execute(
+                f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+            created.append(name)
+            start = end
+    return created
+
+
+def detach_partitions(before):
+    """
+    Desconecta las particiones que terminan antes de `before`. Quedan como
+    tablas sueltas con el mismo nombre, para respaldarlas o borrarlas.
+    """
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, _, end in list_partitions(cursor):
+            if end <= before:
+                cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(name)}')
+                detached.append(name)
+    return detached
+
+
+def convert_to_partitioned(interval='month', months_ahead=12):
+    """
+    Convierte la tabla en particionada en una sola transacción, con la tabla
+    bloqueada (las citas quedan inaccesibles durante la copia). Devuelve la
+    cantidad de filas copiadas.
+    """
+    # Se verifica antes del LOCK: si no, falla recién al recrear
+    # appointment_no_overlap, después de copiar toda la tabla
+    if connection.pg_version < MIN_PG_VERSION:
+        raise ValueError(
+            f'Particionar requiere PostgreSQL {MIN_PG_VERSION // 10000} o superior '
+            f'(el servidor es {connection.pg_version // 10000}).'
+        )
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            raise ValueError('La tabla de citas ya está particionada.')
+        cursor.execute(f'LOCK TABLE {quote(TABLE)} IN ACCESS EXCLUSIVE MODE')
+        # Las FK diferidas pendientes impedirían borrar la tabla original
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        # Definiciones actuales (salvo la PK, que cambia, y los NOT NULL, que copia LIKE)
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype NOT IN ('p', 'n')
+            ORDER BY conname
+            """,
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        overlap = dict(constraints).get(Appointment.OVERLAP_CONSTRAINT, '')
+        if 'date WITH =' not in overlap:
+            raise ValueError(
+                f'{Appointment.OVERLAP_CONSTRAINT} no incluye la fecha: aplica las migraciones antes de particionar.'
+            )
+        cursor.execute(
+            """
+            SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+            WHERE i.indrelid = to_regclass(%s)
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+            """,
+            [TABLE],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'SELECT min(date), max(id) FROM {quote(TABLE)}')
+        first_date, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} RENAME TO {quote(LEGACY_TABLE)}')
+        cursor.execute(
+            f'CREATE TABLE {quote(TABLE)} (LIKE {quote(LEGACY_TABLE)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE (date)'
+        )
+        cursor.execute(f'CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {quote(TABLE)} DEFAULT')
+
+        # Particiones vacías antes de copiar, así ninguna fila cae en DEFAULT
+        today = timezone.localdate()
+        ensure_partitions(add_months(today, months_ahead), interval, since=min(first_date or today, today))
+
+        cursor.execute(f'INSERT INTO {quote(TABLE)} SELECT * FROM {quote(LEGACY_TABLE)}')
+        copied = cursor.rowcount
+        cursor.execute(f'DROP TABLE {quote(LEGACY_TABLE)}')
+        if max_id:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [TABLE, max_id])
+
+        # Índices y restricciones al final: se construyen una vez con los datos cargados
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(TABLE + "_pkey")} PRIMARY KEY (id, date)')
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(name)} {definition}')
+        for definition in indexes:
+            cursor.execute(definition)
+        cursor.execute(f'ANALYZE {quote(TABLE)}')
+    return copied
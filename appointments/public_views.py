@@ -5,8 +5,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from datetime import datetime, timedelta
+from functools import reduce
+import operator
 import pytz
 from authentication.models import Business
+from . import availability
+from .exceptions import AppointmentConflict, conflicts_as_409
 from .models import Appointment
 import threading
 
@@ -102,59 +106,26 @@ def public_available_times(request, slug):
         except Exception:
             pass
     
-    # Obtener horario del empleado para ese día
-    work_start = '09:00'
-    work_end = '18:00'
-    
+    # Ventana de trabajo del empleado (o 09:00-18:00 sin empleado) y citas
+    # activas como mapas de bits por minuto (ver appointments/availability.py)
+    window = (9 * 60, 18 * 60)
     if employee_id:
-        from authentication.models import WorkSchedule
         try:
-            schedule = WorkSchedule.objects.get(
-                employee_id=employee_id,
-                day_of_week=date.weekday(),
-                is_active=True
-            )
-            work_start = schedule.start_time.strftime('%H:%M')
-            work_end = schedule.end_time.strftime('%H:%M')
-        except WorkSchedule.DoesNotExist:
+            employee_id = int(employee_id)
+        except ValueError:
+            return Response({'error': 'employee_id inválido'}, status=400)
+        windows, _ = availability.work_windows(business.id, date, [employee_id])
+        if employee_id not in windows:
             return Response({'available_times': [], 'closed': True, 'reason': 'El especialista no trabaja este día'})
-    
-    # Generar todos los slots de 30 min según horario del empleado
-    all_times = []
-    start = datetime.strptime(work_start, '%H:%M')
-    end = datetime.strptime(work_end, '%H:%M')
-    while start < end:
-        all_times.append(start.strftime('%H:%M'))
-        start += timedelta(minutes=30)
-    
-    # Obtener citas ocupadas con sus rangos
-    busy_qs = Appointment.objects.filter(
-        business=business,
-        date=date,
-        status__in=['pending', 'confirmed']
-    )
-    if employee_id:
-        busy_qs = busy_qs.filter(employee_id=employee_id)
-    
-    def time_to_min(t):
-        return t.hour * 60 + t.minute
-    
-    busy_ranges = [(time_to_min(a.start_time), time_to_min(a.end_time)) for a in busy_qs]
-    
-    # Filtrar slots que se solapan considerando duración del servicio
-    available = []
-    for t in all_times:
-        h, m = map(int, t.split(':'))
-        slot_start = h * 60 + m
-        slot_end = slot_start + slot_duration
-        # También verificar que el slot no exceda el horario de cierre
-        end_min = int(work_end.split(':')[0]) * 60 + int(work_end.split(':')[1])
-        if slot_end > end_min:
-            continue
-        overlaps = any(slot_start < r_end and slot_end > r_start for r_start, r_end in busy_ranges)
-        if not overlaps:
-            available.append(t)
-        
+        window = windows[employee_id]
+        busy = availability.busy_masks(business.id, date, [employee_id])[employee_id]
+    else:
+        busy = reduce(operator.or_, availability.busy_masks(business.id, date).values(), 0)
+
+    # Inicios de la grilla de 30 min donde el servicio completo cabe libre
+    free = availability.range_mask(*window) & ~busy
+    available = availability.fits(free, slot_duration) & availability.grid_mask(*window)
+
     # Filtrar horarios pasados si la fecha es hoy (zona horaria Chile)
     chile_tz = pytz.timezone('America/Santiago')
     now_chile = datetime.now(chile_tz)
@@ -162,8 +133,9 @@ def public_available_times(request, slug):
 
     if date == today_chile:
         current_minutes = now_chile.hour * 60 + now_chile.minute
-        available = [t for t in available if (int(t.split(':')[0]) * 60 + int(t.split(':')[1])) > current_minutes]
+        available &= ~availability.range_mask(0, current_minutes + 1)
 
+    available = [availability.from_minute(minute).strftime('%H:%M') for minute in availability.minutes(available)]
     return Response({'available_times': available})
 
 
@@ -187,6 +159,15 @@ def public_create_appointment(request, slug):
         service = get_object_or_404(Service, id=data['service_id'], business=business)
         employee = get_object_or_404(User, id=data['employee_id'], business=business)
         
+        # Calcular hora de fin
+        start = datetime.strptime(data['start_time'], '%H:%M')
+        end = start + timedelta(minutes=service.duration)
+        if end.date() != start.date():
+            return Response({'error': 'El servicio terminaría después de medianoche. Elige un horario anterior.'}, status=400)
+
+        if Appointment.objects.overlapping(employee, data['date'], start.time(), end.time()).exists():
+            raise AppointmentConflict('Ese horario ya no está disponible. Elige otro.')
+
         # Buscar o crear cliente
         client, _ = Client.objects.get_or_create(
             email=data['client_email'],
@@ -197,22 +178,20 @@ def public_create_appointment(request, slug):
                 'phone': data['client_phone'],
             }
         )
-        
-        # Calcular hora de fin
-        start = datetime.strptime(data['start_time'], '%H:%M')
-        end = start + timedelta(minutes=service.duration)
-        
-        appointment = Appointment.objects.create(
-            business=business,
-            client=client,
-            service=service,
-            employee=employee,
-            date=data['date'],
-            start_time=data['start_time'],
-            end_time=end.strftime('%H:%M'),
-            notes=data.get('notes', ''),
-            status='pending',
-        )
+
+        # La restricción appointment_no_overlap resuelve dos reservas simultáneas
+        with conflicts_as_409():
+            appointment = Appointment.objects.create(
+                business=business,
+                client=client,
+                service=service,
+                employee=employee,
+                date=data['date'],
+                start_time=data['start_time'],
+                end_time=end.strftime('%H:%M'),
+                notes=data.get('notes', ''),
+                status='pending',
+            )
         
         # Email en background
         def send_email():
@@ -222,6 +201,8 @@ def public_create_appointment(request, slug):
         threading.Thread(target=send_email, daemon=True).start()
         
         return Response({'id': appointment.id, 'status': 'ok'}, status=201)
-    
+
+    except AppointmentConflict as e:
+        return Response({'error': str(e.detail)}, status=status.HTTP_409_CONFLICT)
     except Exception as e:
         return Response({'error': str(e)}, status=400)
\ No newline at end of file
@@ -0,0 +1,114 @@
+# appointments/recurrence.py
+"""
+Expansión y validación de series de citas (AppointmentSeries).
+
+La validación de todas las ocurrencias se hace en una pasada: una consulta
+trae las citas activas del empleado en las fechas de la serie, otra su
+horario semanal, y el choque se detecta en memoria con find_overlaps
+(barrido de intervalos ordenados) en vez de una consulta por ocurrencia.
+"""
+import calendar
+from datetime import timedelta
+
+from authentication.models import WorkSchedule
+
+from .intervals import find_overlaps
+from .models import Appointment, AppointmentSeries
+
+
+def expand_dates(series):
+    """Fechas de la serie, en orden, respetando UNTIL/COUNT y el tope de la serie"""
+    limit = min(series.count or AppointmentSeries.MAX_OCCURRENCES, AppointmentSeries.MAX_OCCURRENCES)
+    dates = []
+    for day in _candidates(series):
+        if series.until and day > series.until:
+            break
+        dates.append(day)
+        if len(dates) >= limit:
+            break
+    return dates
+
+
+def _candidates(series):
+    start, step = series.start_date, series.interval
+    if series.frequency == 'daily':
+        index = 0
+        while True:
+            yield start + timedelta(days=index * step)
+            index += 1
+    elif series.frequency == 'weekly':
+        weekdays = sorted(set(series.by_weekday or [start.weekday()]))
+        monday = start - timedelta(days=start.weekday())
+        week = 0
+        while True:
+            for weekday in weekdays:
+                day = monday + timedelta(weeks=week, days=weekday)
+                if day >= start:
+                    yield day
+            week += step
+    else:
+        # Mensual: mismo día del mes; se omiten los meses que no lo tienen (31)
+        index = 0
+        while True:
+            month = start.month - 1 + index * step
+            year, month = start.year + month // 12, month % 12 + 1
+            if start.day <= calendar.monthrange(year, month)[1]:
+                yield start.replace(year=year, month=month)
+            index += 1
+
+
+def check_occurrences(series, dates):
+    """
+    Devuelve {fecha: motivo} para las ocurrencias que no se pueden agendar:
+    fuera del horario del empleado o solapadas con una cita activa.
+    """
+    problems = {}
+
+    # Si el empleado tiene horario configurado, cada ocurrencia debe caer dentro
+    schedules = {
+        day_of_week: (start, end)
+        for day_of_week, start, end in WorkSchedule.objects.filter(
+            employee_id=series.employee_id, is_active=True
+        ).values_list('day_of_week', 'start_time', 'end_time')
+    }
+    if schedules:
+        for day in dates:
+            window = schedules.get(day.weekday())
+            if window is None:
+                problems[day] = "El empleado no trabaja este día"
+            elif series.start_time < window[0] or series.end_time > window[1]:
+                problems[day] = f"Fuera del horario del empleado ({window[0]:%H:%M}-{window[1]:%H:%M})"
+
+    existing = Appointment.objects.active().filter(
+        employee_id=series.employee_id,
+        date__in=dates,
+        start_time__lt=series.end_time,
+        end_time__gt=series.start_time,
+    ).values_list('id', 'date', 'start_time', 'end_time')
+
+    intervals = [(day, series.start_time, series.end_time, day) for day in dates]
+    intervals.extend((day, start, end, ('db', pk)) for pk, day, start, end in existing)
+    for ref, other in find_overlaps(intervals).items():
+        if not isinstance(ref, tuple):
+            problems.setdefault(ref, f"Se solapa con la cita existente {other[1]}")
+    return problems
+
+
+def build_occurrences(series, dates):
+    return [
+        Appointment(
+            business_id=series.business_id,
+            client_id=series.client_id,
+            service_id=series.service_id,
+            employee_id=series.employee_id,
+            date=day,
+            start_time=series.start_time,
+            end_time=series.end_time,
+            notes=series.notes,
+            created_by_id=series.created_by_id,
+            price_at_booking=series.service.price,
+            duration_at_booking=series.service.duration,
+            series=series,
+        )
+        for day in dates
+    ]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from .models import Appointment
+from .exceptions import conflicts_as_409
+from .models import Appointment, AppointmentSeries, ArchivedAppointment
 from authentication.models import User
+from backend.values_serializer import Computed, ValuesSerializer
 from clients.models import Client
 from services.models import Service
 
@@ -14,6 +16,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = '__all__'
+        read_only_fields = ('price_at_booking', 'duration_at_booking')
     
     def validate(self, data):
         """
@@ -42,33 +45,51 @@ class AppointmentSerializer(serializers.ModelSerializer):
             if data['start_time'] >= data['end_time']:
                 raise serializers.ValidationError({"end_time": "La hora de fin debe ser posterior a la hora de inicio"})
         
-        # Verificar solapamiento de citas
-        employee = data.get('employee')
-        date = data.get('date')
-        start_time = data.get('start_time')
-        end_time = data.get('end_time')
-        
-        if employee and date and start_time and end_time:
+        # Verificar solapamiento de citas (en PATCH se completan los campos
+        # faltantes con los valores actuales de la cita)
+        def current(field):
+            return data.get(field, getattr(self.instance, field, None))
+
+        employee = current('employee')
+        date = current('date')
+        start_time = current('start_time')
+        end_time = current('end_time')
+        status = current('status') or 'pending'
+
+        # En los lotes el solapamiento se valida para todo el lote de una vez
+        skip_overlap = self.context.get('skip_overlap_check', False)
+
+        if employee and date and start_time and end_time and status in Appointment.ACTIVE_STATUSES and not skip_overlap:
             # Excluir la cita actual en caso de actualización
             appointment_id = self.instance.id if self.instance else None
-            
-            overlapping_appointments = Appointment.objects.filter(
-                employee=employee,
-                date=date,
-                status__in=['pending', 'confirmed']  # Solo verificar citas pendientes o confirmadas
-            ).exclude(id=appointment_id)
-            
-            # Verificar si hay solapamiento con otras citas
-            for appointment in overlapping_appointments:
-                if (start_time < appointment.end_time and end_time > appointment.start_time):
-                    raise serializers.ValidationError({
-                        "non_field_errors": [
-                            f"Esta cita se solapa con otra existente para {employee} de {appointment.start_time} a {appointment.end_time}"
-                        ]
-                    })
+
+            # Una sola consulta indexada; la restricción appointment_no_overlap
+            # cubre las reservas concurrentes que pasen esta verificación
+            conflict = Appointment.objects.overlapping(
+                employee, date, start_time, end_time
+            ).exclude(id=appointment_id).values_list('start_time', 'end_time').first()
+
+            if conflict:
+                raise serializers.ValidationError({
+                    "non_field_errors": [
+                        f"Esta cita se solapa con otra existente para {employee} de {conflict[0]} a {conflict[1]}"
+                    ]
+                })
         
         return data
 
+    def create(self, validated_data):
+        with conflicts_as_409():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        # Cambiar el servicio vuelve a copiar su precio y duración
+        service = validated_data.get('service')
+        if service is not None and service.pk != instance.service_id:
+            instance.snapshot_service(service)
+        with conflicts_as_409():
+            return super().update(instance, validated_data)
+
 # Serializer para el calendario
 class CalendarAppointmentSerializer(serializers.ModelSerializer):
     client_name = serializers.ReadOnlyField(source='client.get_full_name')
@@ -78,4 +99,101 @@ class CalendarAppointmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = ('id', 'client', 'client_name', 'service', 'service_name', 
-                  'employee', 'employee_name', 'date', 'start_time', 'end_time', 'status')
\ No newline at end of file
+                  'employee', 'employee_name', 'date', 'start_time', 'end_time', 'status')
+
+
+def client_full_name(first_name, last_name):
+    # Igual que Client.get_full_name
+    return f"{first_name} {last_name}"
+
+
+def user_full_name(first_name, last_name):
+    # Igual que AbstractUser.get_full_name
+    return f"{first_name} {last_name}".strip()
+
+
+class CalendarAppointmentValuesSerializer(ValuesSerializer):
+    """Misma salida que CalendarAppointmentSerializer, sobre .values()"""
+    serializer_class = CalendarAppointmentSerializer
+    computed = {
+        'client_name': Computed(('client__first_name', 'client__last_name'), client_full_name),
+        'employee_name': Computed(('employee__first_name', 'employee__last_name'), user_full_name),
+    }
+
+
+def optional_user_full_name(first_name, last_name):
+    # FK nula (created_by): las columnas del JOIN vienen en None
+    return None if first_name is None else user_full_name(first_name, last_name)
+
+
+APPOINTMENT_NAMES = {
+    'client_name': Computed(('client__first_name', 'client__last_name'), client_full_name),
+    'employee_name': Computed(('employee__first_name', 'employee__last_name'), user_full_name),
+    'created_by_name': Computed(('created_by__first_name', 'created_by__last_name'), optional_user_full_name),
+}
+
+
+class ArchivedAppointmentSerializer(serializers.ModelSerializer):
+    client_name = serializers.ReadOnlyField(source='client.get_full_name')
+    service_name = serializers.ReadOnlyField(source='service.name')
+    employee_name = serializers.ReadOnlyField(source='employee.get_full_name')
+    created_by_name = serializers.ReadOnlyField(source='created_by.get_full_name')
+
+    class Meta:
+        model = ArchivedAppointment
+        fields = '__all__'
+
+
+class AppointmentValuesSerializer(ValuesSerializer):
+    """
+    AppointmentSerializer sobre .values(), para exportaciones. A diferencia
+    del ModelSerializer, created_by_name viene en null (no se omite) cuando
+    la cita no tiene creador: las columnas del CSV son siempre las mismas.
+    """
+    serializer_class = AppointmentSerializer
+    computed = APPOINTMENT_NAMES
+
+
+class ArchivedAppointmentValuesSerializer(ValuesSerializer):
+    """Igual que AppointmentValuesSerializer, para el archivo"""
+    serializer_class = ArchivedAppointmentSerializer
+    computed = APPOINTMENT_NAMES
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    client_name = serializers.ReadOnlyField(source='client.get_full_name')
+    service_name = serializers.ReadOnlyField(source='service.name')
+    employee_name = serializers.ReadOnlyField(source='employee.get_full_name')
+    rrule = serializers.ReadOnlyField(source='to_rrule')
+    # Opciones de creación: crear solo las ocurrencias libres, o solo informar
+    skip_conflicts = serializers.BooleanField(write_only=True, default=False)
+    dry_run = serializers.BooleanField(write_only=True, default=False)
+
+    class Meta:
+        model = AppointmentSeries
+        fields = '__all__'
+        read_only_fields = ('business', 'created_by', 'created_at')
+
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError({"end_time": "La hora de fin debe ser posterior a la hora de inicio"})
+
+        if not data.get('until') and not data.get('count'):
+            raise serializers.ValidationError({
+                "non_field_errors": ["Indica una fecha de término (until) o una cantidad de citas (count)."]
+            })
+        if data.get('until') and data['until'] < data['start_date']:
+            raise serializers.ValidationError({"until": "La fecha de término debe ser posterior a la de inicio"})
+        if data.get('count') and data['count'] > AppointmentSeries.MAX_OCCURRENCES:
+            raise serializers.ValidationError({
+                "count": f"Una serie admite como máximo {AppointmentSeries.MAX_OCCURRENCES} citas"
+            })
+        if data.get('interval', 1) < 1:
+            raise serializers.ValidationError({"interval": "El intervalo debe ser al menos 1"})
+
+        by_weekday = data.get('by_weekday') or []
+        if any(day not in range(7) for day in by_weekday):
+            raise serializers.ValidationError({"by_weekday": "Los días van de 0 (lunes) a 6 (domingo)"})
+        if by_weekday and data.get('frequency', 'weekly') != 'weekly':
+            raise serializers.ValidationError({"by_weekday": "Los días de la semana solo aplican a series semanales"})
+        return data
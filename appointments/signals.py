@@ -1,9 +1,11 @@
 # appointments/signals.py
 
 import threading
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Appointment
+from .caching import invalidate_month_overview
+from .models import Appointment, AppointmentTombstone
 from services.google_calendar_service import GoogleCalendarService
 import logging
 import requests
@@ -28,7 +30,9 @@ def handle_appointment_created_updated(sender, instance, created, **kwargs):
             args=(instance,),
             daemon=False  # non-daemon: garantiza que el thread termina aunque el request cierre
         )
-        thread.start()
+        # El thread usa otra conexión: si la cita se guardó dentro de una
+        # transacción, esperar al commit para que ya sea visible
+        transaction.on_commit(thread.start)
     else:
         logger.info(f"🔔 Signal: Cita actualizada - ID: {instance.id}")
         update_google_calendar_event(instance)
@@ -58,6 +62,52 @@ def run_background_tasks(appointment):
 
     logger.info(f"✅ Background tasks completadas para cita ID: {appointment.id}")
 
+def queue_batch_background_tasks(created, updated=()):
+    """Encola un único thread de tareas en background para un lote, al hacer commit"""
+    thread = threading.Thread(
+        target=run_batch_background_tasks,
+        args=(list(created), list(updated)),
+        daemon=False
+    )
+    transaction.on_commit(thread.start)
+
+def run_batch_background_tasks(created, updated):
+    """
+    Tareas en background de un lote (ver AppointmentViewSet.batch): un solo
+    thread para todas las citas en vez de uno por cita.
+    """
+    for appointment in created:
+        run_background_tasks(appointment)
+    for appointment in updated:
+        update_google_calendar_event(appointment)
+
+def run_transition_background_tasks(changes):
+    """
+    Job único para un cambio de estado masivo (ver appointments/transitions.py):
+    recibe [(id, estado_anterior)], actualiza Google Calendar con peticiones
+    batch y envía los webhooks de cambio de estado.
+    """
+    old_statuses = dict(changes)
+    appointments = list(
+        Appointment.objects.filter(pk__in=old_statuses)
+        .select_related('client', 'service', 'employee')
+    )
+    for appointment in appointments:
+        appointment.reset_tracking(status=old_statuses[appointment.pk])
+
+    try:
+        GoogleCalendarService().patch_appointment_statuses(appointments)
+    except Exception as e:
+        logger.error(f"❌ [Google Calendar] Cambio masivo de {len(appointments)} citas: {e}")
+
+    for appointment in appointments:
+        try:
+            handle_appointment_updated(appointment)
+        except Exception as e:
+            logger.error(f"❌ [Zapier] Cita {appointment.id}: {e}")
+
+    logger.info(f"✅ Background tasks de cambio masivo completadas ({len(appointments)} citas)")
+
 def format_chilean_price(price):
     """Formatear precio al estilo chileno"""
     try:
@@ -101,7 +151,7 @@ def send_confirmation_email(appointment):
             return
         resend.api_key = api_key
         business_name = appointment.business.name if appointment.business else os.environ.get('BUSINESS_NAME', 'BeautyCare')
-        precio_formateado = format_chilean_price(appointment.service.price)
+        precio_formateado = format_chilean_price(appointment.booked_price)
         fecha_esp = format_date_spanish(appointment.date)
         hora_esp = appointment.start_time.strftime('%H:%M')
         cancellation_policy = os.environ.get('CANCELLATION_POLICY', '24 horas de anticipación')
@@ -232,8 +282,8 @@ def update_google_calendar_event(appointment):
             logger.info(f"ℹ️ Cita ID: {appointment.id} no tiene evento en Google Calendar")
             return
         
-        if hasattr(appointment, '_old_status') and appointment._old_status != appointment.status:
-            logger.info(f"🔄 Estado cambió de {appointment._old_status} a {appointment.status}")
+        if appointment.has_changed('status'):
+            logger.info(f"🔄 Estado cambió de {appointment.previous('status')} a {appointment.status}")
             
             calendar_service = GoogleCalendarService()
             success = calendar_service.update_appointment_event(
@@ -249,17 +299,41 @@ def update_google_calendar_event(appointment):
     except Exception as e:
         logger.error(f"❌ Error actualizando evento: {e}")
 
-@receiver(pre_save, sender=Appointment)
-def store_old_status(sender, instance, **kwargs):
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_calendar_overview(sender, instance, **kwargs):
+    """Invalida el resumen mensual del mes actual de la cita y del anterior si cambió"""
+    invalidate_month_overview([
+        (instance.business_id, instance.date),
+        (instance.previous('business_id'), instance.previous('date')),
+    ])
+
+
+@receiver(post_save, sender=Appointment)
+def record_reassignment_tombstone(sender, instance, created, **kwargs):
     """
-    Guardar el estado anterior para detectar cambios
+    Si la cita cambió de negocio o de empleado, deja una lápida para el
+    calendario anterior: la sincronización incremental del dueño original
+    (o del empleado original) debe borrarla de su vista.
     """
-    if instance.pk:
-        try:
-            old_instance = Appointment.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except Appointment.DoesNotExist:
-            instance._old_status = None
+    if created or not (instance.has_changed('business_id') or instance.has_changed('employee_id')):
+        return
+    AppointmentTombstone.objects.create(
+        appointment_id=instance.pk,
+        business_id=instance.previous('business_id'),
+        employee_id=instance.previous('employee_id'),
+        reason='moved',
+    )
+
+
+@receiver(post_delete, sender=Appointment)
+def record_deletion_tombstone(sender, instance, **kwargs):
+    AppointmentTombstone.objects.create(
+        appointment_id=instance.pk,
+        business_id=instance.business_id,
+        employee_id=instance.employee_id,
+        reason='deleted',
+    )
             
 
 # Whatsapp Zapier
@@ -296,8 +370,8 @@ def send_zapier_webhook_new_appointment(appointment):
         },
         'service': {
             'name': appointment.service.name,
-            'price': float(appointment.service.price),
-            'duration': appointment.service.duration,
+            'price': float(appointment.booked_price),
+            'duration': appointment.booked_duration,
             'category': appointment.service.category.name if appointment.service.category else 'Sin categoría',
         },
         'employee': {
@@ -340,7 +414,7 @@ def send_zapier_webhook_new_appointment(appointment):
 
 def generate_client_whatsapp_message(appointment):
     """Generar mensaje de WhatsApp para el cliente"""
-    precio_formateado = format_chilean_price(appointment.service.price)
+    precio_formateado = format_chilean_price(appointment.booked_price)
     business_name = os.environ.get('BUSINESS_NAME', 'Centro de Estética')
     arrival_time = os.environ.get('ARRIVAL_TIME', '10 minutos antes')
     cancellation_policy = os.environ.get('CANCELLATION_POLICY', '24 horas de anticipación')
@@ -381,7 +455,7 @@ def generate_admin_whatsapp_message(appointment):
 
 📅 Fecha: {appointment.date.strftime('%d/%m/%Y')}
 🕐 Hora: {appointment.start_time.strftime('%H:%M')} - {appointment.end_time.strftime('%H:%M')}
-💅 Servicio: {appointment.service.name} (${appointment.service.price})
+💅 Servicio: {appointment.service.name} (${appointment.booked_price})
 👩‍💼 Especialista: {appointment.employee.get_full_name()}
 
 📝 Notas: {appointment.notes or 'Sin notas'}
@@ -394,7 +468,7 @@ def generate_admin_whatsapp_message(appointment):
 
 def handle_appointment_updated(appointment):
     """Manejar actualizaciones de cita"""
-    if hasattr(appointment, '_old_status') and appointment._old_status != appointment.status:
+    if appointment.has_changed('status'):
         send_zapier_webhook_status_changed(appointment)
 
 def send_zapier_webhook_status_changed(appointment):
@@ -424,7 +498,7 @@ def send_zapier_webhook_status_changed(appointment):
             'employee_name': appointment.employee.get_full_name(),
             'new_status': appointment.status,
             'new_status_display': appointment.get_status_display(),
-            'old_status': getattr(appointment, '_old_status', None),
+            'old_status': appointment.previous('status'),
         },
         'whatsapp_message': generate_status_change_message(appointment),
         'timestamp': appointment.updated_at.isoformat()
@@ -1,3 +1,1282 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import json
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from authentication.models import Business, User, WorkSchedule
+from clients.models import Client
+from services.models import Service, ServiceCategory
+from backend.pagination import KeysetPagination
+from backend.search import TrigramSearchFilter
+from backend.testing import build_appointment, create_business, create_service, create_users
+from . import availability, partitioning
+from .importer import AppointmentImporter, parse_file
+from .caching import get_month_overview, set_month_overview
+from .intervals import free_gaps
+from .recurrence import check_occurrences, expand_dates
+from .models import Appointment, AppointmentQuerySet, AppointmentSeries, AppointmentTombstone, ArchivedAppointment
+from .serializers import CalendarAppointmentSerializer, CalendarAppointmentValuesSerializer
+
+
+class HotQueryIndexTests(TestCase):
+    """
+    Verifica con EXPLAIN que las consultas calientes de disponibilidad,
+    solapamiento y recordatorios usan los índices parciales de citas activas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        employees = create_users(cls.business, *(f'empleado{i}' for i in range(5)))
+        cls.employee_ids = [employee.pk for employee in employees]
+        clients = Client.objects.bulk_create([
+            Client(business=cls.business, first_name=f'Cliente{i}', last_name='Soto', email=f'cliente{i}@example.com')
+            for i in range(20)
+        ])
+        # El planificador solo prefiere los índices parciales con volumen y
+        # una distribución realista: casi todo el histórico ya está completado
+        appointments = []
+        for i in range(4000):
+            slot = i // len(employees)
+            appointments.append(build_appointment(
+                service, employees[i % len(employees)], clients[i % len(clients)],
+                date(2015, 1, 1) + timedelta(days=slot // 16), time(9 + slot % 16 // 2, 30 * (slot % 2)),
+                status='confirmed' if i % 20 == 0 else 'completed',
+            ))
+        Appointment.objects.bulk_create(appointments, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE appointments_appointment')
+        cls.day = date(2015, 6, 1)
+
+    ACTIVE_INDEXES = ('appt_emp_date_active_idx', 'appt_biz_date_active_idx', 'appt_date_start_active_idx')
+
+    def assertUsesActiveIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan', plan)
+        self.assertIn('Index Cond', plan)
+        self.assertTrue(any(name in plan for name in self.ACTIVE_INDEXES), plan)
+
+    def test_overlap_validation(self):
+        queryset = Appointment.objects.active().filter(
+            employee_id=self.employee_ids[0], date=self.day,
+        ).exclude(id=1)
+        self.assertUsesActiveIndex(queryset)
+
+    def test_public_available_times(self):
+        queryset = Appointment.objects.active().filter(business=self.business, date=self.day)
+        self.assertUsesActiveIndex(queryset)
+        self.assertUsesActiveIndex(queryset.filter(employee_id=self.employee_ids[0]))
+
+    def test_employee_availability(self):
+        # availability.busy_masks: todas las citas activas del día, filtradas por empleado
+        queryset = Appointment.objects.active().filter(
+            business=self.business, date=self.day, employee_id__in=self.employee_ids,
+        ).values_list('employee_id', 'start_time', 'end_time')
+        self.assertUsesActiveIndex(queryset)
+
+    def test_reminders_sweep(self):
+        queryset = Appointment.objects.active().filter(date=self.day)
+        self.assertUsesActiveIndex(queryset)
+
+
+class OverlapConstraintTests(TestCase):
+    """
+    appointment_no_overlap resuelve las reservas que pasan la verificación
+    previa (dos peticiones simultáneas): el perdedor recibe 409, no un 500.
+    La carrera se simula haciendo que la verificación no vea la otra cita.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Estética Luna', slug='estetica-luna')
+        category = ServiceCategory.objects.create(business=cls.business, name='Cabello')
+        cls.service = Service.objects.create(
+            business=cls.business, category=category, name='Corte', price=10000, duration=30,
+        )
+        User.objects.bulk_create([User(username='vale', email='vale@example.com', business=cls.business, is_staff=True)])
+        cls.staff = User.objects.get(username='vale')
+        cls.customer = Client.objects.create(
+            business=cls.business, first_name='Ana', last_name='Pérez', email='ana@example.com',
+        )
+        cls.day = date(2030, 1, 7)
+        Appointment.objects.bulk_create([
+            Appointment(business=cls.business, client=cls.customer, service=cls.service, employee=cls.staff,
+                        date=cls.day, start_time=start, end_time=end, status='confirmed')
+            for start, end in ((time(10), time(11)), (time(12), time(12, 30)))
+        ])
+
+    def race(self):
+        return mock.patch.object(AppointmentQuerySet, 'overlapping', lambda queryset, *args: queryset.none())
+
+    def test_create_and_update_lose_race_with_409(self):
+        api = APIClient()
+        api.force_authenticate(self.staff)
+        payload = {
+            'client': self.customer.id, 'service': self.service.id, 'employee': self.staff.id,
+            'date': self.day.isoformat(), 'start_time': '10:30', 'end_time': '11:00', 'status': 'confirmed',
+        }
+        later = Appointment.objects.get(start_time=time(12))
+        with self.race():
+            created = api.post('/api/appointments/', payload, format='json', HTTP_HOST='localhost')
+            updated = api.patch(f'/api/appointments/{later.id}/', {'start_time': '10:45', 'end_time': '11:15'},
+                                format='json', HTTP_HOST='localhost')
+        self.assertEqual(created.status_code, 409, created.data)
+        self.assertEqual(updated.status_code, 409, updated.data)
+        later.refresh_from_db()
+        self.assertEqual(later.start_time, time(12))
+
+    def test_public_booking_loses_race_with_409(self):
+        payload = {
+            'service_id': self.service.id, 'employee_id': self.staff.id, 'date': self.day.isoformat(),
+            'start_time': '10:30', 'client_name': 'Ana Pérez', 'client_email': 'ana@example.com',
+            'client_phone': '+56911111111',
+        }
+        url = f'/api/appointments/public/{self.business.slug}/book/'
+        with self.race():
+            response = APIClient().post(url, payload, format='json', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 409, response.data)
+
+        # Un servicio que terminaría pasada la medianoche se rechaza antes de guardar
+        response = APIClient().post(url, {**payload, 'start_time': '23:45'}, format='json', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Appointment.objects.filter(business=self.business).count(), 2)
+
+    def test_migration_refuses_existing_overlaps(self):
+        migration = importlib.import_module('appointments.migrations.0008_appointment_no_overlap')
+        constraint = next(c for c in Appointment._meta.constraints if c.name == Appointment.OVERLAP_CONSTRAINT)
+        # Las FK diferidas de los datos del test impiden el ALTER TABLE
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        with connection.schema_editor() as editor:
+            editor.remove_constraint(Appointment, constraint)
+        first, second = Appointment.objects.filter(business=self.business).order_by('id')
+        Appointment.objects.filter(pk=second.pk).update(start_time=time(10, 30), end_time=time(11, 30))
+        # Cruza la medianoche: rango vacío para la restricción, no cuenta como solapada
+        Appointment.objects.bulk_create([Appointment(
+            business=self.business, client=self.customer, service=self.service, employee=self.staff,
+            date=self.day, start_time=time(23, 30), end_time=time(0, 30), status='pending',
+        ), Appointment(
+            business=self.business, client=self.customer, service=self.service, employee=self.staff,
+            date=self.day, start_time=time(23, 45), end_time=time(23, 55), status='pending',
+        )])
+        before = list(Appointment.objects.order_by('id').values_list('id', 'status', 'start_time', 'end_time'))
+
+        with self.assertRaisesMessage(RuntimeError, f'1 citas activas se solapan con otra del mismo empleado '
+                                                    f'(ids {second.pk})'), transaction.atomic():
+            migration.check_existing_overlaps(django_apps, None)
+        self.assertEqual(list(Appointment.objects.order_by('id').values_list('id', 'status', 'start_time', 'end_time')),
+                         before)
+
+        # Con los duplicados cancelados la migración sigue y la restricción se crea
+        call_command('scan_appointment_overlaps', f'--business={self.business.id}', '--cancel', stdout=StringIO())
+        self.assertEqual(Appointment.objects.get(pk=second.pk).status, 'cancelled')
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        migration.check_existing_overlaps(django_apps, None)
+        with connection.schema_editor() as editor:
+            editor.add_constraint(Appointment, constraint)
+
+
+class CalendarDeltaSyncTests(TestCase):
+    """Sincronización incremental del calendario con ?updated_since= y lápidas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.employee, = create_users(cls.business, 'estilista')
+        cls.other_employee_id = cls.staff.pk
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        Appointment.objects.bulk_create([
+            build_appointment(service, employee, ana, date(2030, 1, day), time(10, 0))
+            for employee in (cls.staff, cls.employee) for day in (7, 8, 9)
+        ])
+
+    def fetch(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/appointments/calendar/', params, HTTP_HOST='localhost')
+
+    def test_full_calendar_sends_watermark_header(self):
+        response = self.fetch(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        self.assertIn('X-Sync-Watermark', response)
+
+    def test_delta_returns_changes_and_deletions(self):
+        since = timezone.now()
+        # Lo anterior al margen de solapamiento no debe aparecer en el delta
+        Appointment.objects.update(updated_at=since - timedelta(hours=1))
+        edited, removed = Appointment.objects.order_by('id')[:2]
+        edited.notes = 'editada'
+        edited.save()
+        removed_id = removed.id
+        removed.delete()
+
+        response = self.fetch(self.staff, updated_since=since.isoformat())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['full'])
+        self.assertEqual([item['id'] for item in response.data['changed']], [edited.id])
+        self.assertEqual(response.data['deleted'], [removed_id])
+        self.assertEqual(response['X-Sync-Watermark'], response.data['watermark'])
+
+    def test_reassigned_appointment_is_deleted_for_old_employee(self):
+        since = timezone.now()
+        Appointment.objects.update(updated_at=since - timedelta(hours=1))
+        appointment = Appointment.objects.filter(employee=self.employee).first()
+        appointment.employee_id = self.other_employee_id
+        appointment.date = date(2031, 1, 1)
+        appointment.save()
+
+        response = self.fetch(self.employee, updated_since=since.isoformat())
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [appointment.id])
+        self.assertTrue(AppointmentTombstone.objects.filter(appointment_id=appointment.id, reason='moved').exists())
+
+    def test_stale_watermark_forces_full_sync(self):
+        since = timezone.now() - AppointmentTombstone.RETENTION - timedelta(days=1)
+        response = self.fetch(self.staff, updated_since=since.isoformat())
+        self.assertTrue(response.data['full'])
+        self.assertEqual(len(response.data['changed']), 6)
+
+    def test_invalid_watermark(self):
+        response = self.fetch(self.staff, updated_since='ayer')
+        self.assertEqual(response.status_code, 400)
+
+
+class MonthOverviewTests(TestCase):
+    """Resumen mensual agregado del calendario y su invalidación de caché."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = create_business()
+        service = create_service(business)
+        cls.staff, = create_users(business, 'recepcion', is_staff=True)
+        employee, = create_users(business, 'estilista')
+        ana = Client.objects.create(business=business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        statuses = ('pending', 'confirmed', 'completed', 'cancelled', 'pending', 'confirmed')
+        Appointment.objects.bulk_create([
+            build_appointment(service, (cls.staff, employee)[i % 2], ana, date(2030, 1, 1), time(9 + i // 2, 0),
+                              status=status)
+            for i, status in enumerate(statuses)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def fetch(self):
+        return self.client.get('/api/appointments/month_overview/', {'month': '2030-01'}, HTTP_HOST='localhost')
+
+    def test_counts_and_booked_minutes(self):
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results']
+        self.assertEqual(sum(row['count'] for row in rows), 6)
+        self.assertEqual(sum(row['booked_minutes'] for row in rows), 6 * 30)
+        self.assertTrue(all(row['date'] == '2030-01-01' for row in rows))
+
+    def test_cached_until_appointment_changes(self):
+        self.fetch()
+        Appointment.objects.update(status='completed')  # sin signals: la caché no se entera
+        cached = self.fetch().data['results']
+        self.assertNotEqual({row['status'] for row in cached}, {'completed'})
+
+        appointment = Appointment.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.notes = 'editada'
+            appointment.save()
+        fresh = self.fetch().data['results']
+        self.assertEqual({row['status'] for row in fresh}, {'completed'})
+
+    def test_invalid_month(self):
+        response = self.client.get('/api/appointments/month_overview/', {'month': '2030-13'}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 400)
+
+
+class TrigramSearchTests(TestCase):
+    """TrigramSearchFilter debe devolver las mismas citas que SearchFilter."""
+
+    search_fields = ['notes', 'client__first_name', 'client__last_name', 'employee__username']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        employees = create_users(cls.business, 'estilista-ana', 'estilista-luis', 'manicurista')
+        cls.user = employees[0]
+        clients = Client.objects.bulk_create([
+            Client(business=cls.business, first_name=f'Cliente{i}', last_name=('Soto', 'Sotomayor', 'Rojas')[i % 3],
+                   email=f'cliente{i}@example.com')
+            for i in range(30)
+        ])
+        words = ('corte', 'tinte', 'alisado', 'peinado', 'manicure', 'uñas', 'alergia')
+        Appointment.objects.bulk_create([
+            build_appointment(service, employees[i % 3], clients[i % 30],
+                              date(2030, 1, 1) + timedelta(days=i // 48), time(9 + i // 3 % 16 // 2, 30 * (i // 3 % 2)),
+                              notes=f'{words[i % 7]} {words[i // 7 % 7]}')
+            for i in range(300)
+        ])
+
+    def search(self, backend, term, **params):
+        request = Request(APIRequestFactory().get('/', {'search': term, **params}))
+        request.user = self.user
+        view = type('View', (), {'search_fields': self.search_fields, 'paginator': KeysetPagination()})()
+        queryset = Appointment.objects.filter(business=self.business)
+        return backend.filter_queryset(request, queryset, view)
+
+    def test_same_results_as_search_filter(self):
+        for term in ('Sotomayor', 'soto', 'cliente2', 'alisado peinado', 'estilista', 'no-existe'):
+            expected = set(self.search(filters.SearchFilter(), term).values_list('id', flat=True))
+            found = set(self.search(TrigramSearchFilter(), term).values_list('id', flat=True))
+            self.assertEqual(found, expected, term)
+
+    def test_ranks_closest_match_first(self):
+        results = list(self.search(TrigramSearchFilter(), 'Cliente1'))
+        self.assertEqual(results[0].client.first_name, 'Cliente1')
+        self.assertGreaterEqual(results[0].search_rank, results[-1].search_rank)
+
+    def test_explicit_ordering_skips_rank(self):
+        queryset = self.search(TrigramSearchFilter(), 'Cliente1', ordering='date')
+        self.assertNotIn('search_rank', queryset.query.annotations)
+
+    def test_broad_or_paginated_search_skips_rank(self):
+        # 'a' coincide con todas las citas: más que rank_limit
+        self.assertNotIn('search_rank', self.search(TrigramSearchFilter(), 'a').query.annotations)
+        # Las páginas del keyset ignoran el orden por similitud: no se calcula
+        queryset = self.search(TrigramSearchFilter(), 'Cliente1', page_size=10)
+        self.assertNotIn('search_rank', queryset.query.annotations)
+
+
+class AppointmentBatchTests(TestCase):
+    """Lote de altas y cambios con validación de solapamiento conjunta."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        employee, = create_users(cls.business, 'estilista')
+        cls.employee_ids = [cls.staff.pk, employee.pk]
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        cls.client_ids = [ana.pk]
+        # 2030-01-01: cada empleado tiene 09:00-09:30 activa y 09:30-10:00 ya cerrada
+        day = date(2030, 1, 1)
+        Appointment.objects.bulk_create([
+            build_appointment(cls.service, cls.staff, ana, day, time(9, 0), status='pending'),
+            build_appointment(cls.service, cls.staff, ana, day, time(9, 30), status='completed'),
+            build_appointment(cls.service, employee, ana, day, time(9, 0)),
+            build_appointment(cls.service, employee, ana, day, time(9, 30), status='cancelled'),
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def item(self, start, end, employee=0, **extra):
+        return {
+            'client': self.client_ids[0], 'service': self.service.id, 'employee': self.employee_ids[employee],
+            'date': '2030-01-01', 'start_time': start, 'end_time': end, **extra,
+        }
+
+    def post(self, items):
+        return self.client.post('/api/appointments/batch/', items, format='json', HTTP_HOST='localhost')
+
+    def test_creates_and_updates_in_one_request(self):
+        existing = Appointment.objects.active().get(employee_id=self.employee_ids[1])
+        response = self.post([
+            self.item('10:00', '10:30'),
+            self.item('10:30', '11:00'),
+            {'id': existing.id, 'start_time': '11:00', 'end_time': '11:30'},
+        ])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'created', 'updated'])
+        self.assertEqual(Appointment.objects.filter(business=self.business).count(), 6)
+        existing.refresh_from_db()
+        self.assertEqual(existing.start_time, time(11, 0))
+        self.assertGreater(existing.updated_at, existing.created_at)
+
+    def test_overlaps_reject_whole_batch(self):
+        response = self.post([
+            self.item('10:00', '10:30'),
+            self.item('10:15', '10:45'),  # choca con el ítem 0
+            self.item('09:15', '09:45', employee=1),  # choca con una cita guardada
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.data['results']], ['error', 'error', 'error'])
+        self.assertEqual(Appointment.objects.filter(business=self.business).count(), 4)
+
+    def test_moving_into_a_slot_being_vacated(self):
+        existing = Appointment.objects.active().get(employee_id=self.employee_ids[1])
+        response = self.post([
+            self.item(existing.start_time.strftime('%H:%M'), existing.end_time.strftime('%H:%M'), employee=1),
+            {'id': existing.id, 'start_time': '10:00', 'end_time': '10:30'},
+        ])
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_unknown_id_and_limit(self):
+        response = self.post([{'id': 999999, 'status': 'confirmed'}])
+        self.assertEqual(response.data['results'][0]['errors'], {'id': ['La cita no existe.']})
+        response = self.post([self.item('10:00', '10:30')] * 201)
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkTransitionTests(TestCase):
+    """Cambio de estado masivo con un solo UPDATE ... RETURNING."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        employee, = create_users(cls.business, 'estilista')
+        cls.employee_ids = [cls.staff.pk, employee.pk]
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        # 2030-01-01: el staff tiene pendientes y completadas; el empleado, confirmadas y canceladas
+        Appointment.objects.bulk_create([
+            build_appointment(service, user, ana, date(2030, 1, 1), time(9 + hour, 0), status=statuses[hour % 2])
+            for user, statuses in ((cls.staff, ('pending', 'completed')), (employee, ('confirmed', 'cancelled')))
+            for hour in range(8)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def post(self, data):
+        return self.client.post('/api/appointments/transition/', data, format='json', HTTP_HOST='localhost')
+
+    def test_close_day_for_employee(self):
+        employee = self.employee_ids[1]
+        confirmed = set(Appointment.objects.filter(employee_id=employee, status='confirmed').values_list('id', flat=True))
+        before = Appointment.objects.values_list('updated_at', flat=True).get(pk=min(confirmed))
+
+        response = self.post({'status': 'completed', 'date': '2030-01-01', 'employee': employee,
+                              'from_status': ['confirmed']})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(set(response.data['ids']), confirmed)
+        self.assertFalse(Appointment.objects.filter(pk__in=confirmed).exclude(status='completed').exists())
+        self.assertGreater(Appointment.objects.values_list('updated_at', flat=True).get(pk=min(confirmed)), before)
+        # Las del otro empleado quedan igual
+        self.assertTrue(Appointment.objects.filter(employee_id=self.employee_ids[0], status='pending').exists())
+
+    def test_only_allowed_source_statuses(self):
+        response = self.post({'status': 'confirmed', 'date': '2030-01-01'})
+        self.assertEqual(response.data['updated'], 4)  # solo las pendientes
+        self.assertFalse(Appointment.objects.filter(business=self.business, status='pending').exists())
+        self.assertEqual(Appointment.objects.filter(business=self.business, status='completed').count(), 4)
+
+    def test_requires_scope_and_valid_status(self):
+        self.assertEqual(self.post({'status': 'completed'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'borrada', 'date': '2030-01-01'}).status_code, 400)
+
+    def test_ids_must_be_a_list_of_integers(self):
+        target = Appointment.objects.filter(status='pending').order_by('id').first()
+        before = dict(Appointment.objects.values_list('id', 'status'))
+        ids = str(target.pk)
+        for data in ({'ids': ids}, {'ids': [ids]}, {'ids': [target.pk, True]}, {'ids': {'0': target.pk}}):
+            response = self.post({'status': 'cancelled', **data})
+            self.assertEqual(response.status_code, 400, data)
+        # Form-encoded: request.data.get('ids') devuelve el string
+        response = self.client.post('/api/appointments/transition/', {'status': 'cancelled', 'ids': ids},
+                                    HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(dict(Appointment.objects.values_list('id', 'status')), before)
+
+        response = self.post({'status': 'cancelled', 'ids': [target.pk]})
+        self.assertEqual(response.data['ids'], [target.pk])
+
+
+class SweepAppointmentsTests(TestCase):
+    """Cierre de citas pasadas y archivado en la tabla fría."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        employee, = create_users(cls.business, 'estilista')
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        # 8 citas en 2015 (archivables) y 8 en 2030 (futuras), dos de cada estado
+        statuses = ('pending', 'confirmed', 'completed', 'cancelled')
+        Appointment.objects.bulk_create([
+            build_appointment(service, (cls.staff, employee)[i % 2], ana, day, time(9 + i // 2, 0),
+                              status=statuses[i % 4])
+            for day in (date(2015, 1, 1), date(2030, 1, 1)) for i in range(8)
+        ])
+
+    def sweep(self, **options):
+        call_command('sweep_appointments', stdout=StringIO(), **options)
+
+    def test_closes_past_active_appointments(self):
+        self.sweep(archive_days=0)
+        past = Appointment.objects.filter(business=self.business, date__lt=date(2030, 1, 1))
+        self.assertFalse(past.filter(status__in=Appointment.ACTIVE_STATUSES).exists())
+        self.assertEqual(past.count(), 8)
+        future = Appointment.objects.filter(business=self.business, date__gte=date(2030, 1, 1))
+        self.assertEqual(future.filter(status__in=Appointment.ACTIVE_STATUSES).count(), 4)
+
+    def test_archives_old_appointments_except_stock_references(self):
+        from products.models import Product, ProductCategory, StockMovement
+        kept = Appointment.objects.filter(business=self.business, date__lt=date(2030, 1, 1)).first()
+        category = ProductCategory.objects.create(business=self.business, name='Insumos')
+        product = Product.objects.create(business=self.business, category=category, name='Tinte', sale_price=1000)
+        StockMovement.objects.create(product=product, quantity=-1, movement_type='sale', appointment=kept)
+
+        self.sweep(batch_size=3)
+
+        hot = Appointment.objects.filter(business=self.business)
+        self.assertEqual(list(hot.filter(date__lt=date(2030, 1, 1)).values_list('id', flat=True)), [kept.id])
+        self.assertEqual(ArchivedAppointment.objects.filter(business=self.business).count(), 7)
+        self.assertEqual(AppointmentTombstone.objects.filter(reason='archived').count(), 7)
+
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.get('/api/appointments/archive/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 7)
+        response = client.delete(f"/api/appointments/archive/{response.data[0]['id']}/", HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 405)
+
+
+class AppointmentSeriesTests(TestCase):
+    """Series recurrentes: expansión, validación conjunta y alta en bloque."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto',
+                                        email='ana@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def series_data(self, **extra):
+        # Martes por medio a las 10:00, desde el martes 2030-01-01
+        return {
+            'client': self.ana.pk, 'service': self.service.id, 'employee': self.staff.pk,
+            'frequency': 'weekly', 'interval': 2, 'start_date': '2030-01-01', 'count': 4,
+            'start_time': '10:00', 'end_time': '10:30', **extra,
+        }
+
+    def post(self, data):
+        return self.client.post('/api/appointments/series/', data, format='json', HTTP_HOST='localhost')
+
+    def test_expand_dates(self):
+        series = AppointmentSeries(frequency='weekly', interval=2, start_date=date(2030, 1, 1), count=4)
+        self.assertEqual(expand_dates(series), [date(2030, 1, 1), date(2030, 1, 15), date(2030, 1, 29), date(2030, 2, 12)])
+        # Lunes y jueves, empezando un miércoles
+        series = AppointmentSeries(frequency='weekly', interval=1, by_weekday=[3, 0],
+                                   start_date=date(2030, 1, 2), until=date(2030, 1, 10))
+        self.assertEqual(expand_dates(series), [date(2030, 1, 3), date(2030, 1, 7), date(2030, 1, 10)])
+        # El 31 solo existe en algunos meses
+        series = AppointmentSeries(frequency='monthly', interval=1, start_date=date(2030, 1, 31), count=3)
+        self.assertEqual(expand_dates(series), [date(2030, 1, 31), date(2030, 3, 31), date(2030, 5, 31)])
+
+    def test_conflicts_are_checked_in_one_pass(self):
+        Appointment.objects.create(
+            business=self.business, client=self.ana, service=self.service,
+            employee=self.staff, date=date(2030, 1, 29), start_time=time(10, 15), end_time=time(11, 0),
+        )
+        WorkSchedule.objects.create(employee=self.staff, day_of_week=1,
+                                    start_time=time(9, 0), end_time=time(18, 0))
+        series = AppointmentSeries(employee=self.staff, frequency='daily', interval=1,
+                                   start_date=date(2030, 1, 27), count=4,
+                                   start_time=time(10, 0), end_time=time(10, 30))
+        dates = expand_dates(series)
+        with self.assertNumQueries(2):
+            problems = check_occurrences(series, dates)
+        # Domingo, lunes y miércoles fuera de horario; el martes choca
+        self.assertEqual(sorted(problems), dates)
+        self.assertIn('solapa', problems[date(2030, 1, 29)])
+
+    def test_conflict_rejects_series_unless_skipped(self):
+        existing = Appointment.objects.create(
+            business=self.business, client=self.ana, service=self.service,
+            employee=self.staff, date=date(2030, 1, 29), start_time=time(10, 15), end_time=time(11, 0),
+        )
+        response = self.post(self.series_data())
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual([o['status'] for o in response.data['occurrences']],
+                         ['available', 'available', 'conflict', 'available'])
+        self.assertFalse(AppointmentSeries.objects.exists())
+
+        response = self.post(self.series_data(dry_run=True))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AppointmentSeries.objects.exists())
+
+        response = self.post(self.series_data(skip_conflicts=True))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['rrule'], 'FREQ=WEEKLY;INTERVAL=2;COUNT=4')
+        self.assertEqual([o['status'] for o in response.data['occurrences']],
+                         ['created', 'created', 'skipped', 'created'])
+        series = AppointmentSeries.objects.get()
+        self.assertEqual(series.appointments.count(), 3)
+        self.assertEqual(Appointment.objects.filter(date=date(2030, 1, 29)).get(), existing)
+
+    def test_validation(self):
+        self.assertEqual(self.post(self.series_data(count=None)).status_code, 400)
+        self.assertEqual(self.post(self.series_data(count=500)).status_code, 400)
+        self.assertEqual(self.post(self.series_data(by_weekday=[7])).status_code, 400)
+
+
+class BookingSnapshotTests(TestCase):
+    """Precio y duración copiados del servicio al reservar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto',
+                                        email='ana@example.com')
+        # Citas previas a las columnas: bulk_create no pasa por snapshot_service
+        Appointment.objects.bulk_create([
+            build_appointment(cls.service, cls.staff, cls.ana, date(2030, 1, day), time(10, 0))
+            for day in range(1, 6)
+        ])
+
+    def test_price_change_keeps_history(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.post('/api/appointments/', {
+            'client': self.ana.pk, 'service': self.service.id, 'employee': self.staff.pk,
+            'date': '2030-02-01', 'start_time': '10:00', 'end_time': '10:30',
+        }, format='json', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        self.service.price = 15000
+        self.service.save()
+        appointment = Appointment.objects.get(pk=response.data['id'])
+        self.assertEqual((appointment.price_at_booking, appointment.duration_at_booking), (10000, 30))
+        appointment.notes = 'editada'
+        appointment.save()
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.booked_price, 10000)
+
+    def test_month_overview_revenue_without_snapshot(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.get('/api/appointments/month_overview/', {'month': '2030-01'}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(row['revenue'] for row in response.data['results']), 5 * 10000)
+
+    def test_backfill_command(self):
+        self.assertEqual(Appointment.objects.filter(price_at_booking__isnull=True).count(), 5)
+        set_month_overview(self.business.id, 2030, 1, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_booking_snapshot', batch_size=2, stdout=StringIO())
+        self.assertIsNone(get_month_overview(self.business.id, 2030, 1))
+        self.assertFalse(Appointment.objects.filter(price_at_booking__isnull=True).exists())
+        self.assertEqual(
+            set(Appointment.objects.values_list('price_at_booking', 'duration_at_booking')), {(10000, 30)}
+        )
+
+
+class FieldTrackingTests(TestCase):
+    """Los signals detectan cambios con los valores cargados, sin SELECT previo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        cls.employees = create_users(cls.business, 'estilista', 'manicurista')
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        build_appointment(service, cls.employees[0], ana, date(2030, 1, 1), time(9, 0), status='pending').save()
+
+    def test_save_does_not_reload_the_row(self):
+        appointment = Appointment.objects.get(business=self.business)
+        self.assertFalse(appointment.changed_fields())
+        appointment.status = 'confirmed'
+        appointment.employee_id = self.employees[1].pk
+        self.assertEqual(appointment.changed_fields(), {'status', 'employee_id'})
+        self.assertEqual(appointment.previous('status'), 'pending')
+
+        with CaptureQueriesContext(connection) as queries:
+            appointment.save()
+        selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'appointments_appointment"' in q['sql']]
+        self.assertEqual(selects, [])
+        self.assertTrue(AppointmentTombstone.objects.filter(
+            appointment_id=appointment.id, employee_id=self.employees[0].pk, reason='moved'
+        ).exists())
+        self.assertFalse(appointment.changed_fields())
+
+        # Un segundo guardado no repite la lápida
+        appointment.save(update_fields=['notes'])
+        self.assertEqual(AppointmentTombstone.objects.filter(appointment_id=appointment.id).count(), 1)
+
+    def test_deferred_fields_are_tracked_when_loaded(self):
+        appointment = Appointment.objects.only('id').get(business=self.business)
+        self.assertEqual(appointment.status, 'pending')
+        appointment.status = 'cancelled'
+        self.assertTrue(appointment.has_changed('status'))
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= / ?omit= recortan la respuesta y la consulta."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = create_business()
+        service = create_service(business)
+        cls.staff, = create_users(business, 'recepcion', is_staff=True)
+        # Tres clientes: ?page_size=2 deja una página siguiente
+        clients = Client.objects.bulk_create([
+            Client(business=business, first_name=name, last_name='Soto', email=f'{name.lower()}@example.com',
+                   address='Av. Siempre Viva 123', phone='555')
+            for name in ('Ana', 'Luis', 'Marta')
+        ])
+        Appointment.objects.bulk_create([
+            build_appointment(service, cls.staff, client, date(2030, 1, 7), time(9 + i, 0))
+            for i, client in enumerate(clients)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, HTTP_HOST='localhost')
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_fields_prune_output_and_joins(self):
+        response, sql = self.get('/api/appointments/?fields=id,status,service_name')
+        self.assertEqual(list(response.data[0]), ['id', 'service_name', 'status'])
+        self.assertIn('"services_service"', sql)
+        self.assertNotIn('"clients_client"', sql)
+
+        response, sql = self.get('/api/auth/users/?omit=groups')
+        self.assertNotIn('groups', response.data[0])
+        self.assertNotIn('"auth_group"', sql)
+
+    def test_values_serializers(self):
+        response, sql = self.get('/api/appointments/calendar/?fields=id,date,employee_name')
+        self.assertEqual(list(response.data[0]), ['id', 'employee_name', 'date'])
+        self.assertNotIn('"clients_client"', sql)
+
+        response, _ = self.get('/api/clients/?page_size=2&omit=address,phone')
+        self.assertNotIn('address', response.data['results'][0])
+        self.assertIn('email', response.data['results'][0])
+        self.assertIsNotNone(response.data['next_cursor'])
+
+    def test_unknown_fields(self):
+        response, _ = self.get('/api/clients/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.data['fields'])
+
+
+class CalendarValuesSerializerTests(TestCase):
+    """CalendarAppointmentValuesSerializer entrega lo mismo que el ModelSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        service = create_service(cls.business)
+        # Sin nombre: get_full_name() queda vacío y el serializer de values() debe coincidir
+        named, unnamed = create_users(cls.business, 'estilista', 'manicurista', first_name='Eva')
+        User.objects.filter(pk=unnamed.pk).update(first_name='')
+        ana, luis = Client.objects.bulk_create([
+            Client(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com'),
+            Client(business=cls.business, first_name='Luis', last_name='', email='luis@example.com'),
+        ])
+        Appointment.objects.bulk_create([
+            build_appointment(service, named, ana, date(2030, 1, 7), time(10, 0)),
+            build_appointment(service, unnamed, luis, date(2030, 1, 7), time(10, 0), status='pending'),
+            build_appointment(service, named, luis, date(2030, 1, 8), time(9, 30), status='cancelled'),
+        ])
+
+    def test_same_output_as_model_serializer(self):
+        queryset = Appointment.objects.filter(business=self.business).order_by('id')
+        expected = CalendarAppointmentSerializer(queryset, many=True).data
+        self.assertEqual(CalendarAppointmentValuesSerializer(queryset, many=True).data, expected)
+        values = CalendarAppointmentValuesSerializer.values(queryset).get(pk=expected[1]['id'])
+        self.assertEqual(CalendarAppointmentValuesSerializer(values).data, expected[1])
+
+
+class DayViewTests(TestCase):
+    """Horario, citas y huecos por empleado con un número fijo de consultas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        # El último no tiene horario configurado
+        employees = create_users(cls.business, 'estilista', 'manicurista', 'masajista')
+        cls.employee_ids = [cls.staff.pk] + [employee.pk for employee in employees]
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        cls.client_ids = [ana.pk]
+        cls.day = date(2030, 1, 7)  # lunes
+        WorkSchedule.objects.bulk_create([
+            WorkSchedule(employee_id=pk, day_of_week=0, start_time=time(9), end_time=time(13))
+            for pk in cls.employee_ids[:3]
+        ])
+        Appointment.objects.bulk_create([
+            Appointment(business=cls.business, client_id=cls.client_ids[0], service=cls.service,
+                        employee_id=cls.employee_ids[1], date=cls.day, start_time=start, end_time=end, status=status)
+            for start, end, status in (
+                (time(10), time(10, 30), 'pending'),
+                (time(10, 30), time(11), 'confirmed'),
+                (time(12), time(12, 30), 'cancelled'),
+            )
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def get(self, query):
+        return self.client.get(f'/api/appointments/day_view/?{query}', HTTP_HOST='localhost')
+
+    def test_free_gaps(self):
+        self.assertEqual(
+            free_gaps(time(9), time(13), [(time(8), time(9, 30)), (time(10), time(11)), (time(10, 30), time(11, 15))]),
+            [(time(9, 30), time(10)), (time(11, 15), time(13))],
+        )
+
+    def test_day_view(self):
+        data = self.get(f'date={self.day}').data
+        by_id = {employee['id']: employee['days'][0] for employee in data['employees']}
+        busy = by_id[self.employee_ids[1]]
+        self.assertEqual(busy['schedule'], {'start': '09:00:00', 'end': '13:00:00'})
+        self.assertEqual([a['start_time'] for a in busy['appointments']], ['10:00:00', '10:30:00'])
+        self.assertEqual(busy['free'], [{'start': '09:00:00', 'end': '10:00:00'}, {'start': '11:00:00', 'end': '13:00:00'}])
+        # Sin horario configurado no se restringe; con horario, el martes no trabaja
+        self.assertIsNone(by_id[self.employee_ids[3]]['free'])
+        tuesday = self.get(f'date={self.day + timedelta(days=1)}&employees={self.employee_ids[1]}').data
+        self.assertEqual(tuesday['employees'][0]['days'][0]['free'], [])
+
+    @override_settings(SHARED_CACHE=True)
+    def test_fixed_query_count(self):
+        counts = []
+        for employees in (self.employee_ids[:1], self.employee_ids):
+            query = f"date_from={self.day}&date_to={self.day + timedelta(days=6)}&employees={','.join(map(str, employees))}"
+            self.get(query)  # contexto de tenant en caché
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.get(query).status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts, [3, 3])
+        self.assertEqual(self.get(f'date_from={self.day}&date_to={self.day + timedelta(days=40)}').status_code, 400)
+
+
+class ExportTests(TestCase):
+    """Exportación por streaming en CSV/JSONL, opcionalmente comprimida."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = create_business()
+        service = create_service(business)
+        cls.staff, = create_users(business, 'recepcion', is_staff=True)
+        employee, = create_users(business, 'estilista')
+        clients = Client.objects.bulk_create([
+            Client(business=business, first_name=name, last_name='Soto', email=f'{name.lower()}@example.com')
+            for name in ('Ana', 'Luis', 'Marta')
+        ])
+        cls.client_ids = [client.pk for client in clients]
+        Appointment.objects.bulk_create([
+            build_appointment(service, (cls.staff, employee)[i % 2], clients[i % 3], date(2030, 1, 7), time(9 + i, 0),
+                              notes='alergia al tinte' if i == 0 else None)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def export(self, query):
+        response = self.client.get(f'/api/appointments/export/?{query}', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_jsonl_matches_list(self):
+        _, content = self.export('type=jsonl&date_from=2030-01-01')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        listed = self.client.get('/api/appointments/?date_from=2030-01-01', HTTP_HOST='localhost').data
+        self.assertEqual(len(rows), 5)
+        for row, expected in zip(rows, sorted(listed, key=lambda a: (a['date'], a['start_time'], a['id']))):
+            # Sin creador el ModelSerializer omite created_by_name; la exportación lo deja en null
+            self.assertIsNone(row.pop('created_by_name'))
+            self.assertEqual(row, json.loads(json.dumps(expected)))
+
+    def test_csv_gzip_and_fields(self):
+        response, content = self.export('fields=id,date,client_name&gzip=1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        lines = gzip.decompress(content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'id,client_name,date')
+        self.assertEqual(len(lines), 6)
+
+        self.assertEqual(self.client.get('/api/appointments/export/?type=xlsx', HTTP_HOST='localhost').status_code, 400)
+        self.assertEqual(self.client.get('/api/appointments/archive/export/', HTTP_HOST='localhost').status_code, 200)
+
+    def test_csv_escapes_formulas(self):
+        Client.objects.filter(pk=self.client_ids[0]).update(first_name='=HYPERLINK("http://x")', last_name='-1')
+        _, content = self.export('fields=id,client_name,notes')
+        rows = list(csv.reader(content.decode('utf-8-sig').splitlines()))
+        names = {row[1] for row in rows[1:]}
+        self.assertIn('\'=HYPERLINK("http://x") -1', names)
+        self.assertFalse([name for name in names if name.startswith(('=', '+', '-', '@'))])
+
+
+class ImportTests(TestCase):
+    """Importación histórica por COPY desde CSV e ICS."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business, name='Corte de pelo')
+        cls.employees = create_users(cls.business, 'estilista', 'colorista')
+        cls.existing_client = Client.objects.create(
+            business=cls.business, first_name='Marta', last_name='Díaz', email='marta@example.com',
+        )
+        # bulk_create: sin signals, como el resto de los datos de prueba
+        Appointment.objects.bulk_create([Appointment(
+            business=cls.business, client=cls.existing_client, service=cls.service, employee=cls.employees[0],
+            date=date(2020, 3, 2), start_time=time(10, 0), end_time=time(10, 30), status='confirmed',
+        )])
+
+    def run_import(self, content, file_format, employee=None):
+        stream = StringIO(content)
+        with self.captureOnCommitCallbacks(execute=True):
+            return AppointmentImporter(self.business.id, employee).run(parse_file(stream, file_format))
+
+    def test_csv_resolves_creates_clients_and_skips_conflicts(self):
+        first, second = self.employees
+        content = (
+            'date,start_time,end_time,client_email,client_name,service,employee,status,notes,payment_method,price\n'
+            f'2020-03-02,11:00,,{self.existing_client.email},,Corte de pelo,{first.email},,,efectivo,\n'
+            f'2020-03-02,11:00,,nueva@example.com,Ana Pérez,corte DE PELO,{second.username},confirmed,"corte, lavado",,15000\n'
+            f'2020-03-02,10:15,10:45,nueva@example.com,,Corte de pelo,{first.email},pending,,,\n'  # choca con la base
+            f'2020-03-02,11:10,11:20,nueva@example.com,,Corte de pelo,{second.email},pending,,,\n'  # choca con la fila 3
+            f'2020-03-02,10:00,10:30,nueva@example.com,,Corte de pelo,{first.email},cancelled,,,\n'  # misma hora
+            f'2020-03-02,12:00,,nueva@example.com,,Masaje,{first.email},,,,\n'
+            f'2020-13-02,12:00,,nueva@example.com,,Corte de pelo,{first.email},,,,\n'
+        )
+        report = self.run_import(content, 'csv')
+
+        self.assertEqual((report.rows, report.imported, report.clients_created), (7, 2, 1))
+        self.assertEqual([error['line'] for error in report.errors], [8, 7, 4, 5, 6])
+        imported = Appointment.objects.filter(business=self.business, start_time=time(11, 0)).order_by('employee_id')
+        self.assertEqual([(a.status, a.end_time, a.payment_method) for a in imported],
+                         [('completed', time(11, 30), 'efectivo'), ('confirmed', time(11, 30), None)])
+        ana = Client.objects.get(email='nueva@example.com')
+        self.assertEqual((ana.business_id, ana.first_name, ana.last_name), (self.business.id, 'Ana', 'Pérez'))
+        self.assertEqual(imported[1].client_id, ana.id)
+        self.assertEqual(imported[1].notes, 'corte, lavado')
+        self.assertEqual(imported[1].price_at_booking, 15000)
+        self.assertIsNotNone(imported[0].created_at)
+
+    def test_ics_with_default_employee(self):
+        content = '\r\n'.join([
+            'BEGIN:VCALENDAR',
+            'BEGIN:VEVENT',
+            'DTSTART:20200303T130000Z',
+            'DTEND:20200303T133000Z',
+            'SUMMARY:✅ Corte de pelo - Luis Soto',
+            'ATTENDEE;CN="Luis Soto":mailto:luis@example.com',
+            'DESCRIPTION:Primera visita\\, pidió',
+            '  turno tarde',
+            'END:VEVENT',
+            'BEGIN:VEVENT',
+            'DTSTART;TZID=America/Santiago:20200304T090000',
+            'SUMMARY:Corte de pelo',
+            'ATTENDEE:mailto:luis@example.com',
+            'STATUS:CANCELLED',
+            'END:VEVENT',
+            'BEGIN:VEVENT',
+            'DTSTART;VALUE=DATE:20200305',
+            'SUMMARY:Feriado',
+            'END:VEVENT',
+            'END:VCALENDAR',
+        ])
+        with timezone.override('America/Santiago'):
+            report = self.run_import(content, 'ics', employee=self.employees[1].username)
+
+        self.assertEqual((report.imported, report.clients_created), (2, 1))
+        self.assertEqual(report.errors, [{'line': 16, 'error': 'Evento de día completo'}])
+        first, second = Appointment.objects.filter(client__email='luis@example.com').order_by('date')
+        # 13:00 UTC son las 10:00 en Santiago (verano, UTC-3)
+        self.assertEqual((first.date, first.start_time, first.end_time), (date(2020, 3, 3), time(10, 0), time(10, 30)))
+        self.assertEqual(first.notes, 'Primera visita, pidió turno tarde')
+        self.assertEqual(first.employee_id, self.employees[1].id)
+        self.assertEqual((second.start_time, second.status), (time(9, 0), 'cancelled'))
+        self.assertEqual(Client.objects.get(email='luis@example.com').first_name, 'Luis')
+
+    def test_endpoint_admin_only_and_dry_run(self):
+        staff, employee = self.employees
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        staff.refresh_from_db()
+        content = (
+            'date,start_time,client_email,service,employee\n'
+            f'2020-03-06,09:00,{self.existing_client.email},Corte de pelo,{employee.email}\n'
+        ).encode()
+        api = APIClient()
+
+        api.force_authenticate(employee)
+        upload = SimpleUploadedFile('agenda.csv', content)
+        response = api.post('/api/appointments/import/', {'file': upload}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 403)
+
+        api.force_authenticate(staff)
+        upload = SimpleUploadedFile('agenda.csv', content)
+        response = api.post('/api/appointments/import/', {'file': upload, 'dry_run': '1'}, HTTP_HOST='localhost')
+        self.assertEqual((response.status_code, response.data['imported']), (200, 1))
+        self.assertFalse(Appointment.objects.filter(date=date(2020, 3, 6)).exists())
+
+        upload = SimpleUploadedFile('agenda.csv', content)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = api.post('/api/appointments/import/', {'file': upload}, HTTP_HOST='localhost')
+        self.assertEqual(response.data['imported'], 1)
+        self.assertTrue(Appointment.objects.filter(date=date(2020, 3, 6), employee=employee).exists())
+
+        upload = SimpleUploadedFile('agenda.csv', content.replace(b'pelo', 'pelo Peña'.encode('latin-1')))
+        response = api.post('/api/appointments/import/', {'file': upload}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_price_skips_row(self):
+        first = self.employees[0]
+        content = (
+            'date,start_time,client_email,service,employee,price\n'
+            f'2020-03-09,09:00,{self.existing_client.email},Corte de pelo,{first.email},$12\n'
+            f'2020-03-09,10:00,{self.existing_client.email},Corte de pelo,{first.email},NaN\n'
+            f'2020-03-09,11:00,{self.existing_client.email},Corte de pelo,{first.email},12.5\n'
+        )
+        report = self.run_import(content, 'csv')
+        self.assertEqual(report.imported, 1)
+        self.assertEqual([error['error'] for error in report.errors], ["Precio inválido: '$12'", "Precio inválido: 'NaN'"])
+        self.assertEqual(Appointment.objects.get(date=date(2020, 3, 9)).price_at_booking, Decimal('12.50'))
+
+    def test_concurrent_booking_is_rechecked(self):
+        first = self.employees[0]
+        content = (
+            'date,start_time,end_time,client_email,service,employee,status\n'
+            f'2030-03-11,09:00,09:30,{self.existing_client.email},Corte de pelo,{first.email},confirmed\n'
+            f'2030-03-11,10:00,10:30,{self.existing_client.email},Corte de pelo,{first.email},confirmed\n'
+        )
+        drop_conflicts = AppointmentImporter.drop_conflicts
+        calls = []
+
+        def racing_drop_conflicts(importer, records):
+            kept = drop_conflicts(importer, records)
+            if not calls:
+                # Una reserva entra después de la verificación y antes del COPY
+                Appointment.objects.bulk_create([Appointment(
+                    business=self.business, client=self.existing_client, service=self.service, employee=first,
+                    date=date(2030, 3, 11), start_time=time(9, 15), end_time=time(9, 45), status='confirmed',
+                )])
+            calls.append(len(kept))
+            return kept
+
+        with mock.patch.object(AppointmentImporter, 'drop_conflicts', racing_drop_conflicts):
+            report = self.run_import(content, 'csv')
+        self.assertEqual(calls, [2, 1])
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(report.errors, [{'line': 2, 'error': 'Se solapa con otra cita activa del empleado'}])
+        self.assertEqual(Appointment.objects.filter(date=date(2030, 3, 11)).count(), 2)
+
+
+class OverlapScanTests(TestCase):
+    """Barrido de solapamientos en citas existentes (scan_appointment_overlaps)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.employees = create_users(cls.business, 'estilista', 'manicurista')
+        cls.ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto',
+                                        email='ana@example.com')
+
+    def create(self, employee, start, end, status):
+        appointment = build_appointment(
+            self.service, self.employees[employee], self.ana, date(2030, 5, 6), time(*start),
+            end_time=time(*end), status=status,
+        )
+        Appointment.objects.bulk_create([appointment])
+        return appointment.pk
+
+    def scan(self, *args):
+        out = StringIO()
+        call_command('scan_appointment_overlaps', f'--business={self.business.id}', *args, stdout=out)
+        return out.getvalue()
+
+    def test_sweep_keeps_completed_then_oldest(self):
+        # Datos previos a la restricción: se quita dentro de la transacción del test
+        with connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE appointments_appointment DROP CONSTRAINT appointment_no_overlap')
+        first = self.create(0, (10, 0), (11, 0), 'confirmed')
+        second = self.create(0, (10, 30), (11, 30), 'pending')
+        done = self.create(0, (10, 45), (11, 15), 'completed')
+        later = self.create(0, (11, 30), (12, 0), 'confirmed')
+        other_employee = self.create(1, (10, 0), (11, 0), 'confirmed')
+
+        output = self.scan()
+        self.assertIn('4 citas revisadas', output)
+        self.assertIn(f'#{second} 10:30-11:30 (pending) se solapa con #{first}', output)
+        self.assertIn('1 solapamientos', output)
+
+        output = self.scan('--include-completed', '--cancel')
+        self.assertIn('2 solapamientos, 2 duplicados activos', output)
+        statuses = dict(Appointment.objects.filter(business=self.business).values_list('id', 'status'))
+        self.assertEqual(statuses, {
+            first: 'cancelled', second: 'cancelled', done: 'completed',
+            later: 'confirmed', other_employee: 'confirmed',
+        })
+        self.assertIn('0 solapamientos', self.scan('--include-completed'))
+
+
+class AvailabilityTests(TestCase):
+    """Disponibilidad con mapas de bits por minuto (appointments/availability.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.employees = create_users(cls.business, 'estilista', 'manicurista')
+        ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        cls.day = date(2030, 5, 6)  # lunes
+        WorkSchedule.objects.create(employee=cls.employees[0], day_of_week=0, start_time=time(9), end_time=time(12))
+        WorkSchedule.objects.create(employee=cls.employees[0], day_of_week=1, start_time=time(9), end_time=time(18))
+        cls.long_service = Service.objects.create(
+            business=cls.business, category=cls.service.category, name='Largo', price=1, duration=60,
+        )
+        Appointment.objects.bulk_create([
+            build_appointment(cls.service, cls.employees[0], ana, cls.day, start, end_time=end, status=status)
+            for start, end, status in (
+                (time(10, 0), time(10, 45), 'confirmed'),
+                (time(11, 0), time(11, 30), 'cancelled'),
+            )
+        ])
+
+    def test_fits_matches_brute_force(self):
+        free = availability.range_mask(540, 600) | availability.range_mask(610, 700) | availability.range_mask(701, 720)
+        for duration in (1, 5, 30, 45, 61, 90):
+            expected = [
+                minute for minute in range(availability.MINUTES_PER_DAY)
+                if all(free >> m & 1 for m in range(minute, minute + duration))
+            ]
+            self.assertEqual(availability.minutes(availability.fits(free, duration)), expected, duration)
+
+    def times(self, **params):
+        response = APIClient().get(f'/api/appointments/public/{self.business.slug}/times/',
+                                   {'date': self.day.isoformat(), **params}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_public_available_times(self):
+        employee = self.employees[0].id
+        self.assertEqual(self.times(employee_id=employee, service_id=self.service.id)['available_times'],
+                         ['09:00', '09:30', '11:00', '11:30'])
+        self.assertEqual(self.times(employee_id=employee, service_id=self.long_service.id)['available_times'],
+                         ['09:00', '11:00'])
+        self.assertTrue(self.times(employee_id=self.employees[1].id)['closed'])
+        without_employee = self.times()['available_times']
+        self.assertEqual((without_employee[0], without_employee[-1], len(without_employee)), ('09:00', '17:30', 16))
+        self.assertNotIn('10:30', without_employee)
+
+    def test_employee_availability(self):
+        api = APIClient()
+        api.force_authenticate(self.employees[0])
+
+        def available(start_time):
+            response = api.get('/api/appointments/employee_availability/', {
+                'date': self.day.isoformat(), 'start_time': start_time, 'service_id': self.service.id,
+            }, HTTP_HOST='localhost')
+            self.assertEqual(response.status_code, 200)
+            return sorted(employee['id'] for employee in response.data)
+
+        both = sorted(employee.id for employee in self.employees)
+        self.assertEqual(available('09:00'), both)
+        self.assertEqual(available('11:00'), both)  # la cita cancelada no ocupa
+        # Ocupado de 10:00 a 10:45 y fuera de horario desde las 12:00; sin horario siempre disponible
+        self.assertEqual(available('10:30'), [self.employees[1].id])
+        self.assertEqual(available('11:45'), [self.employees[1].id])
+
+
+class PartitioningTests(TestCase):
+    """
+    Conversión a tabla particionada por fecha. Todo ocurre dentro de la
+    transacción del test, así que el DDL se revierte al terminar.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.employees = create_users(cls.business, 'estilista', 'manicurista')
+        cls.ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto',
+                                        email='ana@example.com')
+        # Enero de 2025, de 09:00 a 13:00
+        Appointment.objects.bulk_create([
+            build_appointment(cls.service, employee, cls.ana, date(2025, 1, day), time(hour, 0), status='completed')
+            for employee in cls.employees for day in range(1, 11) for hour in range(9, 13)
+        ])
+
+    def setUp(self):
+        self.copied = partitioning.convert_to_partitioned('month', months_ahead=1)
+
+    def new_appointment(self, day, start, end):
+        return Appointment.objects.create(
+            business=self.business, client=self.ana, service=self.service,
+            employee=self.employees[0], date=day, start_time=start, end_time=end,
+        )
+
+    def test_rows_and_constraints_survive(self):
+        self.assertEqual(self.copied, 80)
+        self.assertEqual(Appointment.objects.filter(business=self.business).count(), 80)
+        appointment = self.new_appointment(date(2025, 1, 2), time(18, 0), time(19, 0))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.new_appointment(date(2025, 1, 2), time(18, 30), time(19, 30))
+        appointment.notes = 'editada'
+        appointment.save()
+        appointment.delete()
+
+    def test_date_filters_prune_partitions(self):
+        plan = Appointment.objects.filter(date__gte=date(2025, 1, 1), date__lt=date(2025, 2, 1)).explain()
+        self.assertIn('appointments_appointment_2025m01', plan)
+        self.assertNotIn('appointments_appointment_2025m02', plan)
+
+    def test_new_partition_takes_rows_from_default(self):
+        far = date.today().replace(day=1) + timedelta(days=800)
+        self.new_appointment(far, time(9, 0), time(10, 0))
+        created = partitioning.ensure_partitions(far)
+        self.assertTrue(created)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {partitioning.DEFAULT_PARTITION}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(Appointment.objects.filter(date=far).exists())
+
+
+class PartitioningVersionTests(TestCase):
+    """Sin PostgreSQL 17 la conversión se rechaza antes de bloquear y copiar la tabla."""
+
+    def test_old_server_is_rejected_up_front(self):
+        with mock.patch.dict(connection.__dict__, {'pg_version': 130000}), \
+                self.assertRaisesMessage(CommandError, 'PostgreSQL 17'):
+            call_command('partition_appointments', '--convert')
+        with connection.cursor() as cursor:
+            self.assertFalse(partitioning.is_partitioned(cursor))
@@ -0,0 +1,58 @@
+# appointments/transitions.py
+"""
+Cambios de estado masivos (por ejemplo, cerrar el día marcando como
+completadas todas las citas confirmadas de un empleado).
+
+Se hacen con un único UPDATE ... FROM ... RETURNING en vez de un save() por
+cita: no hay SELECT previo por fila ni llamadas a Google Calendar dentro de
+la petición. Como no se disparan signals, quien llama debe encolar las
+tareas en background con las filas devueltas.
+"""
+from django.db import connection
+from django.utils import timezone
+
+from .caching import invalidate_month_overview
+from .models import Appointment
+
+# Estado destino -> estados desde los que se permite llegar
+ALLOWED_TRANSITIONS = {
+    'confirmed': ('pending',),
+    'completed': ('pending', 'confirmed'),
+    'cancelled': ('pending', 'confirmed'),
+}
+
+
+def bulk_transition(queryset, new_status, from_statuses=None):
+    """
+    Cambia a `new_status` las citas de `queryset` que estén en alguno de los
+    estados de origen permitidos. Devuelve [(id, estado_anterior)] de las
+    filas efectivamente modificadas.
+
+    La condición a.status = target.status se vuelve a evaluar sobre la fila
+    bloqueada: si otra transacción cambió el estado entretanto, esa cita se
+    omite en vez de pisar el cambio con un estado anterior incorrecto.
+    """
+    allowed = ALLOWED_TRANSITIONS[new_status]
+    statuses = [s for s in (from_statuses or allowed) if s in allowed]
+    if not statuses:
+        return []
+
+    candidates = queryset.filter(status__in=statuses).order_by().values('id', 'status')
+    sql, params = candidates.query.sql_with_params()
+    table = connection.ops.quote_name(Appointment._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} AS a
+            SET status = %s, updated_at = %s
+            FROM ({sql}) AS target
+            WHERE a.id = target.id AND a.status = target.status
+            RETURNING a.id, target.status, a.business_id, a.date
+            """,
+            [new_status, timezone.now(), *params],
+        )
+        rows = cursor.fetchall()
+
+    invalidate_month_overview((business_id, date) for _, _, business_id, date in rows)
+    return [(pk, old_status) for pk, old_status, _, _ in rows]
@@ -1,10 +1,13 @@
 # appointments/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentViewSet, send_reminders, test_email, test_zapier
+from .views import AppointmentSeriesViewSet, AppointmentViewSet, ArchivedAppointmentViewSet, send_reminders, test_email, test_zapier
 from .public_views import public_business_info, public_available_times, public_create_appointment
 
 router = DefaultRouter()
+# Antes de '' para que 'archive' y 'series' no se tomen como id de cita
+router.register(r'archive', ArchivedAppointmentViewSet)
+router.register(r'series', AppointmentSeriesViewSet)
 router.register(r'', AppointmentViewSet)
 
 urlpatterns = [
@@ -1,14 +1,39 @@
 # appointments/views.py
-from rest_framework import viewsets, permissions, status, filters
+from rest_framework import mixins, viewsets, permissions, status, filters
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import datetime, timedelta
-from django.db import models
-from .models import Appointment
-from .serializers import AppointmentSerializer, CalendarAppointmentSerializer
-from authentication.models import User, Business
+from functools import reduce
+import io
+import operator
+import threading
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from . import availability
+from .caching import get_month_overview, invalidate_month_overview, set_month_overview
+from .day_view import MAX_DAYS, build_day_view
+from .exceptions import conflicts_as_409
+from .export import AppointmentExportMixin
+from .importer import AppointmentImporter, parse_file
+from .intervals import find_overlaps
+from .models import Appointment, AppointmentSeries, AppointmentTombstone, ArchivedAppointment
+from .recurrence import build_occurrences, check_occurrences, expand_dates
+from .serializers import (
+    AppointmentSerializer, AppointmentSeriesSerializer, AppointmentValuesSerializer, ArchivedAppointmentSerializer,
+    ArchivedAppointmentValuesSerializer, CalendarAppointmentValuesSerializer,
+)
+from .signals import queue_batch_background_tasks, run_transition_background_tasks
+from .transitions import ALLOWED_TRANSITIONS, bulk_transition
+from authentication.models import User
+from backend.pagination import KeysetPagination
+from backend.query_planner import QueryPlannerMixin, plan_queryset
+from backend.search import TrigramSearchFilter
+from backend.tenancy import TenantMixin
+from backend.versioning import versioned_response
 import os
 
 
@@ -123,36 +148,67 @@ def test_zapier(request):
         return Response({'ok': False, 'error': str(e)}, status=500)
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+def refresh_sync_watermark(response, now):
+    """Watermark del momento para un calendario servido desde la caché de versioned_response"""
+    watermark = now.isoformat()
+    response['X-Sync-Watermark'] = watermark
+    if isinstance(response.data, dict) and 'watermark' in response.data:
+        response.data = {**response.data, 'watermark': watermark}
+
+
+class AppointmentScopeMixin(TenantMixin):
+    """
+    Alcance por usuario para citas y tablas con business/employee (archivo,
+    lápidas): el superusuario ve todo, staff y dueño su negocio, y el resto
+    de los empleados solo sus propias citas.
+    """
+
+    def get_scope(self):
+        """
+        Alcance de las citas visibles para el usuario: 'all' (superusuario),
+        'business' (staff o dueño), 'employee' (solo sus citas) o None.
+        """
+        return self.tenant.scope
+
+    def scope_queryset(self, queryset):
+        tenant = self.tenant
+        scope = tenant.scope
+
+        if scope == 'all':
+            return queryset
+        if scope == 'business':
+            return queryset.filter(business_id=tenant.business_id)
+        if scope == 'employee':
+            return queryset.filter(
+                business_id=tenant.business_id,
+                employee_id=tenant.user_id
+            )
+        return queryset.none()
+
+
+class AppointmentViewSet(AppointmentExportMixin, QueryPlannerMixin, AppointmentScopeMixin, viewsets.ModelViewSet):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    export_serializer_class = AppointmentValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['client', 'service', 'employee', 'date', 'status', 'payment_method']
     search_fields = ['notes', 'client__first_name', 'client__last_name', 'employee__username']
     ordering_fields = ['date', 'start_time', 'created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('date', 'start_time', 'id')
 
-    def get_queryset(self):
-        user = self.request.user
+    # Margen que se resta al watermark del cliente: absorbe transacciones que
+    # fijaron updated_at antes del watermark pero hicieron commit después
+    DELTA_SYNC_OVERLAP = timedelta(seconds=30)
 
-        is_owner = user.business_id and Business.objects.filter(
-            pk=user.business_id, owner=user
-        ).exists()
-
-        if user.is_superuser:
-            queryset = Appointment.objects.all()
-        elif user.is_staff or is_owner:
-            if not user.business_id:
-                return Appointment.objects.none()
-            queryset = Appointment.objects.filter(business_id=user.business_id)
-        elif user.business_id:
-            queryset = Appointment.objects.filter(
-                business_id=user.business_id,
-                employee=user
-            )
-        else:
-            return Appointment.objects.none()
+    def get_scoped_queryset(self):
+        return self.scope_queryset(Appointment.objects.all())
+
+    def get_queryset(self):
+        return self.filter_period(self.get_scoped_queryset())
 
+    def filter_period(self, queryset):
         date_from = self.request.query_params.get('date_from')
         date_to = self.request.query_params.get('date_to')
 
@@ -162,7 +218,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(date__lte=date_to)
 
         period = self.request.query_params.get('period')
-        today = datetime.now().date()
+        today = timezone.localdate()
 
         if period == 'week':
             start_of_week = today - timedelta(days=today.weekday())
@@ -179,11 +235,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        business = self.request.user.business
-        if not business:
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError("Tu usuario no tiene un negocio asignado.")
-        serializer.save(business=business, created_by=self.request.user)
+        serializer.save(business_id=self.require_business(), created_by=self.request.user)
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -212,11 +264,432 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
         return super().partial_update(request, *args, **kwargs)
 
+    # Máximo de ítems por petición a /batch/
+    BATCH_LIMIT = 200
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Crea y actualiza varias citas en una sola petición. Recibe una lista:
+        los ítems con "id" actualizan esa cita (parcialmente), el resto se
+        crean. El lote es todo o nada: si algún ítem no es válido o se solapa
+        no se escribe ninguno y se devuelve el error de cada ítem.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Se espera una lista de citas."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.BATCH_LIMIT:
+            return Response(
+                {"error": f"Un lote admite como máximo {self.BATCH_LIMIT} citas."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        business_id = self.tenant.business_id
+        if not business_id:
+            return Response(
+                {"error": "Tu usuario no tiene un negocio asignado."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        valid, errors = self.validate_batch(items)
+        errors.update(self.find_batch_conflicts(valid))
+        if errors:
+            return Response({'results': [
+                {'index': index, 'status': 'error', 'errors': errors[index]} if index in errors
+                else {'index': index, 'status': 'valid'}
+                for index in range(len(items))
+            ]}, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = self.write_batch(valid, business_id)
+
+        results = [
+            {'index': index, 'status': 'created' if serializer.instance is None else 'updated', 'data': None}
+            for index, serializer in valid
+        ]
+        for result, appointment in zip(results, self.batch_order(valid, created, updated)):
+            result['data'] = AppointmentSerializer(appointment, context=self.get_serializer_context()).data
+        return Response({'results': results})
+
+    def validate_batch(self, items):
+        """Valida cada ítem con AppointmentSerializer, sin la consulta de solapamiento"""
+        ids = {}
+        for index, item in enumerate(items):
+            if isinstance(item, dict) and item.get('id') is not None:
+                try:
+                    ids[index] = int(item['id'])
+                except (TypeError, ValueError):
+                    ids[index] = None
+        # Una consulta para todas las citas a actualizar, dentro del alcance del usuario
+        instances = self.get_scoped_queryset().in_bulk([pk for pk in ids.values() if pk is not None])
+
+        context = {**self.get_serializer_context(), 'skip_overlap_check': True}
+        valid, errors, seen = [], {}, set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = {"non_field_errors": ["Cada ítem debe ser un objeto."]}
+                continue
+            instance = None
+            if index in ids:
+                instance = instances.get(ids[index])
+                if instance is None:
+                    errors[index] = {"id": ["La cita no existe."]}
+                    continue
+                if instance.pk in seen:
+                    errors[index] = {"id": ["La cita aparece más de una vez en el lote."]}
+                    continue
+                seen.add(instance.pk)
+            data = {key: value for key, value in item.items() if key != 'id'}
+            serializer = AppointmentSerializer(instance, data=data, partial=instance is not None, context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer))
+            else:
+                errors[index] = serializer.errors
+        return valid, errors
+
+    def find_batch_conflicts(self, valid):
+        """
+        Solapamientos del lote contra sí mismo y contra las citas guardadas,
+        con una sola consulta para todos los (empleado, fecha) del lote.
+        """
+        intervals = []
+        windows = {}
+        for index, serializer in valid:
+            def current(field):
+                return serializer.validated_data.get(field, getattr(serializer.instance, field, None))
+
+            employee, date = current('employee'), current('date')
+            start_time, end_time = current('start_time'), current('end_time')
+            if not (employee and date and start_time and end_time):
+                continue
+            if (current('status') or 'pending') not in Appointment.ACTIVE_STATUSES:
+                continue
+            key = (employee.pk, date)
+            intervals.append((key, start_time, end_time, index))
+            low, high = windows.get(key, (start_time, end_time))
+            windows[key] = (min(low, start_time), max(high, end_time))
+
+        if windows:
+            # Las citas que se actualizan se comparan con su nueva posición
+            updated_ids = [serializer.instance.pk for _, serializer in valid if serializer.instance]
+            existing = Appointment.objects.active().filter(reduce(operator.or_, [
+                models.Q(employee_id=employee_id, date=date, start_time__lt=high, end_time__gt=low)
+                for (employee_id, date), (low, high) in windows.items()
+            ])).exclude(pk__in=updated_ids).values_list('pk', 'employee_id', 'date', 'start_time', 'end_time')
+            intervals.extend(
+                ((employee_id, date), start_time, end_time, ('db', pk))
+                for pk, employee_id, date, start_time, end_time in existing
+            )
+
+        errors = {}
+        for ref, other in find_overlaps(intervals).items():
+            if isinstance(ref, tuple):
+                continue
+            if isinstance(other, tuple):
+                message = f"Esta cita se solapa con la cita existente {other[1]}"
+            else:
+                message = f"Esta cita se solapa con el ítem {other} del lote"
+            errors[ref] = {"non_field_errors": [message]}
+        return errors
+
+    def write_batch(self, valid, business_id):
+        """
+        Escribe el lote en una transacción con bulk_create/bulk_update. Como
+        no se disparan signals, aquí se hace lo que ellos harían: updated_at,
+        lápidas por reasignación, invalidación del resumen mensual y un único
+        thread de tareas en background al hacer commit.
+        """
+        user = self.request.user
+        now = timezone.now()
+        to_create, to_update = [], []
+        update_fields = {'updated_at'}
+        touched = []
+        tombstones = []
+
+        for _, serializer in valid:
+            data = serializer.validated_data
+            if serializer.instance is None:
+                appointment = Appointment(**{**data, 'business_id': business_id, 'created_by': user})
+                appointment.snapshot_service()
+                to_create.append(appointment)
+            else:
+                appointment = serializer.instance
+                touched.append((appointment.business_id, appointment.date))
+                if 'service' in data and data['service'].pk != appointment.service_id:
+                    appointment.snapshot_service(data['service'])
+                    update_fields.update(('price_at_booking', 'duration_at_booking'))
+                for field, value in data.items():
+                    setattr(appointment, field, value)
+                update_fields.update(data)
+                # Los valores cargados quedan en el tracker: el thread en
+                # background los usa para detectar el cambio de estado
+                if appointment.has_changed('business_id') or appointment.has_changed('employee_id'):
+                    tombstones.append(AppointmentTombstone(
+                        appointment_id=appointment.pk,
+                        business_id=appointment.previous('business_id'),
+                        employee_id=appointment.previous('employee_id'),
+                        reason='moved',
+                    ))
+                appointment.updated_at = now
+                to_update.append(appointment)
+            touched.append((appointment.business_id, appointment.date))
+
+        with conflicts_as_409():
+            # Primero los cambios: liberan los horarios que ocupan las altas
+            if to_update:
+                Appointment.objects.bulk_update(to_update, sorted(update_fields))
+            created = Appointment.objects.bulk_create(to_create)
+            AppointmentTombstone.objects.bulk_create(tombstones)
+            invalidate_month_overview(touched)
+
+        queue_batch_background_tasks(created, to_update)
+        return created, to_update
+
+    @staticmethod
+    def batch_order(valid, created, updated):
+        """Citas escritas en el mismo orden que los ítems válidos"""
+        created, updated = iter(created), iter(updated)
+        return [next(created) if serializer.instance is None else next(updated) for _, serializer in valid]
+
+    @action(detail=False, methods=['post'])
+    def transition(self, request):
+        """
+        Cambio de estado masivo, por ejemplo cerrar el día:
+        {"status": "completed", "date": "2024-05-10", "employee": 3, "from_status": ["confirmed"]}
+        Filtra por "date" y/o "ids" (al menos uno) y opcionalmente por
+        "employee" y "from_status". Se ejecuta en un solo UPDATE y las
+        tareas de Google Calendar/webhooks se encolan en un único job.
+        """
+        new_status = request.data.get('status')
+        if new_status not in ALLOWED_TRANSITIONS:
+            return Response(
+                {"error": f"'status' debe ser uno de: {', '.join(ALLOWED_TRANSITIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        date = request.data.get('date')
+        ids = request.data.get('ids')
+        # Un string (p. ej. form-encoded ids=12) se recorrería por caracteres
+        if ids is not None and not (
+            isinstance(ids, list) and all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)
+        ):
+            return Response(
+                {"error": "'ids' debe ser una lista de enteros"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not date and not ids:
+            return Response(
+                {"error": "Se requiere 'date' o 'ids' para acotar el cambio masivo"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.get_scoped_queryset()
+        try:
+            if date:
+                queryset = queryset.filter(date=datetime.strptime(date, '%Y-%m-%d').date())
+            if ids:
+                queryset = queryset.filter(pk__in=ids)
+            if request.data.get('employee'):
+                queryset = queryset.filter(employee_id=int(request.data['employee']))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Parámetros inválidos: 'date' es YYYY-MM-DD y 'employee' es un entero"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        from_statuses = request.data.get('from_status')
+        if isinstance(from_statuses, str):
+            from_statuses = [from_statuses]
+
+        changes = bulk_transition(queryset, new_status, from_statuses)
+        if changes:
+            thread = threading.Thread(
+                target=run_transition_background_tasks,
+                args=(changes,),
+                daemon=False
+            )
+            transaction.on_commit(thread.start)
+
+        return Response({
+            'status': new_status,
+            'updated': len(changes),
+            'ids': [pk for pk, _ in changes],
+        })
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        """
+        Importación de citas históricas (multipart): 'file' con un .csv o .ics,
+        y opcionales 'format', 'employee' y 'dry_run'. Solo staff o dueño.
+        Carga con COPY sin notificar (ver appointments/importer.py).
+        """
+        business_id = self.require_business()
+        if not self.tenant.is_admin:
+            return Response(
+                {"error": "Solo el dueño o el staff pueden importar citas"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Se requiere el archivo 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'ics'):
+            return Response({"error": "Formato no soportado: csv o ics"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            importer = AppointmentImporter(business_id, request.data.get('employee'))
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            with transaction.atomic():
+                report = importer.run(parse_file(stream, file_format))
+                if dry_run:
+                    transaction.set_rollback(True)
+        except UnicodeDecodeError:
+            return Response(
+                {"error": "El archivo debe estar codificado en UTF-8"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({**report.as_dict(), 'dry_run': dry_run})
+
     @action(detail=False, methods=['get'])
+    @versioned_response('appointments', refresh=refresh_sync_watermark)
     def calendar(self, request):
-        queryset = self.get_queryset()
-        serializer = CalendarAppointmentSerializer(queryset, many=True)
-        return Response(serializer.data)
+        """
+        Sin parámetros devuelve el calendario completo. Con ?updated_since=
+        (el watermark de la respuesta anterior) devuelve solo las citas
+        modificadas y los ids que el cliente debe borrar. El watermark va
+        siempre en el header X-Sync-Watermark.
+        """
+        # Se toma antes de consultar: lo que se escriba durante la consulta
+        # vuelve a entrar en el siguiente delta
+        watermark = timezone.now()
+        updated_since = request.query_params.get('updated_since')
+
+        if updated_since is None:
+            response = Response(self.serialize_calendar(self.get_queryset()))
+            response['X-Sync-Watermark'] = watermark.isoformat()
+            return response
+
+        try:
+            since = parse_datetime(updated_since)
+        except ValueError:
+            since = None
+        if since is None:
+            return Response(
+                {"error": "El parámetro 'updated_since' debe ser una fecha ISO 8601"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        if since < watermark - AppointmentTombstone.RETENTION:
+            # Las lápidas de ese periodo ya pueden estar purgadas
+            data = {
+                'watermark': watermark.isoformat(),
+                'changed': self.serialize_calendar(self.get_queryset()),
+                'deleted': [],
+                'full': True,
+            }
+        else:
+            window = since - self.DELTA_SYNC_OVERLAP
+            touched = self.get_scoped_queryset().filter(updated_at__gte=window)
+            changed = self.filter_period(touched)
+            # Citas modificadas que salieron del rango pedido (cambio de fecha)
+            moved_out = touched.exclude(pk__in=changed.values('pk')).values_list('pk', flat=True)
+            changed = list(CalendarAppointmentValuesSerializer.values(changed, 'id', fields=self.calendar_fields()))
+            changed_ids = {row['id'] for row in changed}
+
+            deleted = set(moved_out)
+            deleted.update(self.get_tombstones(window).values_list('appointment_id', flat=True))
+            data = {
+                'watermark': watermark.isoformat(),
+                'changed': self.serialize_calendar(changed),
+                'deleted': sorted(deleted - changed_ids),
+                'full': False,
+            }
+
+        response = Response(data)
+        response['X-Sync-Watermark'] = data['watermark']
+        return response
+
+    @action(detail=False, methods=['get'])
+    def month_overview(self, request):
+        """
+        Resumen del mes para las insignias del calendario: cantidad de citas y
+        minutos agendados por día × empleado × estado (?month=YYYY-MM, por
+        defecto el mes actual). Se calcula con un solo GROUP BY y se guarda en
+        caché por negocio y mes.
+        """
+        tenant = self.tenant
+        if not tenant.business_id:
+            return Response(
+                {"error": "Tu usuario no tiene un negocio asignado."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        month = request.query_params.get('month')
+        try:
+            first_day = datetime.strptime(month, '%Y-%m').date() if month else timezone.localdate().replace(day=1)
+        except ValueError:
+            return Response(
+                {"error": "El parámetro 'month' debe tener el formato YYYY-MM"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = get_month_overview(tenant.business_id, first_day.year, first_day.month)
+        if rows is None:
+            rows = self.compute_month_overview(tenant.business_id, first_day)
+            set_month_overview(tenant.business_id, first_day.year, first_day.month, rows)
+
+        if tenant.scope == 'employee':
+            rows = [row for row in rows if row['employee'] == tenant.user_id]
+
+        return Response({
+            'month': first_day.strftime('%Y-%m'),
+            'results': rows,
+        })
+
+    @staticmethod
+    def compute_month_overview(business_id, first_day):
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+        duration = models.ExpressionWrapper(
+            models.F('end_time') - models.F('start_time'),
+            output_field=models.DurationField()
+        )
+        # Sin snapshot (filas aún no completadas por backfill_booking_snapshot)
+        # se usa el precio actual del servicio, igual que Appointment.booked_price
+        groups = (
+            Appointment.objects
+            .filter(business_id=business_id, date__gte=first_day, date__lt=next_month)
+            .values('date', 'employee_id', 'status')
+            .annotate(count=models.Count('id'), booked=models.Sum(duration), revenue=models.Sum(Coalesce('price_at_booking', 'service__price')))
+            .order_by('date', 'employee_id', 'status')
+        )
+        return [
+            {
+                'date': group['date'].isoformat(),
+                'employee': group['employee_id'],
+                'status': group['status'],
+                'count': group['count'],
+                'booked_minutes': int(group['booked'].total_seconds() // 60) if group['booked'] else 0,
+                'revenue': float(group['revenue'] or 0),
+            }
+            for group in groups
+        ]
+
+    def calendar_fields(self):
+        return self.get_requested_fields(CalendarAppointmentValuesSerializer.serializer_class)
+
+    def serialize_calendar(self, appointments):
+        # Sin instancias de modelo: el calendario completo puede ser grande
+        return CalendarAppointmentValuesSerializer(appointments, many=True, fields=self.calendar_fields()).data
+
+    def get_tombstones(self, since):
+        return self.scope_queryset(AppointmentTombstone.objects.filter(deleted_at__gte=since))
 
     @action(detail=False, methods=['get'])
     def employee_availability(self, request):
@@ -244,29 +717,167 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            start_datetime = datetime.combine(appointment_date, appointment_start)
-            end_datetime = start_datetime + timedelta(minutes=duration)
-            appointment_end = end_datetime.time()
-
-            busy_employees = Appointment.objects.filter(
-                business=request.user.business,
-                date=appointment_date,
-                status__in=['pending', 'confirmed'],
-            ).filter(
-                models.Q(start_time__lt=appointment_end) &
-                models.Q(end_time__gt=appointment_start)
-            ).values_list('employee_id', flat=True)
-
-            available_employees = User.objects.filter(
-                business=request.user.business
-            ).exclude(id__in=busy_employees)
+            # Libre = ventana del horario menos citas activas (ver availability.py);
+            # sin horario configurado la agenda no lo restringe
+            employees = User.objects.filter(business_id=self.tenant.business_id)
+            start = availability.to_minute(appointment_start)
+            slot = availability.range_mask(start, start + duration)
+            free = availability.build_day(
+                self.tenant.business_id, appointment_date,
+                list(employees.values_list('id', flat=True)), unscheduled=availability.FULL_DAY,
+            )
+            available_employees = employees.filter(
+                id__in=[employee_id for employee_id, mask in free.items() if mask & slot == slot]
+            )
 
             from authentication.serializers import UserSerializer
-            serializer = UserSerializer(available_employees, many=True)
+            serializer = UserSerializer(plan_queryset(available_employees, UserSerializer), many=True)
             return Response(serializer.data)
 
         except ValueError:
             return Response(
                 {"error": "Formato de fecha u hora inválido"},
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+    @action(detail=False, methods=['get'])
+    def day_view(self, request):
+        """
+        Horario, citas y huecos libres por empleado para ?date= o
+        ?date_from=&date_to= (máximo MAX_DAYS días). ?employees=1,2 limita
+        los empleados; un empleado sin permisos de staff solo ve su agenda.
+        """
+        self.require_business()
+        try:
+            date_from = datetime.strptime(
+                request.query_params.get('date_from') or request.query_params['date'], '%Y-%m-%d'
+            ).date()
+            date_to_param = request.query_params.get('date_to') or request.query_params.get('date')
+            date_to = datetime.strptime(date_to_param, '%Y-%m-%d').date() if date_to_param else date_from
+            employee_ids = request.query_params.get('employees')
+            if employee_ids is not None:
+                employee_ids = [int(pk) for pk in employee_ids.split(',') if pk.strip()]
+        except KeyError:
+            return Response(
+                {"error": "Se requiere 'date' o 'date_from'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except ValueError:
+            return Response(
+                {"error": "Formato inválido: fechas YYYY-MM-DD y employees como ids separados por coma"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if date_to < date_from or (date_to - date_from).days >= MAX_DAYS:
+            return Response(
+                {"error": f"El rango debe ir hacia adelante y cubrir como máximo {MAX_DAYS} días"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if self.get_scope() == 'employee':
+            employee_ids = [self.tenant.user_id]
+        return Response({
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'employees': build_day_view(self.tenant.business, date_from, date_to, employee_ids),
+        })
+
+
+class ArchivedAppointmentViewSet(AppointmentExportMixin, QueryPlannerMixin, AppointmentScopeMixin,
+                                 viewsets.ReadOnlyModelViewSet):
+    """
+    Citas archivadas (solo lectura). Mismos filtros, búsqueda y paginación
+    que el listado de citas.
+    """
+    queryset = ArchivedAppointment.objects.all()
+    serializer_class = ArchivedAppointmentSerializer
+    export_serializer_class = ArchivedAppointmentValuesSerializer
+    export_filename = 'citas-archivadas'
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
+    filterset_fields = ['client', 'service', 'employee', 'date', 'status', 'payment_method']
+    search_fields = ['notes', 'client__first_name', 'client__last_name', 'employee__username']
+    ordering_fields = ['date', 'start_time', 'created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('date', 'start_time', 'id')
+
+    def get_queryset(self):
+        queryset = self.scope_queryset(ArchivedAppointment.objects.all())
+
+        date_from = self.request.query_params.get('date_from')
+        date_to = self.request.query_params.get('date_to')
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset
+
+
+class AppointmentSeriesViewSet(QueryPlannerMixin,
+                               AppointmentScopeMixin,
+                               mixins.CreateModelMixin,
+                               mixins.ListModelMixin,
+                               mixins.RetrieveModelMixin,
+                               viewsets.GenericViewSet):
+    """
+    Series de citas recurrentes. Al crear una serie se expanden sus
+    ocurrencias, se validan todas de una vez contra las citas existentes y el
+    horario del empleado, y se insertan con un solo bulk_create.
+    """
+    queryset = AppointmentSeries.objects.all()
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['client', 'service', 'employee']
+
+    def get_queryset(self):
+        return self.scope_queryset(AppointmentSeries.objects.all())
+
+    def create(self, request, *args, **kwargs):
+        """
+        Responde con el detalle de cada ocurrencia (fecha, estado y error).
+        Si alguna choca no se crea nada, salvo con "skip_conflicts": true,
+        que crea solo las libres. Con "dry_run": true solo se informa.
+        """
+        business_id = self.tenant.business_id
+        if not business_id:
+            return Response(
+                {"error": "Tu usuario no tiene un negocio asignado."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        skip_conflicts = data.pop('skip_conflicts')
+        dry_run = data.pop('dry_run')
+
+        series = AppointmentSeries(**data, business_id=business_id, created_by=request.user)
+        dates = expand_dates(series)
+        problems = check_occurrences(series, dates)
+        free = [day for day in dates if day not in problems]
+
+        if dry_run or (problems and not skip_conflicts) or not free:
+            occurrences = [
+                {'date': day, 'status': 'conflict', 'error': problems[day]} if day in problems
+                else {'date': day, 'status': 'available'}
+                for day in dates
+            ]
+            response_status = status.HTTP_200_OK if dry_run else status.HTTP_400_BAD_REQUEST
+            return Response({'rrule': series.to_rrule(), 'occurrences': occurrences}, status=response_status)
+
+        with transaction.atomic(), conflicts_as_409():
+            series.save()
+            created = Appointment.objects.bulk_create(build_occurrences(series, free))
+            invalidate_month_overview((business_id, day) for day in free)
+        queue_batch_background_tasks(created)
+
+        by_date = {appointment.date: appointment.id for appointment in created}
+        occurrences = [
+            {'date': day, 'status': 'skipped', 'error': problems[day]} if day in problems
+            else {'date': day, 'status': 'created', 'id': by_date[day]}
+            for day in dates
+        ]
+        return Response(
+            {**self.get_serializer(series).data, 'occurrences': occurrences},
+            status=status.HTTP_201_CREATED
+        )
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Business.slug, Business.logo_url y WorkSchedule existían en los modelos pero
+# nunca tuvieron migración: en producción se crearon con `migrate --run-syncdb`.
+# User.commission_rate quedó igual (0006 solo registra el estado).
+# Esta migración registra el estado y crea las columnas/tabla solo si faltan,
+# así funciona tanto en bases existentes como en una base nueva (tests).
+DATABASE_SQL = """
+ALTER TABLE authentication_user ADD COLUMN IF NOT EXISTS commission_rate numeric(5, 2) NOT NULL DEFAULT 50.00;
+ALTER TABLE authentication_business ADD COLUMN IF NOT EXISTS logo_url varchar(500) NULL;
+ALTER TABLE authentication_business ADD COLUMN IF NOT EXISTS slug varchar(200) NULL UNIQUE;
+CREATE INDEX IF NOT EXISTS authentication_business_slug_0facc945_like
+    ON authentication_business (slug varchar_pattern_ops);
+CREATE TABLE IF NOT EXISTS authentication_workschedule (
+    id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    day_of_week integer NOT NULL,
+    start_time time NOT NULL,
+    end_time time NOT NULL,
+    is_active boolean NOT NULL,
+    employee_id bigint NOT NULL
+        CONSTRAINT authentication_works_employee_id_48771bbc_fk_authentic
+        REFERENCES authentication_user (id) DEFERRABLE INITIALLY DEFERRED,
+    CONSTRAINT authentication_worksched_employee_id_day_of_week_ca00ae5d_uniq
+        UNIQUE (employee_id, day_of_week)
+);
+CREATE INDEX IF NOT EXISTS authentication_workschedule_employee_id_48771bbc
+    ON authentication_workschedule (employee_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_user_profile_image_url'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(DATABASE_SQL, reverse_sql=migrations.RunSQL.noop),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='business',
+                    name='logo_url',
+                    field=models.URLField(blank=True, max_length=500, null=True, verbose_name='URL del logo'),
+                ),
+                migrations.AddField(
+                    model_name='business',
+                    name='slug',
+                    field=models.SlugField(blank=True, max_length=200, null=True, unique=True),
+                ),
+                migrations.CreateModel(
+                    name='WorkSchedule',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('day_of_week', models.IntegerField(choices=[(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo')], verbose_name='Día de la semana')),
+                        ('start_time', models.TimeField(verbose_name='Hora de entrada')),
+                        ('end_time', models.TimeField(verbose_name='Hora de salida')),
+                        ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                        ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_schedules', to=settings.AUTH_USER_MODEL, verbose_name='Empleado')),
+                    ],
+                    options={
+                        'verbose_name': 'Horario de trabajo',
+                        'verbose_name_plural': 'Horarios de trabajo',
+                        'unique_together': {('employee', 'day_of_week')},
+                    },
+                ),
+            ],
+        ),
+    ]
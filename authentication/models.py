@@ -5,6 +5,8 @@ from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
 
+from backend.tracking import FieldTrackerMixin
+
 
 def default_working_days():
     return [0, 1, 2, 3, 4, 5, 6]
@@ -62,13 +64,16 @@ class Business(models.Model):
         return self.name
 
 
-class User(AbstractUser):
+class User(FieldTrackerMixin, AbstractUser):
     """
     Usuario del sistema. Puede ser administrador (is_staff=True) o empleado.
     El campo 'business' indica a qué negocio pertenece este usuario.
     Un administrador pertenece a su propio negocio.
     Un empleado pertenece al negocio del admin que lo creó.
     """
+    # El cambio de email vuelve a compartir el calendario (ver signals)
+    tracked_fields = ('email', 'first_name', 'last_name')
+
     email = models.EmailField(_('email address'), unique=True)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     profile_image = models.URLField(max_length=500, blank=True, null=True, verbose_name="Foto de perfil")
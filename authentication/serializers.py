@@ -25,6 +25,9 @@ class UserSerializer(serializers.ModelSerializer):
     groups = serializers.SerializerMethodField()
     password = serializers.CharField(write_only=True, required=False)
 
+    # Ver backend/query_planner.py
+    query_hints = {'groups': {'prefetch': ['groups']}}
+
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'profile_image', 'is_staff', 'is_superuser', 'is_active', 'groups', 'business', 'commission_rate', 'password')
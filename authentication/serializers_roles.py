@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 
 class ContentTypeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,13 +20,18 @@ class PermissionSerializer(serializers.ModelSerializer):
 class GroupSerializer(serializers.ModelSerializer):
     permissions = PermissionSerializer(many=True, read_only=True)
     user_count = serializers.SerializerMethodField()
+
+    # Ver backend/query_planner.py
+    query_hints = {'user_count': {'annotate': {'user_total': Count('user', distinct=True)}}}
     
     class Meta:
         model = Group
         fields = ['id', 'name', 'permissions', 'user_count']
         
     def get_user_count(self, obj):
-        # This safely gets the count of users for this group
+        # Anotado por el planificador; si no, se cuenta aparte
+        if hasattr(obj, 'user_total'):
+            return obj.user_total
         return obj.user_set.count() if hasattr(obj, 'user_set') else 0
     
 def get_user_count(self, obj):
@@ -1,8 +1,13 @@
 import threading
 import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+
+from backend.tenancy import invalidate_business
+from backend.versioning import bump_generation
+from .models import Business
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,51 @@ def handle_user_created(sender, instance, created, **kwargs):  # noqa: ARG001
         logger.error(f"❌ Error en signal handle_user_created (user {instance.id}): {e}")
 
 
+@receiver(post_save, sender=User)
+def handle_user_email_changed(sender, instance, created, **kwargs):  # noqa: ARG001
+    """Si cambió el email de un empleado, volver a compartir su calendario con el nuevo."""
+    if created or instance.is_superuser or not instance.has_changed('email'):
+        return
+    try:
+        _run_in_thread(_reshare_calendar_on_email_change, instance.id, instance.previous('email'), instance.email)
+    except Exception as e:
+        logger.error(f"❌ Error en signal handle_user_email_changed (user {instance.id}): {e}")
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def invalidate_business_context(sender, instance, **kwargs):  # noqa: ARG001
+    """El contexto de tenant guarda el negocio en caché (ver backend/tenancy.py)."""
+    invalidate_business(instance.pk)
+    bump_generation(instance.pk, 'business')
+
+
+@receiver(post_save, sender=User)
+def bump_employee_name_generation(sender, instance, created, **kwargs):  # noqa: ARG001
+    """El nombre del empleado sale en el calendario (ver backend/versioning.py)."""
+    if not created and (instance.has_changed('first_name') or instance.has_changed('last_name')):
+        bump_generation(instance.business_id, 'appointments')
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def bump_employee_roles_generation(sender, instance, action, **kwargs):  # noqa: ARG001
+    """Los roles del empleado filtran las categorías de servicio que puede atender."""
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, User):
+        bump_generation(instance.business_id, 'services')
+    else:
+        # Cambio desde el lado del rol: puede tocar usuarios de cualquier negocio
+        bump_role_generation(sender, instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_role_generation(sender, instance, **kwargs):  # noqa: ARG001
+    """Los roles son globales y su nombre sale en las categorías de todos los negocios."""
+    bump_generation(list(Business.objects.values_list('id', flat=True)), 'services')
+
+
 def _run_in_thread(fn, *args):
     thread = threading.Thread(target=fn, args=args, daemon=False)
     thread.start()
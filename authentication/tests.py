@@ -1,3 +1,72 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import Business, User
+
+
+class EmailChangeSignalTests(TestCase):
+    """El calendario se vuelve a compartir solo cuando cambia el email."""
+
+    def setUp(self):
+        # bulk_create no dispara la creación del calendario de Google
+        User.objects.bulk_create([User(username='ana', email='ana@example.com')])
+        self.user = User.objects.get(username='ana')
+
+    @mock.patch('authentication.signals._run_in_thread')
+    def test_reshare_on_email_change(self, run_in_thread):
+        self.user.first_name = 'Ana'
+        self.user.save()
+        run_in_thread.assert_not_called()
+
+        self.user.email = 'ana.nueva@example.com'
+        self.user.save()
+        run_in_thread.assert_called_once_with(
+            mock.ANY, self.user.id, 'ana@example.com', 'ana.nueva@example.com'
+        )
+
+
+class TenantContextTests(TestCase):
+    """El negocio del usuario se resuelve como mucho una vez por petición."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([User(username='duena', email='duena@example.com')])
+        owner = User.objects.get(username='duena')
+        cls.business = Business.objects.create(name='Estética Sol', owner=owner)
+        User.objects.filter(pk=owner.pk).update(business=cls.business)
+        cls.owner = User.objects.get(pk=owner.pk)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def business_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return len([q for q in queries if 'FROM "authentication_business"' in q['sql']])
+
+    @override_settings(SHARED_CACHE=True)
+    def test_one_lookup_per_request_then_cached(self):
+        self.assertEqual(self.business_queries('/api/appointments/'), 1)
+        for path in ('/api/appointments/', '/api/clients/', '/api/services/', '/api/auth/businesses/me/'):
+            self.assertEqual(self.business_queries(path), 0, path)
+
+    def test_without_shared_cache_business_is_read_every_request(self):
+        # Con LocMemCache otro worker no vería la invalidación: no se guarda
+        for path in ('/api/appointments/', '/api/auth/businesses/me/', '/api/auth/businesses/me/'):
+            self.assertEqual(self.business_queries(path), 1, path)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_business_changes_invalidate_context(self):
+        self.assertEqual(self.client.get('/api/auth/businesses/me/', HTTP_HOST='localhost').data['name'], 'Estética Sol')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.business.name = 'Estética Luna'
+            self.business.save()
+        self.assertEqual(self.client.get('/api/auth/businesses/me/', HTTP_HOST='localhost').data['name'], 'Estética Luna')
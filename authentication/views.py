@@ -11,6 +11,9 @@ from django.contrib.auth import get_user_model
 from .serializers import UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer, AdminUserSerializer, WorkScheduleSerializer
 from rest_framework.generics import ListAPIView
 from .models import WorkSchedule
+from backend.pagination import KeysetPagination
+from backend.query_planner import QueryPlannerMixin
+from backend.tenancy import TenantMixin
 
 
 User = get_user_model()
@@ -26,7 +29,7 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(QueryPlannerMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
@@ -62,7 +65,7 @@ class ProfileImageUploadView(APIView):
             return Response({'error': f'Error al subir imagen: {str(e)}'}, status=500)
 
 
-class UserProfileImageUploadView(APIView):
+class UserProfileImageUploadView(TenantMixin, APIView):
     """Admin sube la foto de cualquier usuario de su negocio."""
     permission_classes = [IsAdminUser]
     _ALLOWED = {'image/jpeg', 'image/png', 'image/webp', 'image/gif'}
@@ -70,11 +73,10 @@ class UserProfileImageUploadView(APIView):
 
     def post(self, request, pk):
         try:
-            admin = request.user
-            if admin.is_superuser:
+            if self.tenant.is_superuser:
                 target = User.objects.get(pk=pk)
             else:
-                target = User.objects.get(pk=pk, business=admin.business)
+                target = User.objects.get(pk=pk, business_id=self.tenant.business_id)
         except User.DoesNotExist:
             return Response({'error': 'Usuario no encontrado.'}, status=404)
 
@@ -100,45 +102,42 @@ class UserProfileImageUploadView(APIView):
             return Response({'error': f'Error al subir imagen: {str(e)}'}, status=500)
 
 
-class UserListCreateView(generics.ListCreateAPIView):
+class UserListCreateView(QueryPlannerMixin, TenantMixin, generics.ListCreateAPIView):
     serializer_class = AdminUserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date_joined', 'id')
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
+        tenant = self.tenant
+        if tenant.is_superuser:
             return User.objects.all()
-        if not user.business:
+        if not tenant.business_id:
             return User.objects.none()
-        return User.objects.filter(business=user.business)
+        return User.objects.filter(business_id=tenant.business_id)
 
     def perform_create(self, serializer):
-        user = self.request.user
-        if user.is_superuser:
+        if self.tenant.is_superuser:
             serializer.save()
         else:
-            business = user.business
-            if not business:
-                raise ValidationError("Tu usuario no tiene un negocio asignado.")
             data = {'is_staff': False, 'is_superuser': False}
-            serializer.save(business=business, **data)
+            serializer.save(business_id=self.require_business(), **data)
 
 
-class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class UserRetrieveUpdateDestroyView(QueryPlannerMixin, TenantMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = AdminUserSerializer
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
+        tenant = self.tenant
+        if tenant.is_superuser:
             return User.objects.all()
-        if not user.business:
+        if not tenant.business_id:
             return User.objects.none()
-        return User.objects.filter(business=user.business)
+        return User.objects.filter(business_id=tenant.business_id)
 
     def perform_update(self, serializer):
-        old_email = serializer.instance.email
-
+        # El cambio de email lo detecta handle_user_email_changed (post_save)
         if not self.request.user.is_superuser:
             extra = {'is_superuser': False}
             if not serializer.instance.is_staff:
@@ -149,14 +148,6 @@ class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         else:
             serializer.save()
 
-        new_email = serializer.instance.email
-        if old_email != new_email and not serializer.instance.is_superuser:
-            try:
-                from authentication.signals import _reshare_calendar_on_email_change, _run_in_thread
-                _run_in_thread(_reshare_calendar_on_email_change, serializer.instance.id, old_email, new_email)
-            except Exception:
-                pass
-
     def perform_destroy(self, instance):
         # Soft-delete: desactiva el usuario en vez de eliminarlo.
         # Preserva todas las citas, ventas y registros históricos asociados.
@@ -164,7 +155,7 @@ class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         instance.save(update_fields=['is_active'])
 
 
-class WorkScheduleView(ListAPIView):
+class WorkScheduleView(QueryPlannerMixin, ListAPIView):
     serializer_class = WorkScheduleSerializer
 
     def get_queryset(self):
@@ -175,22 +166,22 @@ class WorkScheduleView(ListAPIView):
         return qs
 
 
-class WorkScheduleViewSet(viewsets.ModelViewSet):
+class WorkScheduleViewSet(QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     serializer_class = WorkScheduleSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
+        tenant = self.tenant
         employee_id = self.request.query_params.get('employee')
 
-        if user.is_superuser:
+        if tenant.is_superuser:
             qs = WorkSchedule.objects.all()
-        elif user.is_staff:
-            if not user.business:
+        elif tenant.is_staff:
+            if not tenant.business_id:
                 return WorkSchedule.objects.none()
-            qs = WorkSchedule.objects.filter(employee__business=user.business)
+            qs = WorkSchedule.objects.filter(employee__business_id=tenant.business_id)
         else:
-            qs = WorkSchedule.objects.filter(employee=user)
+            qs = WorkSchedule.objects.filter(employee_id=tenant.user_id)
 
         if employee_id:
             qs = qs.filter(employee_id=employee_id)
@@ -198,18 +189,18 @@ class WorkScheduleViewSet(viewsets.ModelViewSet):
         return qs.order_by('employee', 'day_of_week')
 
     def perform_create(self, serializer):
-        user = self.request.user
+        tenant = self.tenant
         employee = serializer.validated_data.get('employee')
-        if not user.is_superuser and user.is_staff:
-            if not user.business or employee.business != user.business:
+        if not tenant.is_superuser and tenant.is_staff:
+            if not tenant.business_id or employee.business_id != tenant.business_id:
                 raise ValidationError("No tienes permiso para asignar horarios a este empleado.")
         serializer.save()
 
     def perform_update(self, serializer):
-        user = self.request.user
+        tenant = self.tenant
         employee = serializer.instance.employee
-        if not user.is_superuser and user.is_staff:
-            if not user.business or employee.business != user.business:
+        if not tenant.is_superuser and tenant.is_staff:
+            if not tenant.business_id or employee.business_id != tenant.business_id:
                 raise ValidationError("No tienes permiso para modificar horarios de este empleado.")
         serializer.save()
 
@@ -4,6 +4,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import serializers, status
 from django.utils.text import slugify
 from .models import Business
+from backend.tenancy import TenantMixin
+from backend.versioning import versioned_response
 import json
 
 ALLOWED_IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/gif'}
@@ -49,7 +51,7 @@ class BusinessListView(APIView):
             return Response({'error': str(e)}, status=500)
 
 
-class BusinessDetailView(APIView):
+class BusinessDetailView(TenantMixin, APIView):
     """GET y PATCH del negocio propio (admin) o cualquiera (superadmin)."""
     permission_classes = [IsAuthenticated]
 
@@ -61,11 +63,18 @@ class BusinessDetailView(APIView):
             except Business.DoesNotExist:
                 return None
         # Admin: solo su propio negocio
-        if user.business:
-            return user.business
+        if self.tenant.business_id:
+            return Business.objects.get(pk=self.tenant.business_id)
         return None
 
+    @versioned_response('business')
     def get(self, request, pk=None):
+        if not request.user.is_superuser:
+            # El negocio propio ya viene en el contexto del tenant
+            business = self.tenant.business
+            if not business:
+                return Response({'error': 'Negocio no encontrado'}, status=404)
+            return Response({field: business[field] for field in BusinessSerializer.Meta.fields})
         business = self._get_business(request, pk)
         if not business:
             return Response({'error': 'Negocio no encontrado'}, status=404)
@@ -3,6 +3,7 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth.models import Group, Permission
 from .serializers_roles import GroupSerializer, PermissionSerializer
+from backend.query_planner import QueryPlannerMixin
 
 
 class IsSuperAdmin(permissions.BasePermission):
@@ -18,31 +19,31 @@ class IsSuperAdmin(permissions.BasePermission):
         return request.user and request.user.is_superuser
 
 
-class GroupListCreateView(generics.ListCreateAPIView):
+class GroupListCreateView(QueryPlannerMixin, generics.ListCreateAPIView):
     """
     GET  → cualquier usuario autenticado puede ver los roles
     POST → solo el superadmin puede crear roles
     """
-    queryset = Group.objects.prefetch_related('permissions').all()
+    queryset = Group.objects.all()
     serializer_class = GroupSerializer
     permission_classes = [IsSuperAdmin]
 
 
-class GroupRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class GroupRetrieveUpdateDestroyView(QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET    → cualquier usuario autenticado puede ver un rol
     PUT/PATCH/DELETE → solo el superadmin puede modificar/eliminar roles
     """
-    queryset = Group.objects.prefetch_related('permissions').all()
+    queryset = Group.objects.all()
     serializer_class = GroupSerializer
     permission_classes = [IsSuperAdmin]
 
 
-class PermissionListView(generics.ListAPIView):
+class PermissionListView(QueryPlannerMixin, generics.ListAPIView):
     """
     Solo el superadmin puede ver los permisos disponibles
     """
-    queryset = Permission.objects.select_related('content_type').all()
+    queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
     permission_classes = [permissions.IsAdminUser]
 
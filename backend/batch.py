@@ -0,0 +1,131 @@
+# backend/batch.py
+"""
+Endpoint /api/batch/: varias lecturas en una sola petición.
+
+    POST /api/batch/
+    {"requests": [
+        {"id": "services", "path": "/api/services/?is_active=true"},
+        {"id": "me", "path": "/api/auth/businesses/me/", "headers": {"If-None-Match": "\\"...\\""}}
+    ]}
+
+Cada sub-petición es un GET que se resuelve con las mismas rutas de la API
+y se ejecuta dentro del proceso, sin pasar otra vez por los middlewares ni
+por la autenticación JWT: reutiliza el usuario, el token y el contexto de
+tenant de la petición batch. La respuesta conserva el orden:
+
+    {"responses": [{"id": "services", "status": 200, "body": [...], "etag": null}, ...]}
+
+Las escrituras tienen sus propios endpoints masivos (p. ej. citas/batch).
+"""
+import json
+import logging
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.encoding import iri_to_uri
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from backend.tenancy import get_tenant
+
+logger = logging.getLogger(__name__)
+
+MAX_SUBREQUESTS = 20
+API_PREFIX = '/api/'
+# Headers que una sub-petición puede fijar (el resto se hereda de la petición batch)
+FORWARDED_HEADERS = ('If-None-Match', 'Accept-Language')
+
+
+class BatchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        subrequests = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(subrequests, list) or not subrequests:
+            return Response(
+                {"error": "Se requiere una lista 'requests' con las sub-peticiones"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(subrequests) > MAX_SUBREQUESTS:
+            return Response(
+                {"error": f"Máximo {MAX_SUBREQUESTS} sub-peticiones por batch"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors = {}
+        for position, item in enumerate(subrequests):
+            error = self.validate_subrequest(item)
+            if error:
+                errors[position] = error
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Se resuelve una vez y lo heredan todas las sub-peticiones
+        tenant = get_tenant(request)
+        return Response({'responses': [self.dispatch_subrequest(request, tenant, item) for item in subrequests]})
+
+    @staticmethod
+    def validate_subrequest(item):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return "Cada sub-petición debe tener un 'path'"
+        if item.get('method', 'GET').upper() != 'GET':
+            return "Solo se admiten sub-peticiones GET"
+        if not item['path'].startswith(API_PREFIX) or item['path'].split('?', 1)[0].rstrip('/') == '/api/batch':
+            return f"El path debe empezar con {API_PREFIX} y no puede ser el propio batch"
+        if not isinstance(item.get('headers', {}), dict):
+            return "'headers' debe ser un objeto"
+        return None
+
+    def dispatch_subrequest(self, request, tenant, item):
+        path, _, query_string = item['path'].partition('?')
+        result = {'id': item.get('id'), 'status': None, 'body': None, 'etag': None}
+        try:
+            match = resolve(path)
+        except Resolver404:
+            result.update(status=status.HTTP_404_NOT_FOUND, body={"error": "Ruta no encontrada"})
+            return result
+
+        subrequest = self.build_subrequest(request, tenant, path, query_string, item.get('headers', {}))
+        try:
+            response = match.func(subrequest, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception(f"❌ Error en sub-petición batch {item['path']}")
+            result.update(status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={"error": "Error interno del servidor"})
+            return result
+
+        result['status'] = response.status_code
+        result['etag'] = response.get('ETag')
+        if hasattr(response, 'data'):
+            result['body'] = response.data
+        elif response.get('Content-Type', '').startswith('application/json'):
+            result['body'] = json.loads(response.content or 'null')
+        return result
+
+    @staticmethod
+    def build_subrequest(request, tenant, path, query_string, headers):
+        http_request = request._request
+        subrequest = HttpRequest()
+        subrequest.method = 'GET'
+        subrequest.path = subrequest.path_info = path
+        subrequest.META = {
+            **http_request.META,
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': iri_to_uri(query_string),
+            'CONTENT_LENGTH': '',
+            'HTTP_ACCEPT': 'application/json',
+        }
+        subrequest.META.pop('HTTP_IF_NONE_MATCH', None)
+        for name in FORWARDED_HEADERS:
+            if name in headers:
+                subrequest.META['HTTP_' + name.upper().replace('-', '_')] = str(headers[name])
+        subrequest.GET = QueryDict(query_string)
+        subrequest.COOKIES = http_request.COOKIES
+        subrequest.user = request.user
+        # DRF usa estos atributos en lugar de volver a autenticar
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+        # Contexto de tenant ya resuelto (ver backend/tenancy.py)
+        subrequest._tenant = tenant
+        return subrequest
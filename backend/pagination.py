@@ -0,0 +1,162 @@
+# backend/pagination.py
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por keyset (cursor) opcional para los endpoints de listado.
+
+    Solo se activa si el cliente envía ?cursor= o ?page_size=; sin esos
+    parámetros la vista sigue respondiendo la lista completa, así el
+    front-end actual no se rompe.
+
+    El orden sale de `keyset_ordering` en la vista (por ejemplo
+    ('date', 'start_time', 'id') o ('-created_at', 'id')). El último campo
+    debe ser único y ninguno puede ser nulo. En lugar de OFFSET se filtra
+    "después de la última fila vista", por lo que el costo de una página no
+    depende de su profundidad y las inserciones concurrentes no desplazan
+    ni duplican filas entre páginas.
+
+    Al paginar, el orden es siempre keyset_ordering: se ignoran ?ordering=
+    y el orden por similitud de ?search= (TrigramSearchFilter ni siquiera
+    lo calcula). Una búsqueda paginada devuelve las coincidencias en el
+    orden de la vista.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+    default_ordering = ('id',)
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.default_ordering))
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(position))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Una fila extra indica si existe página siguiente sin hacer COUNT(*)
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('next_cursor', self.encode_cursor(self.next_position) if self.has_next else None),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_previous_link(self):
+        # El keyset solo avanza; para volver el cliente conserva sus cursores
+        return None
+
+    def get_keyset_filter(self, position):
+        """
+        Construye (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... respetando la
+        dirección de cada campo. Se antepone f1 >= v1 para que PostgreSQL
+        pueda usar el índice como rango y no recorrer la tabla.
+        """
+        fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        condition = Q()
+        equal_prefix = Q()
+        for (field, descending), value in zip(fields, position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+            equal_prefix &= Q(**{field: value})
+
+        first_field, first_descending = fields[0]
+        first_lookup = 'lte' if first_descending else 'gte'
+        return Q(**{f'{first_field}__{first_lookup}': position[0]}) & condition
+
+    def get_position(self, instance):
+        position = []
+        for name in self.ordering:
+            if isinstance(instance, dict):
+                # Filas de .values() (ver backend/values_serializer.py)
+                position.append(instance[name.lstrip('-')])
+                continue
+            value = instance
+            for attr in name.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position):
+        values = [self._encode_value(value) for value in position]
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def _encode_value(value):
+        # isoformat completo: DjangoJSONEncoder trunca microsegundos y eso
+        # haría saltarse filas con created_at casi iguales
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
@@ -0,0 +1,205 @@
+# backend/query_planner.py
+"""
+Planificador de select_related/prefetch_related/annotate a partir de los
+campos de un serializer.
+
+Recorre los `source=` de cada campo sobre el modelo: las FK y OneToOne se
+resuelven con select_related, las relaciones a muchos (m2m, inversas y
+serializers anidados con many=True) con prefetch_related. Lo que no se puede
+inferir (SerializerMethodField, propiedades del modelo) se declara en el
+serializer con `query_hints`, por nombre de campo:
+
+    query_hints = {
+        'groups': {'prefetch': ['groups']},
+        'product_count': {'annotate': {'active_products': Count(...)}},
+    }
+
+El plan queda indexado por campo para poder armarlo solo con los campos
+pedidos. Las pistas de serializers anidados no se aplican (las anotaciones
+no se pueden prefijar).
+
+Fieldsets dispersos: en lecturas, ?fields=id,name deja solo esos campos y
+?omit=groups quita los indicados. Los campos fuera del fieldset tampoco
+entran al plan, así que no generan JOINs, prefetch ni anotaciones.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+# Acciones que no serializan filas de la consulta
+UNPLANNED_ACTIONS = ('destroy',)
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _walk(model, attrs):
+    """
+    Sigue `attrs` sobre el modelo. Devuelve (ruta_select, ruta_prefetch,
+    modelo_final): la parte a uno de la ruta, la ruta hasta la primera
+    relación a muchos (o None) y el modelo al que llega.
+    """
+    path = []
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        path.append(attr)
+        if field.many_to_many or field.one_to_many:
+            return path[:-1], path, field.related_model
+        model = field.related_model
+    return path, None, model
+
+
+def _join(*parts):
+    return LOOKUP_SEP.join(part for part in parts if part)
+
+
+def _plan_field(model, field, prefix=''):
+    """(select_related, prefetch_related) que necesita un campo"""
+    selects, prefetches = set(), set()
+    if field.source == '*':
+        return selects, prefetches
+
+    attrs = field.source_attrs
+    nested = field.child if isinstance(field, serializers.ListSerializer) else field
+    is_many = isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField))
+
+    if isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization() and len(attrs) == 1:
+        # PrimaryKeyRelatedField lee la columna <fk>_id, sin JOIN
+        return selects, prefetches
+
+    select_path, prefetch_path, target = _walk(model, attrs)
+    if prefetch_path is not None:
+        prefetches.add(_join(prefix, *prefetch_path))
+    elif select_path and (
+        len(select_path) < len(attrs)
+        or isinstance(nested, (serializers.BaseSerializer, serializers.RelatedField))
+    ):
+        # Solo hace falta el JOIN si se lee algo más allá de la FK
+        (prefetches if is_many else selects).add(_join(prefix, *select_path))
+
+    if isinstance(nested, serializers.BaseSerializer) and hasattr(nested, 'fields'):
+        # Serializer anidado: sus relaciones cuelgan de la ruta del campo
+        nested_prefix = _join(prefix, *attrs)
+        nested_to_many = is_many or prefetch_path is not None
+        for child in nested.fields.values():
+            if child.write_only:
+                continue
+            child_selects, child_prefetches = _plan_field(target, child, nested_prefix)
+            (prefetches if nested_to_many else selects).update(child_selects)
+            prefetches.update(child_prefetches)
+    return selects, prefetches
+
+
+@lru_cache(maxsize=None)
+def get_field_plans(serializer_class):
+    """{campo: (select_related, prefetch_related, annotate)} de un serializer"""
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    if model is None:
+        return {}
+    serializer = serializer_class()
+    hints = getattr(serializer_class, 'query_hints', {})
+    plans = {}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        selects, prefetches = _plan_field(model, field)
+        hint = hints.get(name, {})
+        selects.update(hint.get('select', ()))
+        prefetches.update(hint.get('prefetch', ()))
+        plans[name] = (frozenset(selects), frozenset(prefetches), dict(hint.get('annotate', {})))
+    return plans
+
+
+def plan_queryset(queryset, serializer_class, fields=None):
+    """
+    Aplica al queryset las relaciones y anotaciones de `serializer_class`
+    (solo las de `fields` si se indica). No repite anotaciones que la vista
+    ya haya agregado con el mismo nombre.
+    """
+    selects, prefetches, annotations = set(), set(), {}
+    for name, (field_selects, field_prefetches, field_annotations) in get_field_plans(serializer_class).items():
+        if fields is not None and name not in fields:
+            continue
+        selects |= field_selects
+        prefetches |= field_prefetches
+        annotations.update(field_annotations)
+
+    # Una ruta select que ya es prefijo de otra es redundante
+    selects = {path for path in selects if not any(other.startswith(path + LOOKUP_SEP) for other in selects)}
+    annotations = {
+        alias: expression for alias, expression in annotations.items()
+        if alias not in queryset.query.annotations
+    }
+    if selects:
+        queryset = queryset.select_related(*sorted(selects))
+    if prefetches:
+        queryset = queryset.prefetch_related(*sorted(prefetches))
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, serializer_class):
+    """
+    Campos legibles pedidos con ?fields= / ?omit=, en el orden del
+    serializer; None si la petición no restringe nada (o no es lectura).
+    """
+    params = request.query_params
+    if request.method not in SAFE_METHODS or not (params.get(FIELDS_PARAM) or params.get(OMIT_PARAM)):
+        return None
+    available = list(get_field_plans(serializer_class))
+    wanted = _split(params.get(FIELDS_PARAM, '')) or available
+    omitted = _split(params.get(OMIT_PARAM, ''))
+
+    unknown = [name for name in wanted + omitted if name not in available]
+    if unknown:
+        raise ValidationError({'fields': f"Campos desconocidos: {', '.join(unknown)}"})
+    selected = [name for name in available if name in wanted and name not in omitted]
+    if not selected:
+        raise ValidationError({'fields': "El fieldset no deja ningún campo"})
+    return selected
+
+
+def prune_fields(serializer, fields):
+    """Quita de un serializer (o del hijo de uno con many=True) los campos fuera de `fields`"""
+    if fields is None:
+        return serializer
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    for name in list(target.fields):
+        if name not in fields:
+            target.fields.pop(name)
+    return serializer
+
+
+class QueryPlannerMixin:
+    """
+    Para vistas genéricas y viewsets: planifica el queryset según el
+    serializer de la acción y aplica el fieldset pedido. Se engancha en
+    filter_queryset (por donde pasan list y get_object), así las vistas
+    pueden seguir redefiniendo get_queryset.
+    """
+
+    def get_requested_fields(self, serializer_class=None):
+        return requested_fields(self.request, serializer_class or self.get_serializer_class())
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) in UNPLANNED_ACTIONS or not hasattr(queryset, 'query'):
+            return queryset
+        return plan_queryset(queryset, self.get_serializer_class(), fields=self.get_requested_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        return prune_fields(super().get_serializer(*args, **kwargs), self.get_requested_fields())
@@ -0,0 +1,96 @@
+# backend/renderers.py
+"""
+Formatos compactos para listados, negociados con el header Accept (o con
+?format=columnar / ?format=msgpack).
+
+Layout columnar: cada lista de filas con las mismas claves se envía por
+columnas, y las columnas de texto repetido (nombres de cliente, servicio,
+empleado, fechas, estados) se codifican como diccionario + índices:
+
+    {
+        "layout": "columnar",
+        "count": 3,
+        "columns": {
+            "id": [10, 11, 12],
+            "service_name": {"dictionary": ["Corte", "Tinte"], "codes": [0, 1, 0]},
+            "notes": ["alergia", null, "tinte"]
+        }
+    }
+
+Para reconstruir la fila i: columns[c][i], o dictionary[codes[i]] si la
+columna viene codificada (un código null es un valor null). Se codifican
+la lista de primer nivel y las listas de filas dentro de un dict (por
+ejemplo 'results' de la paginación o 'changed' del delta del calendario);
+todo lo demás viaja igual que en JSON.
+
+MessagePack usa el mismo layout y requiere el paquete opcional msgpack; si
+no está instalado settings no registra el renderer.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # dependencia opcional
+    msgpack = None
+
+COLUMNAR_LAYOUT = 'columnar'
+
+
+def _dictionary_encode(values):
+    """Codifica una columna de textos si hay al menos dos filas por valor distinto"""
+    if not all(value is None or isinstance(value, str) for value in values):
+        return values
+    index = {}
+    codes = [None if value is None else index.setdefault(value, len(index)) for value in values]
+    if len(index) * 2 > len(values):
+        return values
+    return {'dictionary': list(index), 'codes': codes}
+
+
+def encode_rows(rows):
+    """Lista de filas (dicts con las mismas claves) en layout columnar; None si no aplica"""
+    if not all(isinstance(row, dict) for row in rows):
+        return None
+    keys = list(rows[0]) if rows else []
+    if any(list(row) != keys for row in rows):
+        return None
+    return {
+        'layout': COLUMNAR_LAYOUT,
+        'count': len(rows),
+        'columns': {key: _dictionary_encode([row[key] for row in rows]) for key in keys},
+    }
+
+
+def to_columnar(data):
+    if isinstance(data, list):
+        encoded = encode_rows(data)
+        return data if encoded is None else encoded
+    if isinstance(data, dict):
+        return {
+            key: (encode_rows(value) or value) if isinstance(value, list) and value else value
+            for key, value in data.items()
+        }
+    return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.estetica.columnar+json'
+    format = COLUMNAR_LAYOUT
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columnar(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Fechas, Decimal, UUID, etc. igual que en JSON
+        return msgpack.packb(to_columnar(data), default=JSONEncoder().default, use_bin_type=True)
+
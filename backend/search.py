@@ -0,0 +1,150 @@
+# backend/search.py
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .tenancy import get_tenant
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    Reemplazo de SearchFilter pensado para los índices GIN de pg_trgm.
+
+    Mantiene el mismo ?search= y las mismas búsquedas icontains (que
+    PostgreSQL resuelve con los índices trigram sobre UPPER(campo)), pero:
+
+    - Los campos de una relación (client__first_name) se resuelven primero
+      contra la tabla relacionada, acotada al negocio del usuario, y se
+      filtran por id. Un OR entre un campo propio y un JOIN obliga a recorrer
+      la tabla completa; un OR entre columnas indexadas se resuelve con
+      BitmapOr.
+    - Si el cliente no pide ?ordering= y hay como mucho `rank_limit`
+      coincidencias, se ordenan por similitud trigram con el texto buscado.
+      La similitud de los campos relacionados se calcula una vez por fila
+      relacionada, no por cita. Con más coincidencias calcular la similitud
+      de todas cuesta más que la búsqueda y el resultado sale en el orden
+      normal de la vista (el LIMIT corta apenas llena la página).
+    - Con paginación por keyset (?cursor= / ?page_size=) tampoco se ordena
+      por similitud: las páginas siguen keyset_ordering (ver
+      backend/pagination.py).
+    """
+    # Sobre este número de coincidencias en la tabla relacionada se usa una
+    # subconsulta en vez de una lista de ids
+    related_ids_limit = 1000
+    # Máximo de resultados que se ordenan por similitud
+    rank_limit = 200
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        text = ' '.join(search_terms)
+        local_fields, related_fields = self.split_search_fields(queryset.model, search_fields)
+        related_scores = {relation: {} for relation in related_fields}
+
+        conditions = []
+        for search_term in search_terms:
+            queries = [
+                Q(**{self.construct_search(search_field): search_term})
+                for search_field in local_fields
+            ]
+            for relation, fields in related_fields.items():
+                matches = self.get_related_matches(request, queryset.model, relation, fields, search_term)
+                scores = self.get_related_scores(matches, fields, text)
+                if scores is None:
+                    queries.append(Q(**{f'{relation}__in': matches.values('pk')}))
+                    related_scores[relation] = None
+                else:
+                    queries.append(Q(**{f'{relation}__in': list(scores)}))
+                    if related_scores[relation] is not None:
+                        related_scores[relation].update(scores)
+            conditions.append(reduce(operator.or_, queries))
+        matched = queryset.filter(reduce(operator.and_, conditions))
+        if not self.should_rank(request, view):
+            return matched
+
+        # Una consulta acotada decide si vale la pena ordenar; si sí, la
+        # similitud se calcula solo sobre esas filas
+        ids = list(matched.order_by().values_list('pk', flat=True)[:self.rank_limit + 1])
+        if len(ids) > self.rank_limit:
+            return matched
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        rank = self.get_rank(local_fields, related_fields, related_scores, text)
+        return queryset.filter(pk__in=ids).annotate(search_rank=rank).order_by('-search_rank', *ordering)
+
+    def should_rank(self, request, view):
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return False
+        paginator = getattr(view, 'paginator', None)
+        is_requested = getattr(paginator, 'is_requested', None)
+        return not (is_requested and is_requested(request))
+
+    def split_search_fields(self, model, search_fields):
+        """
+        Separa los campos propios de los que cruzan una FK directa. Los demás
+        (m2m, relaciones inversas) se dejan como búsqueda normal.
+        """
+        local_fields = []
+        related_fields = {}
+        for search_field in map(str, search_fields):
+            prefix = search_field[0] if search_field[0] in self.lookup_prefixes else ''
+            relation, _, rest = search_field[len(prefix):].partition(LOOKUP_SEP)
+            if rest and model._meta.get_field(relation).many_to_one:
+                related_fields.setdefault(relation, []).append(prefix + rest)
+            else:
+                local_fields.append(search_field)
+        return local_fields, related_fields
+
+    def get_related_matches(self, request, model, relation, fields, search_term):
+        related_model = model._meta.get_field(relation).related_model
+        matches = related_model._default_manager.filter(reduce(operator.or_, [
+            Q(**{self.construct_search(field): search_term}) for field in fields
+        ]))
+
+        tenant = get_tenant(request)
+        has_business = any(f.name == 'business' for f in related_model._meta.get_fields())
+        if has_business and not tenant.is_superuser and tenant.business_id:
+            matches = matches.filter(business_id=tenant.business_id)
+        return matches
+
+    def get_related_scores(self, matches, fields, text):
+        """{pk: similitud} de las filas relacionadas, o None si son demasiadas"""
+        rows = list(
+            matches.annotate(search_rank=self.similarity(fields, text))
+            .values_list('pk', 'search_rank')[:self.related_ids_limit + 1]
+        )
+        if len(rows) > self.related_ids_limit:
+            return None
+        return dict(rows)
+
+    def get_rank(self, local_fields, related_fields, related_scores, text):
+        ranks = [self.similarity(local_fields, text)] if local_fields else []
+        for relation, scores in related_scores.items():
+            if scores is None:
+                # Demasiadas filas para precalcular: similitud vía JOIN
+                ranks.append(self.similarity(
+                    [f'{relation}{LOOKUP_SEP}{field}' for field in related_fields[relation]], text
+                ))
+                continue
+            by_score = {}
+            for pk, score in scores.items():
+                by_score.setdefault(score, []).append(pk)
+            ranks.append(Case(
+                *[When(**{f'{relation}__in': pks}, then=Value(score)) for score, pks in by_score.items()],
+                default=Value(0.0),
+                output_field=FloatField(),
+            ))
+        return ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+
+    def similarity(self, fields, text):
+        similarities = [TrigramSimilarity(field.lstrip(''.join(self.lookup_prefixes)), text) for field in fields]
+        return similarities[0] if len(similarities) == 1 else Greatest(*similarities)
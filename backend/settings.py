@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from importlib.util import find_spec
 from datetime import timedelta
 
 DATABASE_URL_SYSTEM = os.environ.get('DATABASE_URL')
@@ -32,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -102,6 +104,38 @@ else:
         }
     }
 
+# Caché: Redis si está configurado (compartido entre workers); si no,
+# memoria local del proceso.
+#
+# REDIS_URL es obligatorio con más de un proceso (varios workers de gunicorn,
+# o comandos como sweep_appointments/import_appointments corriendo aparte):
+# las invalidaciones (resumen mensual, negocio del tenant, generaciones de
+# backend/versioning.py) se hacen sobre la caché, y con LocMemCache solo
+# llegan al proceso que las hizo. Sin Redis, SHARED_CACHE queda en False:
+# el negocio del tenant y las respuestas versionadas no se guardan en caché,
+# y el resumen mensual puede quedar hasta una hora desactualizado en los
+# demás procesos (MONTH_OVERVIEW_TIMEOUT).
+REDIS_URL = os.environ.get('REDIS_URL')
+SHARED_CACHE = bool(REDIS_URL)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Citas terminadas con más de estos días pasan a la tabla de archivo
+# (comando sweep_appointments)
+APPOINTMENT_ARCHIVE_DAYS = int(os.environ.get('APPOINTMENT_ARCHIVE_DAYS', '365'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -158,6 +192,12 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # JSON por defecto; los formatos compactos solo si el cliente los pide (ver backend/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'backend.renderers.ColumnarJSONRenderer',
+    ] + (['backend.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
 }
 
 # JWT Settings
@@ -0,0 +1,114 @@
+# backend/tenancy.py
+"""
+Contexto del tenant (negocio) de la petición.
+
+Se resuelve una sola vez por petición a partir del usuario autenticado y de
+los datos del negocio, que se guardan en caché entre peticiones (los signals
+de Business la invalidan) solo si la caché es compartida entre procesos
+(settings.SHARED_CACHE): con LocMemCache la invalidación no llegaría a los
+demás workers y seguirían sirviendo nombre y marca viejos. Así las vistas no repiten el lazy-load de
+user.business ni la consulta "¿es dueño?" en cada método.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+TENANT_CACHE_TIMEOUT = 60 * 60  # 1 hora
+
+# Campos del negocio que viajan en el contexto (los de BusinessSerializer más el dueño)
+BUSINESS_FIELDS = (
+    'id', 'name', 'slug', 'owner_id', 'logo_url', 'working_days',
+    'primary_color', 'employee_label', 'booking_tagline',
+)
+
+
+def business_cache_key(business_id):
+    return f'tenancy:business:{business_id}'
+
+
+def get_business_data(business_id):
+    """
+    Datos del negocio como dict, desde la caché o con una consulta. Sin
+    caché compartida se consulta siempre (una vez por petición, ver
+    get_tenant).
+    """
+    from authentication.models import Business
+    if not settings.SHARED_CACHE:
+        return Business.objects.filter(pk=business_id).values(*BUSINESS_FIELDS).first()
+    data = cache.get(business_cache_key(business_id))
+    if data is None:
+        data = Business.objects.filter(pk=business_id).values(*BUSINESS_FIELDS).first()
+        if data is not None:
+            cache.set(business_cache_key(business_id), data, TENANT_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_business(business_id):
+    """Se borra al hacer commit, por el mismo motivo que invalidate_month_overview"""
+    if business_id:
+        transaction.on_commit(lambda: cache.delete(business_cache_key(business_id)))
+
+
+@dataclass(frozen=True)
+class TenantContext:
+    user_id: int
+    business_id: int | None
+    is_superuser: bool
+    is_staff: bool
+    is_owner: bool
+    business: dict | None
+
+    @property
+    def is_admin(self):
+        """Staff o dueño: ve y administra todo su negocio"""
+        return self.is_staff or self.is_owner
+
+    @property
+    def scope(self):
+        """
+        Alcance de los datos visibles: 'all' (superusuario), 'business'
+        (staff o dueño), 'employee' (solo lo propio) o None (sin negocio).
+        """
+        if self.is_superuser:
+            return 'all'
+        if not self.business_id:
+            return None
+        return 'business' if self.is_admin else 'employee'
+
+
+def get_tenant(request):
+    """Contexto del usuario de la petición; se calcula una vez por petición"""
+    http_request = getattr(request, '_request', request)
+    tenant = getattr(http_request, '_tenant', None)
+    user = request.user
+    if tenant is not None and tenant.user_id == user.pk:
+        return tenant
+
+    business = get_business_data(user.business_id) if user.business_id else None
+    tenant = TenantContext(
+        user_id=user.pk,
+        business_id=business['id'] if business else None,
+        is_superuser=user.is_superuser,
+        is_staff=user.is_staff,
+        is_owner=bool(business) and business['owner_id'] == user.pk,
+        business=business,
+    )
+    http_request._tenant = tenant
+    return tenant
+
+
+class TenantMixin:
+    """Acceso al contexto del tenant desde vistas y viewsets"""
+
+    @property
+    def tenant(self):
+        return get_tenant(self.request)
+
+    def require_business(self, message="Tu usuario no tiene un negocio asignado."):
+        """business_id del usuario, o ValidationError si no tiene negocio"""
+        if not self.tenant.business_id:
+            raise ValidationError(message)
+        return self.tenant.business_id
@@ -0,0 +1,43 @@
+# backend/testing.py
+"""
+Piezas mínimas para armar los datos de los tests.
+
+Los usuarios se crean con bulk_create: User.objects.create dispara el signal
+que crea el calendario de Google del empleado en otro hilo. Las citas se
+arman sin guardar (build_appointment) para que cada test elija entre
+bulk_create, que tampoco dispara signals, o save().
+"""
+from datetime import datetime, timedelta
+
+from django.utils.text import slugify
+
+from appointments.models import Appointment
+from authentication.models import Business, User
+from services.models import Service, ServiceCategory
+
+
+def create_business(name='Estética Sol', **fields):
+    return Business.objects.create(name=name, slug=fields.pop('slug', slugify(name)), **fields)
+
+
+def create_users(business, *usernames, **fields):
+    """Usuarios del negocio, en el mismo orden, sin pasar por los signals"""
+    return User.objects.bulk_create([
+        User(username=username, email=f'{username}@example.com', business=business, **fields)
+        for username in usernames
+    ])
+
+
+def create_service(business, name='Corte', price=10000, duration=30, category=None):
+    if category is None:
+        category = ServiceCategory.objects.create(business=business, name='Cabello')
+    return Service.objects.create(business=business, category=category, name=name, price=price, duration=duration)
+
+
+def build_appointment(service, employee, client, day, start, status='confirmed', **fields):
+    """Cita sin guardar que dura lo que el servicio"""
+    end = (datetime.combine(day, start) + timedelta(minutes=service.duration)).time()
+    return Appointment(
+        business_id=service.business_id, service=service, employee=employee, client=client,
+        date=day, start_time=start, end_time=fields.pop('end_time', end), status=status, **fields,
+    )
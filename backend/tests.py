@@ -0,0 +1,372 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appointments.models import Appointment
+from appointments.transitions import bulk_transition
+from authentication.models import Business
+from clients.models import Client
+from .pagination import KeysetPagination
+from .testing import build_appointment, create_business, create_service, create_users
+from .versioning import GENERATION_TIMEOUT, generation_key
+
+
+class QueryPlannerTests(TestCase):
+    """Las relaciones que leen los serializers se cargan en bloque."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.employees = create_users(cls.business, 'estilista', 'manicurista')
+        cls.clients = Client.objects.bulk_create([
+            Client(business=cls.business, first_name=name, last_name='Soto', email=f'{name.lower()}@example.com')
+            for name in ('Ana', 'Luis', 'Marta')
+        ])
+
+    def book(self, count, first_day):
+        Appointment.objects.bulk_create([
+            build_appointment(self.service, self.employees[i % 2], self.clients[i % 3],
+                              date(2030, 1, first_day + i // 2), time(10, 0))
+            for i in range(count)
+        ])
+
+    def count_queries(self, path):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        paths = ('/api/appointments/', '/api/appointments/calendar/', '/api/services/', '/api/auth/users/')
+        self.book(2, first_day=1)
+        few = [self.count_queries(path) for path in paths]
+        self.book(20, first_day=2)
+        create_users(self.business, 'cajera', 'maquilladora')
+        many = [self.count_queries(path) for path in paths]
+        self.assertEqual(few, many)
+
+
+class KeysetPaginationTests(TestCase):
+    """Recorrer todas las páginas con ?page_size= entrega cada fila una sola vez."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.employees = create_users(cls.business, 'estilista', 'manicurista')
+        cls.clients = Client.objects.bulk_create([
+            Client(business=cls.business, first_name=f'Cliente{i}', last_name='Soto', email=f'cliente{i}@example.com')
+            for i in range(5)
+        ])
+        # Varias citas con la misma fecha y hora (una por empleado): desempata el id
+        Appointment.objects.bulk_create([
+            build_appointment(cls.service, employee, cls.clients[0], date(2030, 1, day), time(hour, 0))
+            for day, hour in ((2, 10), (1, 10), (1, 9), (2, 9), (1, 11))
+            for employee in cls.employees
+        ])
+        # created_at que difieren solo en microsegundos, con un empate exacto
+        base = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+        for client, micro in zip(cls.clients, (3, 1, 2, 1, 0)):
+            Client.objects.filter(pk=client.pk).update(created_at=base + timedelta(microseconds=micro))
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.staff)
+
+    def get(self, url, **params):
+        return self.api.get(url, params, HTTP_HOST='localhost')
+
+    def walk(self, url, page_size, before_next_page=None):
+        response = self.get(url, page_size=page_size)
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), page_size)
+            ids += [row['id'] for row in response.data['results']]
+            if not response.data['next']:
+                return ids
+            if before_next_page:
+                before_next_page()
+            response = self.api.get(response.data['next'], HTTP_HOST='localhost')
+
+    def test_appointments_by_date_start_time_and_id(self):
+        expected = list(Appointment.objects.filter(business=self.business)
+                        .order_by('date', 'start_time', 'id').values_list('id', flat=True))
+        for page_size in (1, 3, 4, len(expected)):
+            self.assertEqual(self.walk('/api/appointments/', page_size), expected, page_size)
+
+    def test_clients_by_created_at_microseconds(self):
+        expected = list(Client.objects.filter(business=self.business)
+                        .order_by('-created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 5)
+        for page_size in (1, 2):
+            self.assertEqual(self.walk('/api/clients/', page_size), expected, page_size)
+
+    def test_invalid_cursor_is_not_found(self):
+        cursor = self.get('/api/appointments/', page_size=2).data['next_cursor']
+        tampered = cursor[:-2] + ('AA' if cursor[-2:] != 'AA' else 'BB')
+        wrong_length = KeysetPagination().encode_cursor(['2030-01-01', '09:00:00'])
+        wrong_type = KeysetPagination().encode_cursor(['mañana', '09:00:00', 1])
+        for value in (tampered, wrong_length, wrong_type, 'no es base64!', base64.urlsafe_b64encode(b'{}').decode()):
+            response = self.get('/api/appointments/', cursor=value)
+            self.assertEqual(response.status_code, 404, value)
+
+    def test_insert_between_pages(self):
+        expected = list(Appointment.objects.filter(business=self.business)
+                        .order_by('date', 'start_time', 'id').values_list('id', flat=True))
+        inserted = []
+
+        def book():
+            # Una cita antes del cursor y otra después, en cada página
+            if not inserted:
+                rows = Appointment.objects.bulk_create([
+                    build_appointment(self.service, self.employees[0], self.clients[1], date(2029, 12, 31), time(9, 0)),
+                    build_appointment(self.service, self.employees[0], self.clients[1], date(2030, 1, 3), time(9, 0)),
+                ])
+                inserted.extend(row.pk for row in rows)
+
+        ids = self.walk('/api/appointments/', 3, before_next_page=book)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, expected + [inserted[1]])
+
+    def test_without_params_returns_full_list(self):
+        response = self.get('/api/appointments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), Appointment.objects.filter(business=self.business).count())
+        clients = self.get('/api/clients/').data
+        self.assertIsInstance(clients, list)
+        self.assertEqual(sorted(row['id'] for row in clients), sorted(client.pk for client in self.clients))
+
+
+class CompactRendererTests(TestCase):
+    """El layout columnar reconstruye exactamente la respuesta JSON."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = create_business()
+        service = create_service(business)
+        cls.staff, = create_users(business, 'recepcion', is_staff=True)
+        clients = Client.objects.bulk_create([
+            Client(business=business, first_name=name, last_name='Soto', email=f'{name.lower()}@example.com')
+            for name in ('Ana', 'Luis', 'Marta')
+        ])
+        # Texto repetido (servicio, empleado, estado) que se codifica como diccionario
+        Appointment.objects.bulk_create([
+            build_appointment(service, cls.staff, clients[i % 3], date(2030, 1, 1 + i // 8), time(9 + i % 8, 0),
+                              status=('confirmed', 'pending')[i % 2])
+            for i in range(24)
+        ])
+
+    @staticmethod
+    def decode(table):
+        columns = {
+            key: [column['dictionary'][code] if code is not None else None for code in column['codes']]
+            if isinstance(column, dict) else column
+            for key, column in table['columns'].items()
+        }
+        return [{key: values[i] for key, values in columns.items()} for i in range(table['count'])]
+
+    def test_columnar_calendar(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        plain = client.get('/api/appointments/calendar/', HTTP_HOST='localhost')
+        compact = client.get('/api/appointments/calendar/', HTTP_HOST='localhost',
+                             HTTP_ACCEPT='application/vnd.estetica.columnar+json')
+        self.assertEqual(compact['Content-Type'], 'application/vnd.estetica.columnar+json')
+        table = json.loads(compact.content)
+        self.assertEqual(table['columns']['service_name']['dictionary'], ['Corte'])
+        self.assertEqual(sorted(table['columns']['status']['dictionary']), ['confirmed', 'pending'])
+        self.assertIsInstance(table['columns']['id'], list)
+        self.assertEqual(self.decode(table), json.loads(plain.content))
+        self.assertLess(len(compact.content), len(plain.content) / 2)
+
+        page = client.get('/api/clients/?page_size=2&format=columnar', HTTP_HOST='localhost').json()
+        self.assertEqual(page['results']['count'], 2)
+        self.assertIsNotNone(page['next_cursor'])
+
+
+
+@override_settings(SHARED_CACHE=True)
+class VersionedResponseTests(TestCase):
+    """ETag por generación del negocio: 304 sin consultas mientras nada cambie."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.service = create_service(cls.business)
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.employee, = create_users(cls.business, 'estilista')
+        cls.ana = Client.objects.create(business=cls.business, first_name='Ana', last_name='Soto',
+                                        email='ana@example.com')
+        Appointment.objects.bulk_create([
+            build_appointment(cls.service, cls.staff, cls.ana, date(2030, 1, 7), time(10, 0), status='pending'),
+            build_appointment(cls.service, cls.employee, cls.ana, date(2030, 1, 7), time(11, 0)),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def get(self, path, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(path, HTTP_HOST='localhost', **headers)
+
+    def test_not_modified_without_queries(self):
+        for path in ('/api/services/', '/api/services/categories/', '/api/products/',
+                     '/api/appointments/calendar/', '/api/auth/businesses/me/'):
+            first = self.get(path)
+            self.assertEqual(first.status_code, 200, path)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.get(path, first['ETag']).status_code, 304, path)
+                cached = self.get(path)
+            self.assertEqual(cached.content, first.content, path)
+            self.assertEqual(cached['ETag'], first['ETag'], path)
+
+    def test_writes_change_the_etag(self):
+        services = self.get('/api/services/')
+        calendar = self.get('/api/appointments/calendar/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.get(pk=self.ana.pk).save()
+        self.assertEqual(self.get('/api/services/', services['ETag']).status_code, 304)
+        self.assertEqual(self.get('/api/appointments/calendar/', calendar['ETag']).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.name = 'Corte renovado'
+            self.service.save()
+        response = self.get('/api/services/', services['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['name'], 'Corte renovado')
+
+        # Las rutas masivas avanzan la generación vía invalidate_month_overview
+        calendar = self.get('/api/appointments/calendar/')
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Appointment.objects.filter(business=self.business, status='pending'), 'confirmed')
+        self.assertEqual(self.get('/api/appointments/calendar/', calendar['ETag']).status_code, 200)
+
+    def test_employee_gets_own_version(self):
+        staff_etag = self.get('/api/appointments/calendar/')['ETag']
+        self.client.force_authenticate(self.employee)
+        response = self.get('/api/appointments/calendar/', staff_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['employee'] for row in response.data}, {self.employee.pk})
+
+    def test_cached_calendar_gets_fresh_watermark(self):
+        first_at = datetime(2030, 1, 7, 15, 0, tzinfo=timezone.utc)
+        later = first_at + timedelta(minutes=5)
+        with mock.patch('django.utils.timezone.now', return_value=first_at):
+            first = self.get('/api/appointments/calendar/')
+            delta = self.get(f'/api/appointments/calendar/?updated_since={first_at:%Y-%m-%dT%H:%M:%SZ}')
+        self.assertEqual((first['X-Sync-Watermark'], delta.status_code), (first_at.isoformat(), 200))
+
+        with mock.patch('django.utils.timezone.now', return_value=later), self.assertNumQueries(0):
+            cached = self.get('/api/appointments/calendar/')
+            not_modified = self.get('/api/appointments/calendar/', first['ETag'])
+            cached_delta = self.get(f'/api/appointments/calendar/?updated_since={first_at:%Y-%m-%dT%H:%M:%SZ}')
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        for response in (cached, not_modified, cached_delta):
+            self.assertEqual(response['X-Sync-Watermark'], later.isoformat())
+        self.assertEqual(cached_delta.data['watermark'], later.isoformat())
+        self.assertEqual(cached_delta.data['changed'], delta.data['changed'])
+
+    def test_period_follows_the_date(self):
+        monday = datetime(2030, 1, 7, 15, 0, tzinfo=timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=monday):
+            this_week = self.get('/api/appointments/calendar/?period=week')
+        self.assertEqual(len(this_week.data), 2)
+        # Sin escrituras de por medio: a la semana siguiente cambia la respuesta y el ETag
+        with mock.patch('django.utils.timezone.now', return_value=monday + timedelta(days=7)):
+            next_week = self.get('/api/appointments/calendar/?period=week', this_week['ETag'])
+        self.assertEqual(next_week.status_code, 200)
+        self.assertEqual(next_week.data, [])
+
+    def test_generation_expires(self):
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            self.get('/api/services/')
+        key = generation_key(self.business.pk, 'services')
+        self.assertEqual(add.call_args.args[::2], (key, GENERATION_TIMEOUT))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_skipped_without_shared_cache(self):
+        first = self.get('/api/auth/businesses/me/')
+        self.assertNotIn('ETag', first)
+        # Un cambio hecho por otro proceso (sin signals aquí) se ve de inmediato
+        Business.objects.filter(pk=self.business.pk).update(name='Otro nombre')
+        self.assertEqual(self.get('/api/auth/businesses/me/').data['name'], 'Otro nombre')
+
+
+@override_settings(SHARED_CACHE=True)
+class BatchEndpointTests(TestCase):
+    """/api/batch/ ejecuta varias lecturas con un solo contexto autenticado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = create_business()
+        service = create_service(business)
+        cls.staff, = create_users(business, 'recepcion', is_staff=True)
+        ana = Client.objects.create(business=business, first_name='Ana', last_name='Soto', email='ana@example.com')
+        Appointment.objects.bulk_create([
+            build_appointment(service, cls.staff, ana, date(2030, 1, 7), time(10, 0)),
+            build_appointment(service, cls.staff, ana, date(2030, 1, 8), time(10, 0), status='pending'),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def batch(self, requests):
+        return self.client.post('/api/batch/', {'requests': requests}, format='json', HTTP_HOST='localhost')
+
+    def test_dashboard_in_one_request(self):
+        paths = ['/api/services/', '/api/services/categories/', '/api/auth/users/?omit=groups',
+                 '/api/appointments/?fields=id,status', '/api/auth/businesses/me/']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch([{'id': str(i), 'path': path} for i, path in enumerate(paths)])
+        self.assertEqual(response.status_code, 200)
+        business_lookups = [q for q in queries if 'FROM "authentication_business"' in q['sql']]
+        self.assertEqual(len(business_lookups), 1)
+
+        for position, (path, result) in enumerate(zip(paths, response.data['responses'])):
+            self.assertEqual(result['id'], str(position))
+            self.assertEqual(result['status'], 200, path)
+            self.assertEqual(result['body'], self.client.get(path, HTTP_HOST='localhost').data, path)
+
+    def test_authenticates_once(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.staff)}')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/batch/', {'requests': [{'path': '/api/services/'}] * 3},
+                                   format='json', HTTP_HOST='localhost')
+        self.assertEqual([r['status'] for r in response.data['responses']], [200] * 3)
+        user_lookups = [q for q in queries if 'FROM "authentication_user"' in q['sql']]
+        self.assertEqual(len(user_lookups), 1)
+
+    def test_conditional_and_invalid_subrequests(self):
+        etag = self.client.get('/api/services/', HTTP_HOST='localhost')['ETag']
+        responses = self.batch([
+            {'path': '/api/services/', 'headers': {'If-None-Match': etag}},
+            {'path': '/api/no-existe/'},
+        ]).data['responses']
+        self.assertEqual([r['status'] for r in responses], [304, 404])
+        self.assertEqual(responses[0]['etag'], etag)
+
+        response = self.batch([{'path': '/api/clients/', 'method': 'POST'}, {'path': '/api/batch/'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {0, 1})
\ No newline at end of file
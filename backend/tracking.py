@@ -0,0 +1,57 @@
+# backend/tracking.py
+
+
+class FieldTrackerMixin:
+    """
+    Recuerda los valores con que se cargó una instancia desde la base de
+    datos, para que save() y los signals sepan qué cambió sin un SELECT
+    previo.
+
+    `tracked_fields` usa attname (por ejemplo 'business_id' para una FK),
+    así comparar no dispara consultas. Después de save() los campos
+    guardados pasan a ser los valores de referencia. Los campos diferidos
+    (only/defer) se rastrean desde que se cargan.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_tracking()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.reset_tracking(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.reset_tracking(kwargs.get('update_fields'))
+
+    def reset_tracking(self, fields=None, **previous):
+        """
+        Toma los valores actuales como referencia (solo `fields` si se
+        indica). `previous` fija a mano el valor anterior de un campo, para
+        instancias recargadas después de un UPDATE masivo.
+        """
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        attnames = {
+            self._meta.get_field(name).attname for name in fields
+        } if fields is not None else None
+        for attname in self.tracked_fields:
+            if attname in self.__dict__ and (attnames is None or attname in attnames):
+                loaded[attname] = self.__dict__[attname]
+        loaded.update(previous)
+
+    def previous(self, field):
+        """Valor cargado de la base (None si la instancia es nueva o no se cargó)"""
+        return self.__dict__.get('_loaded_values', {}).get(field)
+
+    def has_changed(self, field):
+        loaded = self.__dict__.get('_loaded_values', {})
+        if field not in loaded:
+            return self._state.adding
+        return loaded[field] != self.__dict__.get(field)
+
+    def changed_fields(self):
+        return {field for field in self.tracked_fields if self.has_changed(field)}
@@ -19,6 +19,7 @@ from django.urls import include, path
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view # type: ignore
 from drf_yasg import openapi # type: ignore
+from backend.batch import BatchView
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -42,4 +43,5 @@ urlpatterns = [
     path('api/services/', include('services.urls')),
     path('api/appointments/', include('appointments.urls')),
     path('api/products/', include('products.urls')),
+    path('api/batch/', BatchView.as_view(), name='api-batch'),
 ]
@@ -0,0 +1,177 @@
+# backend/values_serializer.py
+"""
+Serializers de solo lectura sobre .values().
+
+Un ValuesSerializer toma un ModelSerializer de referencia y compila sus
+campos (una vez por clase) en una lista de columnas para .values() y una
+transformación de dict a dict. Así los listados grandes no instancian un
+modelo ni llaman to_representation campo por campo en cada fila, y la
+salida es la misma que la del ModelSerializer.
+
+Los campos que no son columnas (métodos, propiedades, SerializerMethodField
+o un to_representation propio) se declaran en `computed`:
+
+    computed = {
+        'client_name': Computed(('client__first_name', 'client__last_name'), client_full_name),
+    }
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models.query import ModelIterable, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+# Campos DRF cuyo to_representation devuelve el valor de la base tal cual
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField, serializers.ReadOnlyField, serializers.RelatedField,
+)
+
+
+class Computed:
+    """Campo calculado en Python a partir de una o más columnas"""
+
+    def __init__(self, lookups, function):
+        self.lookups = tuple(lookups)
+        self.function = function
+
+
+def _is_column(model, attrs, field):
+    """¿La fuente del campo termina en una columna alcanzable con JOINs a uno?"""
+    for position, attr in enumerate(attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return False
+        last = position == len(attrs) - 1
+        if not model_field.is_relation:
+            return last and model_field.concrete
+        if model_field.many_to_many or model_field.one_to_many:
+            return False
+        if last:
+            # values('fk') devuelve el id: solo sirve a un PrimaryKeyRelatedField
+            return isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization()
+        model = model_field.related_model
+    return False
+
+
+def _transform_for(field):
+    """Transformación de un valor no nulo; None si se copia tal cual"""
+    if isinstance(field, (serializers.DateField, serializers.TimeField)):
+        default = api_settings.DATE_FORMAT if isinstance(field, serializers.DateField) else api_settings.TIME_FORMAT
+        if getattr(field, 'format', default) == ISO_8601:
+            return lambda value: value.isoformat()
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    # DateTimeField (zona horaria), DecimalField (formato) y el resto
+    return field.to_representation
+
+
+class ValuesSerializer:
+    """
+    Mismo uso que un serializer de DRF en lectura: ValuesSerializer(qs,
+    many=True).data. Acepta un queryset del modelo (se le aplica .values())
+    o filas de `values()` (queryset o lista). Con `fields` se entregan solo
+    esos campos y se leen solo sus columnas.
+    """
+    serializer_class = None
+    computed = {}
+
+    def __init__(self, instance=None, many=False, fields=None):
+        self.instance = instance
+        self.many = many
+        self.fields = fields
+
+    @classmethod
+    def compile(cls):
+        """(lookups, columnas) de la clase; se calcula una sola vez"""
+        if '_compiled' not in cls.__dict__:
+            serializer = cls.serializer_class()
+            model = serializer.Meta.model
+            lookups = []
+            columns = []
+            for name, field in serializer.fields.items():
+                if field.write_only:
+                    continue
+                if name in cls.computed:
+                    spec = cls.computed[name]
+                    columns.append((name, spec.lookups, None, spec.function))
+                    lookups.extend(spec.lookups)
+                    continue
+                if field.source == '*' or not _is_column(model, field.source_attrs, field):
+                    raise ImproperlyConfigured(
+                        f"{cls.__name__}: el campo '{name}' no es una columna; decláralo en computed"
+                    )
+                lookup = LOOKUP_SEP.join(field.source_attrs)
+                columns.append((name, (lookup,), _transform_for(field), None))
+                lookups.append(lookup)
+            cls._compiled = (tuple(dict.fromkeys(lookups)), tuple(columns))
+        return cls._compiled
+
+    @classmethod
+    def columns(cls, fields=None):
+        columns = cls.compile()[1]
+        if fields is None:
+            return columns
+        return tuple(column for column in columns if column[0] in fields)
+
+    @classmethod
+    def values(cls, queryset, *extra, fields=None):
+        """El queryset como filas de .values(); `extra` agrega columnas (p. ej. las del cursor)"""
+        lookups = [lookup for column in cls.columns(fields) for lookup in column[1]]
+        return queryset.select_related(None).prefetch_related(None).values(*dict.fromkeys(lookups + list(extra)))
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookups, transform, function in self.columns(self.fields):
+            if function is not None:
+                data[name] = function(*[row[lookup] for lookup in lookups])
+                continue
+            value = row[lookups[0]]
+            data[name] = value if transform is None or value is None else transform(value)
+        return data
+
+    @property
+    def data(self):
+        rows = self.instance
+        if isinstance(rows, QuerySet) and rows._iterable_class is ModelIterable:
+            rows = self.values(rows, fields=self.fields)
+        if not self.many:
+            return self.to_representation(rows)
+        return [self.to_representation(row) for row in rows]
+
+
+class ValuesReadMixin:
+    """
+    list/retrieve de un ModelViewSet con `values_serializer_class`. La
+    escritura sigue pasando por serializer_class. retrieve entrega la fila
+    (un dict) a check_object_permissions: úsese con permisos que no lean
+    atributos del objeto. Va antes de QueryPlannerMixin, que aporta
+    get_requested_fields (?fields= / ?omit=).
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self, instance, many=False):
+        return self.values_serializer_class(instance, many=many, fields=self.get_requested_fields())
+
+    def get_values_queryset(self):
+        # Las columnas del cursor de KeysetPagination tienen que venir en la fila
+        ordering = tuple(name.lstrip('-') for name in getattr(self, 'keyset_ordering', ()))
+        return self.values_serializer_class.values(
+            self.filter_queryset(self.get_queryset()), *ordering, fields=self.get_requested_fields()
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_values_serializer(page, many=True).data)
+        return Response(self.get_values_serializer(queryset, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(self.get_values_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(self.get_values_serializer(row).data)
@@ -0,0 +1,128 @@
+# backend/versioning.py
+"""
+Caché de respuestas versionada por negocio, con ETag y GET condicional.
+
+Cada negocio lleva un contador de generación por ámbito ('services',
+'products', 'appointments', 'business'). Los signals de los modelos de cada
+ámbito (y las rutas masivas, vía invalidate_month_overview) lo avanzan al
+hacer commit. La generación forma parte de la clave de la respuesta en
+caché y del ETag, así que nunca hay que borrar respuestas: las viejas
+dejan de leerse y expiran solas.
+
+Con If-None-Match y la misma generación se responde 304 sin consultar la
+base (la autenticación JWT sigue cargando el usuario).
+
+La fecha local también forma parte de la clave: las vistas que filtran
+según el día (?period=week) cambian de respuesta a medianoche aunque no
+haya escrituras.
+
+Solo se activa con caché compartida (settings.SHARED_CACHE): con
+LocMemCache cada proceso tendría su propio contador y los avances hechos
+por otro worker o por un comando nunca llegarían al que responde.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.tenancy import get_tenant
+
+RESPONSE_CACHE_TIMEOUT = 10 * 60  # 10 minutos
+# Mayor que RESPONSE_CACHE_TIMEOUT; al expirar arranca una generación nueva
+GENERATION_TIMEOUT = 24 * 60 * 60  # 1 día
+
+
+def generation_key(business_id, scope):
+    return f'versioning:{scope}:{business_id}'
+
+
+def get_generation(business_id, scope):
+    key = generation_key(business_id, scope)
+    generation = cache.get(key)
+    if generation is None:
+        # Se arranca en un valor que no se repite aunque se vacíe la caché:
+        # un ETag guardado por el cliente no puede volver a coincidir
+        cache.add(key, time.time_ns(), GENERATION_TIMEOUT)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(business_ids, *scopes):
+    """Avanza la generación de los ámbitos al hacer commit, igual que invalidate_month_overview"""
+    if business_ids is None or isinstance(business_ids, int):
+        business_ids = [business_ids]
+    keys = {generation_key(business_id, scope) for business_id in business_ids if business_id for scope in scopes}
+    if not keys:
+        return
+
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                pass  # sin generación: la próxima lectura arranca una nueva
+
+    transaction.on_commit(bump)
+
+
+def versioned_response(scope, refresh=None):
+    """
+    Decorador para métodos GET de vistas y viewsets. La respuesta (200) se
+    guarda por negocio, generación, fecha, ruta, query string y visibilidad
+    del usuario; el ETag agrega el formato negociado. Los superusuarios no
+    pasan por la caché (sus vistas cruzan negocios), y sin caché compartida
+    no se usa.
+
+    refresh(response, now) recalcula lo que depende del momento (por
+    ejemplo el watermark de sincronización) en las respuestas que no pasan
+    por la vista: las leídas de la caché y los 304. `now` se toma antes de
+    leer la generación, igual que si la vista hubiera consultado la base.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            tenant = get_tenant(request)
+            if not settings.SHARED_CACHE or tenant.scope not in ('business', 'employee'):
+                return method(self, request, *args, **kwargs)
+
+            now = timezone.now()
+            generation = get_generation(tenant.business_id, scope)
+            # Un empleado solo ve lo propio: su respuesta no se comparte
+            viewer = tenant.user_id if tenant.scope == 'employee' else 'business'
+            today = timezone.localdate(now)
+            variant = f'{scope}:{tenant.business_id}:{generation}:{today}:{viewer}:{request.get_full_path()}'
+            digest = hashlib.sha1(f'{variant}:{request.accepted_media_type}'.encode()).hexdigest()
+            etag = f'"{digest}"'
+
+            client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in client_etags or '*' in client_etags:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+                if refresh:
+                    refresh(response, now)
+                return response
+
+            cache_key = 'versioning:response:' + hashlib.sha1(variant.encode()).hexdigest()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                data, headers = cached
+                response = Response(data, headers=headers)
+                if refresh:
+                    refresh(response, now)
+            else:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(cache_key, (response.data, dict(response.items())), RESPONSE_CACHE_TIMEOUT)
+            response['ETag'] = etag
+            # El cliente puede guardarla pero debe revalidar con el ETag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
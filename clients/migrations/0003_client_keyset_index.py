@@ -0,0 +1,17 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('clients', '0002_client_business'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='client',
+            index=models.Index(fields=['business', '-created_at', 'id'], name='client_biz_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('clients', '0003_client_keyset_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='client',
+            index=GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='client_first_name_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='client',
+            index=GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='client_last_name_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='client',
+            index=GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='client_email_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='client',
+            index=GinIndex(OpClass(Upper('phone'), name='gin_trgm_ops'), name='client_phone_trgm_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 # clients/models.py
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from authentication.models import Business  # importamos Business
 
 
@@ -37,6 +39,14 @@ class Client(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['business', '-created_at', 'id'], name='client_biz_created_id_idx'),
+            # Búsqueda ?search= por trigramas (icontains compila a UPPER(campo) LIKE ...)
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='client_first_name_trgm_idx'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='client_last_name_trgm_idx'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='client_email_trgm_idx'),
+            GinIndex(OpClass(Upper('phone'), name='gin_trgm_ops'), name='client_phone_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
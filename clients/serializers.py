@@ -1,8 +1,14 @@
 from rest_framework import serializers
+from backend.values_serializer import ValuesSerializer
 from .models import Client
 
 class ClientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = '__all__'
-        read_only_fields = ('id', 'created_at', 'updated_at')
\ No newline at end of file
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+
+class ClientValuesSerializer(ValuesSerializer):
+    """Listado de clientes sin instanciar modelos (ver backend/values_serializer.py)"""
+    serializer_class = ClientSerializer
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.versioning import bump_generation
+from .models import Client
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def bump_client_generation(sender, instance, **kwargs):  # noqa: ARG001
+    """El nombre del cliente sale en el calendario."""
+    bump_generation(instance.business_id, 'appointments')
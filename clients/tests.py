@@ -1,3 +1,39 @@
+from datetime import date
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.testing import create_business, create_users
+from .models import Client
+from .serializers import ClientSerializer, ClientValuesSerializer
+
+
+class ClientValuesSerializerTests(TestCase):
+    """ClientValuesSerializer entrega lo mismo que ClientSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = create_business()
+        cls.staff, = create_users(cls.business, 'recepcion', is_staff=True)
+        cls.clients = Client.objects.bulk_create([
+            Client(business=cls.business, first_name='Ana', last_name='Soto', email='ana@example.com',
+                   gender='F', birth_date=date(1990, 5, 17), phone='555'),
+            Client(business=cls.business, first_name='Luis', last_name='Rojas', email='luis@example.com'),
+            Client(business=cls.business, first_name='Marta', last_name='Díaz', email='marta@example.com',
+                   is_active=False),
+        ])
+
+    def test_same_output_as_model_serializer(self):
+        queryset = Client.objects.filter(business=self.business).order_by('id')
+        expected = ClientSerializer(queryset, many=True).data
+        self.assertEqual(ClientValuesSerializer(queryset, many=True).data, expected)
+        values = ClientValuesSerializer.values(queryset).get(pk=expected[0]['id'])
+        self.assertEqual(ClientValuesSerializer(values).data, expected[0])
 
-# Create your tests here.
+    def test_list_pages(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        first = client.get('/api/clients/?page_size=2', HTTP_HOST='localhost').data
+        rest = client.get(first['next'], HTTP_HOST='localhost').data
+        ids = [row['id'] for row in first['results'] + rest['results']]
+        self.assertEqual(sorted(ids), sorted(c.pk for c in self.clients))
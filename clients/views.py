@@ -1,31 +1,42 @@
 # clients/views.py
 from rest_framework import viewsets, permissions
+from django_filters.rest_framework import DjangoFilterBackend
 from .models import Client
-from .serializers import ClientSerializer
+from .serializers import ClientSerializer, ClientValuesSerializer
+from backend.pagination import KeysetPagination
+from backend.query_planner import QueryPlannerMixin
+from backend.search import TrigramSearchFilter
+from backend.tenancy import TenantMixin
+from backend.values_serializer import ValuesReadMixin
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(ValuesReadMixin, QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     """
     API endpoint para gestionar clientes.
     Cada usuario solo ve los clientes de su propio negocio.
     """
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    values_serializer_class = ClientValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter]
+    search_fields = ['first_name', 'last_name', 'email', 'phone']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', 'id')
 
     def get_queryset(self):
-        user = self.request.user
+        tenant = self.tenant
 
-        if user.is_superuser:
+        if tenant.is_superuser:
             queryset = Client.objects.all()
             # Superadmin puede filtrar por negocio via query param
             business_id = self.request.query_params.get('business', None)
             if business_id:
                 queryset = queryset.filter(business_id=business_id)
-        elif not user.business:
+        elif not tenant.business_id:
             return Client.objects.none()
         else:
-            queryset = Client.objects.filter(business=user.business)
+            queryset = Client.objects.filter(business_id=tenant.business_id)
 
         is_active = self.request.query_params.get('is_active', None)
         if is_active is not None:
@@ -34,8 +45,4 @@ class ClientViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        business = self.request.user.business
-        if not business:
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError("Tu usuario no tiene un negocio asignado.")
-        serializer.save(business=business)
\ No newline at end of file
+        serializer.save(business_id=self.require_business())
\ No newline at end of file
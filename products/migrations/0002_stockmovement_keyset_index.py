@@ -0,0 +1,17 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='stockmovement',
+            index=models.Index(fields=['-created_at', 'id'], name='stockmov_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0013_partition_ready'),
+        ('products', '0002_stockmovement_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='appointment',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='product_movements', to='appointments.appointment', verbose_name='Cita relacionada'),
+        ),
+    ]
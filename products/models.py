@@ -62,6 +62,9 @@ class Product(models.Model):
 
     @property
     def current_stock(self):
+        # stock_total viene anotado en los listados (ver ProductSerializer.query_hints)
+        if hasattr(self, 'stock_total'):
+            return self.stock_total or 0
         result = self.movements.aggregate(total=Sum('quantity'))
         return result['total'] or 0
 
@@ -108,6 +111,10 @@ class StockMovement(models.Model):
         'appointments.Appointment',
         on_delete=models.SET_NULL,
         null=True, blank=True,
+        # Sin FK en la base: una tabla particionada no puede tener un índice
+        # único solo sobre id (ver partition_appointments). Django sigue
+        # aplicando SET_NULL al borrar con el ORM.
+        db_constraint=False,
         related_name='product_movements',
         verbose_name="Cita relacionada"
     )
@@ -118,6 +125,9 @@ class StockMovement(models.Model):
         verbose_name = "Movimiento de Stock"
         verbose_name_plural = "Movimientos de Stock"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='stockmov_created_id_idx'),
+        ]
 
     def __str__(self):
         direction = "+" if self.quantity > 0 else ""
@@ -1,15 +1,26 @@
+from django.db.models import Count, Q, Sum
 from rest_framework import serializers
+from backend.values_serializer import Computed, ValuesSerializer
 from .models import ProductCategory, Product, StockMovement
 
+MOVEMENT_TYPE_LABELS = dict(StockMovement.MOVEMENT_TYPES)
+
 
 class ProductCategorySerializer(serializers.ModelSerializer):
     product_count = serializers.SerializerMethodField()
 
+    # Ver backend/query_planner.py
+    query_hints = {
+        'product_count': {'annotate': {'active_product_count': Count('products', filter=Q(products__is_active=True))}},
+    }
+
     class Meta:
         model = ProductCategory
         fields = ['id', 'name', 'description', 'is_active', 'product_count']
 
     def get_product_count(self, obj):
+        if hasattr(obj, 'active_product_count'):
+            return obj.active_product_count
         return obj.products.filter(is_active=True).count()
 
 
@@ -18,6 +29,12 @@ class ProductSerializer(serializers.ModelSerializer):
     current_stock = serializers.ReadOnlyField()
     is_low_stock = serializers.ReadOnlyField()
 
+    # Ver backend/query_planner.py y Product.current_stock
+    query_hints = {
+        'current_stock': {'annotate': {'stock_total': Sum('movements__quantity')}},
+        'is_low_stock': {'annotate': {'stock_total': Sum('movements__quantity')}},
+    }
+
     class Meta:
         model = Product
         fields = [
@@ -41,6 +58,9 @@ class StockMovementSerializer(serializers.ModelSerializer):
     performed_by_name = serializers.SerializerMethodField()
     movement_type_display = serializers.ReadOnlyField(source='get_movement_type_display')
 
+    # Ver backend/query_planner.py
+    query_hints = {'performed_by_name': {'select': ['performed_by']}}
+
     class Meta:
         model = StockMovement
         fields = [
@@ -61,3 +81,23 @@ class StockMovementSerializer(serializers.ModelSerializer):
         if instance.unit_price is not None:
             data['unit_price'] = float(instance.unit_price)
         return data
+
+
+def performed_by_name(first_name, last_name, username):
+    if username is None:
+        return None
+    return f"{first_name} {last_name}".strip() or username
+
+
+class StockMovementValuesSerializer(ValuesSerializer):
+    """Misma salida que StockMovementSerializer, sobre .values()"""
+    serializer_class = StockMovementSerializer
+    computed = {
+        'performed_by_name': Computed(
+            ('performed_by__first_name', 'performed_by__last_name', 'performed_by__username'), performed_by_name
+        ),
+        'movement_type_display': Computed(
+            ('movement_type',), lambda value: MOVEMENT_TYPE_LABELS.get(value, value)
+        ),
+        'unit_price': Computed(('unit_price',), lambda value: float(value) if value is not None else None),
+    }
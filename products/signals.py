@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.versioning import bump_generation
+from .models import Product, ProductCategory, StockMovement
+
+
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_generation(sender, instance, **kwargs):  # noqa: ARG001
+    bump_generation(instance.business_id, 'products')
+
+
+@receiver(post_save, sender=StockMovement)
+@receiver(post_delete, sender=StockMovement)
+def bump_stock_generation(sender, instance, **kwargs):  # noqa: ARG001
+    """El stock actual de cada producto sale de sus movimientos."""
+    business_id = Product.objects.filter(pk=instance.product_id).values_list('business_id', flat=True).first()
+    bump_generation(business_id, 'products')
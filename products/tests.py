@@ -0,0 +1,35 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.testing import create_business, create_users
+from .models import Product, ProductCategory, StockMovement
+from .serializers import StockMovementSerializer, StockMovementValuesSerializer
+
+
+class StockMovementValuesSerializerTests(TestCase):
+    """StockMovementValuesSerializer entrega lo mismo que StockMovementSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = create_business()
+        cls.staff, = create_users(business, 'bodega', is_staff=True)
+        category = ProductCategory.objects.create(business=business, name='Cremas')
+        product = Product.objects.create(business=business, category=category, name='Crema', sale_price='12.50')
+        StockMovement.objects.create(product=product, quantity=5, movement_type='in', unit_price='7.30',
+                                     performed_by=cls.staff)
+        StockMovement.objects.create(product=product, quantity=-1, movement_type='sale')
+
+    def test_same_output_as_model_serializer(self):
+        queryset = StockMovement.objects.order_by('id')
+        expected = StockMovementSerializer(queryset, many=True).data
+        self.assertEqual(StockMovementValuesSerializer(queryset, many=True).data, expected)
+        values = StockMovementValuesSerializer.values(queryset).get(pk=expected[0]['id'])
+        self.assertEqual(StockMovementValuesSerializer(values).data, expected[0])
+
+    def test_retrieve_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        movement = StockMovement.objects.filter(performed_by__isnull=True).get()
+        response = client.get(f'/api/products/movements/{movement.pk}/', HTTP_HOST='localhost')
+        self.assertEqual(response.data, StockMovementSerializer(movement).data)
+        self.assertEqual(client.get('/api/products/movements/0/', HTTP_HOST='localhost').status_code, 404)
@@ -5,24 +5,31 @@ from rest_framework.exceptions import ValidationError
 from django.db.models import Sum
 
 from .models import ProductCategory, Product, StockMovement
-from .serializers import ProductCategorySerializer, ProductSerializer, StockMovementSerializer
+from .serializers import (
+    ProductCategorySerializer, ProductSerializer, StockMovementSerializer, StockMovementValuesSerializer
+)
+from backend.pagination import KeysetPagination
+from backend.query_planner import QueryPlannerMixin
+from backend.tenancy import TenantMixin
+from backend.values_serializer import ValuesReadMixin
+from backend.versioning import versioned_response
 
 
-class ProductCategoryViewSet(viewsets.ModelViewSet):
+class ProductCategoryViewSet(QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     serializer_class = ProductCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
+        tenant = self.tenant
+        if tenant.is_superuser:
             qs = ProductCategory.objects.all()
             business_id = self.request.query_params.get('business')
             if business_id:
                 qs = qs.filter(business_id=business_id)
-        elif not user.business:
+        elif not tenant.business_id:
             return ProductCategory.objects.none()
         else:
-            qs = ProductCategory.objects.filter(business=user.business)
+            qs = ProductCategory.objects.filter(business_id=tenant.business_id)
 
         is_active = self.request.query_params.get('is_active')
         if is_active is not None:
@@ -31,27 +38,26 @@ class ProductCategoryViewSet(viewsets.ModelViewSet):
         return qs
 
     def perform_create(self, serializer):
-        business = self.request.user.business
-        if not business:
-            raise ValidationError("Tu usuario no tiene un negocio asignado.")
-        serializer.save(business=business)
+        serializer.save(business_id=self.require_business())
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('category__name', 'name', 'id')
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
-            qs = Product.objects.select_related('category').all()
+        tenant = self.tenant
+        if tenant.is_superuser:
+            qs = Product.objects.all()
             business_id = self.request.query_params.get('business')
             if business_id:
                 qs = qs.filter(business_id=business_id)
-        elif not user.business:
+        elif not tenant.business_id:
             return Product.objects.none()
         else:
-            qs = Product.objects.select_related('category').filter(business=user.business)
+            qs = Product.objects.filter(business_id=tenant.business_id)
 
         category_id = self.request.query_params.get('category')
         if category_id:
@@ -74,18 +80,17 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         return qs.order_by('category__name', 'name')
 
+    @versioned_response('products')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        business = self.request.user.business
-        if not business:
-            raise ValidationError("Tu usuario no tiene un negocio asignado.")
-        serializer.save(business=business)
+        serializer.save(business_id=self.require_business())
 
     @action(detail=True, methods=['get'])
     def movements(self, request, pk=None):
         product = self.get_object()
-        qs = product.movements.select_related('performed_by').all()
-        serializer = StockMovementSerializer(qs, many=True)
-        return Response(serializer.data)
+        return Response(StockMovementValuesSerializer(product.movements.all(), many=True).data)
 
 
 def models_min_stock_ref():
@@ -93,24 +98,25 @@ def models_min_stock_ref():
     return F('min_stock')
 
 
-class StockMovementViewSet(viewsets.ModelViewSet):
+class StockMovementViewSet(ValuesReadMixin, QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     serializer_class = StockMovementSerializer
+    values_serializer_class = StockMovementValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['get', 'post', 'head', 'options']  # sin PUT/PATCH/DELETE — los movimientos son inmutables
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', 'id')
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
-            qs = StockMovement.objects.select_related('product', 'performed_by').all()
+        tenant = self.tenant
+        if tenant.is_superuser:
+            qs = StockMovement.objects.all()
             business_id = self.request.query_params.get('business')
             if business_id:
                 qs = qs.filter(product__business_id=business_id)
-        elif not user.business:
+        elif not tenant.business_id:
             return StockMovement.objects.none()
         else:
-            qs = StockMovement.objects.select_related('product', 'performed_by').filter(
-                product__business=user.business
-            )
+            qs = StockMovement.objects.filter(product__business_id=tenant.business_id)
 
         product_id = self.request.query_params.get('product')
         if product_id:
@@ -139,7 +145,7 @@ class StockMovementViewSet(viewsets.ModelViewSet):
         product = serializer.validated_data.get('product')
 
         # Verificar que el producto pertenece al mismo negocio
-        if not user.is_superuser and product.business != user.business:
+        if not self.tenant.is_superuser and product.business_id != self.tenant.business_id:
             raise ValidationError("No tienes permiso para registrar movimientos en este producto.")
 
         # Capturar precio unitario del producto si no se envió
@@ -113,7 +113,7 @@ class GoogleCalendarService:
             chile_tz = pytz.timezone('America/Santiago')
             start_datetime = chile_tz.localize(start_datetime)
             end_datetime = chile_tz.localize(end_datetime)
-            precio_formateado = format_chilean_price(appointment.service.price)
+            precio_formateado = format_chilean_price(appointment.booked_price)
             
             
             # Crear evento con estado visible y colores correctos
@@ -201,27 +201,7 @@ class GoogleCalendarService:
             
             updated_event = {
                 'summary': f'{self.get_status_emoji(appointment.status)} {appointment.service.name}',
-                'description': f'''
-👤 Cliente: {appointment.client.get_full_name()}
-📱 Teléfono: {appointment.client.phone or 'No especificado'}
-📧 Email: {appointment.client.email}
-💅 Servicio: {appointment.service.name}
-💰 Precio: ${appointment.service.price}
-📍 Estado: {appointment.get_status_display()}
-📝 Notas: {appointment.notes or 'Sin notas'}
-
-🔄 ESTADO ACTUALIZADO: {appointment.get_status_display().upper()}
-
-🔄 CAMBIAR ESTADO (edita el emoji del título):
-⏳ = Pendiente (Amarillo)
-✅ = Confirmada (Verde)  
-🎉 = Completada (Azul)
-❌ = Cancelada (Rojo)
-
-⏰ Última actualización: {datetime.now(chile_tz).strftime('%d/%m/%Y %H:%M')} (Chile)
-
-🌐 Sistema: {getattr(settings, 'FRONTEND_URL', 'https://tu-sistema.com')}
-                '''.strip(),
+                'description': self.get_updated_event_description(appointment),
                 'start': {
                     'dateTime': start_datetime.isoformat(),
                     'timeZone': 'America/Santiago',
@@ -263,6 +243,73 @@ class GoogleCalendarService:
             print(traceback.format_exc())
             return False
     
+    def get_updated_event_description(self, appointment):
+        chile_tz = pytz.timezone('America/Santiago')
+        return f'''
+👤 Cliente: {appointment.client.get_full_name()}
+📱 Teléfono: {appointment.client.phone or 'No especificado'}
+📧 Email: {appointment.client.email}
+💅 Servicio: {appointment.service.name}
+💰 Precio: ${appointment.booked_price}
+📍 Estado: {appointment.get_status_display()}
+📝 Notas: {appointment.notes or 'Sin notas'}
+
+🔄 ESTADO ACTUALIZADO: {appointment.get_status_display().upper()}
+
+🔄 CAMBIAR ESTADO (edita el emoji del título):
+⏳ = Pendiente (Amarillo)
+✅ = Confirmada (Verde)  
+🎉 = Completada (Azul)
+❌ = Cancelada (Rojo)
+
+⏰ Última actualización: {datetime.now(chile_tz).strftime('%d/%m/%Y %H:%M')} (Chile)
+
+🌐 Sistema: {getattr(settings, 'FRONTEND_URL', 'https://tu-sistema.com')}
+                '''.strip()
+
+    # Límite de llamadas por petición batch de la API de Google
+    BATCH_SIZE = 50
+
+    def patch_appointment_statuses(self, appointments):
+        """
+        Actualiza título, descripción y color de varios eventos tras un cambio
+        de estado masivo. Usa peticiones batch (hasta 50 llamadas por ida y
+        vuelta) y PATCH, que conserva fechas y recordatorios sin leer antes
+        el evento. Devuelve la cantidad de eventos actualizados.
+        """
+        pending = [
+            appointment for appointment in appointments
+            if appointment.google_calendar_event_id and appointment.employee.google_calendar_id
+        ]
+        updated = 0
+
+        def on_response(request_id, response, exception):
+            nonlocal updated
+            if exception:
+                print(f"❌ Error actualizando evento de la cita {request_id}: {exception}")
+            else:
+                updated += 1
+
+        for start in range(0, len(pending), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for appointment in pending[start:start + self.BATCH_SIZE]:
+                batch.add(
+                    self.service.events().patch(
+                        calendarId=appointment.employee.google_calendar_id,
+                        eventId=appointment.google_calendar_event_id,
+                        body={
+                            'summary': f'{self.get_status_emoji(appointment.status)} {appointment.service.name}',
+                            'description': self.get_updated_event_description(appointment),
+                            'colorId': self.get_color_by_status(appointment.status),
+                        },
+                    ),
+                    request_id=str(appointment.id),
+                )
+            batch.execute()
+
+        print(f"✅ {updated} eventos actualizados en Google Calendar (batch)")
+        return updated
+
     def delete_appointment_event(self, calendar_id, event_id):
         """Eliminar evento cuando se cancela la cita"""
         try:
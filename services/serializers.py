@@ -9,13 +9,16 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
         required=False
     )
     
+    # Ver backend/query_planner.py
+    query_hints = {'allowed_roles': {'prefetch': ['allowed_roles__role']}}
+
     class Meta:
         model = ServiceCategory
         fields = ['id', 'name', 'description', 'is_active', 'allowed_roles', 'roles']
     
     def get_allowed_roles(self, obj):
         try:
-            role_permissions = RoleCategoryPermission.objects.filter(category=obj)
+            role_permissions = obj.allowed_roles.all()
             return [{'id': rp.role.id, 'name': rp.role.name} for rp in role_permissions]
         except Exception as e:
             import logging
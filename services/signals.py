@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.versioning import bump_generation
+from .models import RoleCategoryPermission, Service, ServiceCategory
+
+
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+def bump_category_generation(sender, instance, **kwargs):  # noqa: ARG001
+    """Las categorías salen en el listado de servicios (category_name)."""
+    bump_generation(instance.business_id, 'services')
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def bump_service_generation(sender, instance, **kwargs):  # noqa: ARG001
+    """El nombre del servicio también sale en el calendario."""
+    bump_generation(instance.business_id, 'services', 'appointments')
+
+
+@receiver(post_save, sender=RoleCategoryPermission)
+@receiver(post_delete, sender=RoleCategoryPermission)
+def bump_role_permission_generation(sender, instance, **kwargs):  # noqa: ARG001
+    business_id = ServiceCategory.objects.filter(pk=instance.category_id).values_list('business_id', flat=True).first()
+    bump_generation(business_id, 'services')
@@ -5,6 +5,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import ServiceCategory, Service, RoleCategoryPermission
 from .serializers import ServiceCategorySerializer, ServiceSerializer, RoleCategoryPermissionSerializer
+from backend.pagination import KeysetPagination
+from backend.query_planner import QueryPlannerMixin, plan_queryset
+from backend.tenancy import TenantMixin
+from backend.versioning import versioned_response
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
 from authentication.models import User
@@ -29,23 +33,23 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class ServiceCategoryViewSet(viewsets.ModelViewSet):
+class ServiceCategoryViewSet(QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     queryset = ServiceCategory.objects.all()
     serializer_class = ServiceCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
+        tenant = self.tenant
 
-        if user.is_superuser:
+        if tenant.is_superuser:
             queryset = ServiceCategory.objects.all()
             business_id = self.request.query_params.get('business', None)
             if business_id:
                 queryset = queryset.filter(business_id=business_id)
-        elif not user.business:
+        elif not tenant.business_id:
             return ServiceCategory.objects.none()
         else:
-            queryset = ServiceCategory.objects.filter(business=user.business)
+            queryset = ServiceCategory.objects.filter(business_id=tenant.business_id)
 
         is_active = self.request.query_params.get('is_active', None)
         if is_active is not None:
@@ -73,12 +77,13 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @versioned_response('services')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        business = self.request.user.business
-        if not business:
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError("Tu usuario no tiene un negocio asignado. Contacta al administrador.")
-        serializer.save(business=business)
+        business_id = self.require_business("Tu usuario no tiene un negocio asignado. Contacta al administrador.")
+        serializer.save(business_id=business_id)
 
     @action(detail=True, methods=['post'])
     def assign_roles(self, request, pk=None):
@@ -125,23 +130,25 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
             return Response({"error": f"Error interno del servidor: {str(e)}"}, status=500)
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(QueryPlannerMixin, TenantMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-category__is_active', 'category__name', 'name', 'id')
 
     def get_queryset(self):
-        user = self.request.user
+        tenant = self.tenant
 
-        if user.is_superuser:
+        if tenant.is_superuser:
             queryset = Service.objects.all()
             business_id = self.request.query_params.get('business', None)
             if business_id:
                 queryset = queryset.filter(business_id=business_id)
-        elif not user.business:
+        elif not tenant.business_id:
             return Service.objects.none()
         else:
-            queryset = Service.objects.filter(business=user.business)
+            queryset = Service.objects.filter(business_id=tenant.business_id)
 
         is_active = self.request.query_params.get('is_active', None)
         if is_active is not None:
@@ -157,18 +164,18 @@ class ServiceViewSet(viewsets.ModelViewSet):
 
         return queryset.order_by('-category__is_active', 'category__name', 'name')
 
+    @versioned_response('services')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        business = self.request.user.business
-        if not business:
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError("Tu usuario no tiene un negocio asignado.")
-        serializer.save(business=business)
+        serializer.save(business_id=self.require_business())
 
     @action(detail=False, methods=['get'])
     def available_for_appointments(self, request):
-        user = request.user
+        tenant = self.tenant
 
-        if user.is_superuser:
+        if tenant.is_superuser:
             business_id = request.query_params.get('business', None)
             if business_id:
                 queryset = Service.objects.filter(
@@ -181,16 +188,16 @@ class ServiceViewSet(viewsets.ModelViewSet):
                     is_active=True,
                     category__is_active=True
                 )
-        elif not user.business:
+        elif not tenant.business_id:
             return Response([])
         else:
             queryset = Service.objects.filter(
-                business=user.business,
+                business_id=tenant.business_id,
                 is_active=True,
                 category__is_active=True
             )
 
-        queryset = queryset.order_by('category__name', 'name')
+        queryset = plan_queryset(queryset.order_by('category__name', 'name'), self.get_serializer_class())
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -206,17 +213,17 @@ class ServiceViewSet(viewsets.ModelViewSet):
 
             if not allowed_roles:
                 users_with_roles = User.objects.filter(
-                    business=request.user.business,
+                    business_id=self.tenant.business_id,
                     is_active=True
                 )
             else:
                 users_with_roles = User.objects.filter(
-                    business=request.user.business,
+                    business_id=self.tenant.business_id,
                     groups__in=allowed_roles,
                     is_active=True
                 ).distinct()
 
-            serializer = UserSerializer(users_with_roles, many=True)
+            serializer = UserSerializer(plan_queryset(users_with_roles, UserSerializer), many=True)
             return Response(serializer.data)
 
         except Service.DoesNotExist:
@@ -225,7 +232,7 @@ class ServiceViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=500)
 
 
-class RoleCategoryPermissionViewSet(viewsets.ModelViewSet):
+class RoleCategoryPermissionViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = RoleCategoryPermission.objects.all()
     serializer_class = RoleCategoryPermissionSerializer
     permission_classes = [permissions.IsAuthenticated]